@@ -0,0 +1,23 @@
+"""알림톡 관리 시스템의 화면 없는 핵심 모듈.
+
+저장소(Repository), 시간 차감(DeductionService), 메시지 렌더러(MessageRenderer),
+대시보드 집계·기사 정산(reports) 을 화면 프로그램과 명령줄 도구(python -m alimtalk)가 함께 쓴다.
+"""
+
+from .ledger import Ledger
+from .messages import MessageRenderer, MessageTemplate, TemplateRegistry, compile_template
+from .reports import DashboardStats, Settlement
+from .repository import Repository
+from .service import DeductionService
+
+__all__ = [
+    "DashboardStats",
+    "DeductionService",
+    "Ledger",
+    "MessageRenderer",
+    "MessageTemplate",
+    "Repository",
+    "Settlement",
+    "TemplateRegistry",
+    "compile_template",
+]
@@ -0,0 +1,377 @@
+"""합성 데이터로 자주 쓰는 경로의 속도를 재고 기준값(baseline)과 비교한다.
+
+실제 데이터 폴더를 건드리지 않도록 임시 폴더를 데이터 폴더(ALIMTALK_DATA_DIR)로 지정한
+하위 프로세스에서 돈다. 같은 seed·크기의 데이터는 한 번 만들어 두고 다시 쓴다.
+"""
+
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from . import columns
+from .columns import RecordColumns
+from .config import (CUSTOMERS_FILE, DATA_DIR, DEFAULT_SETTINGS, DRIVERS_FILE, LEDGER_FILE,
+                     RECORDS_FILE, SETTINGS_FILE, TEMPLATES_FILE)
+from .messages import MessageRenderer, TemplateRegistry, compile_template, message_values
+from .reports import DashboardStats
+from .repository import Repository
+from .storage import load_json, load_json_array, open_json_array, save_json
+from .util import from_minutes
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류전홍고문양손배백허유남심노하곽성차주우구민진나지엄채원천방공현함변염여추도소석선설마길연위표명기반왕금옥육인맹제모탁국어은편용예경봉사부가복태목형피두감호"
+GIVEN = "민서준지현우예은도윤하시수연진영성재가희동혜승주원채아유정소태경나호"
+# 크기는 명령줄에서 줄일 수 있다 (기본값은 사무실 PC 몇 년 치 규모)
+DEFAULT_SIZES = {"customers": 20000, "records": 500000, "drivers": 50}
+DEFAULT_BASELINE = "bench_baseline.json"
+
+
+# ─── 합성 데이터 ───
+def korean_name(rng):
+    return rng.choice(SURNAMES) + rng.choice(GIVEN) + rng.choice(GIVEN)
+
+
+def generate_dataset(seed=1, customers=20000, records=500000, drivers=50, days=365, today=None):
+    """(고객, 기록, 기사, 원장) 을 만든다. 같은 seed 면 같은 데이터가 나온다.
+
+    소수 고객이 차감의 대부분을 차지하도록(지프 분포) 고르고, 플레이는 30분 단위다.
+    최근 2% 기록만 미발송으로 남긴다.
+    """
+    rng = random.Random(seed)
+    today = today or date(2024, 12, 31)
+    phones = rng.sample(range(10000000, 100000000), customers)
+    customer_list = [{
+        "id": f"c{n:06d}",
+        "name": korean_name(rng),
+        "phone": f"010-{p // 10000:04d}-{p % 10000:04d}",
+        "game_name": rng.choice(("리니지", "리니지", "리니지M", "리니지2M", "아이온")),
+        "memo": "",
+        "created_at": (datetime.combine(today, datetime.min.time()) - timedelta(days=days + 30)).isoformat(),
+    } for n, p in enumerate(phones)]
+    driver_list = [{"id": f"d{n:03d}", "name": f"{korean_name(rng)} 기사",
+                    "hourly_rate": rng.randrange(5000, 10001, 500)} for n in range(drivers)]
+
+    # 지프 분포 가중치로 차감할 고객을 고른다
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(customers)]
+    rng.shuffle(weights)
+    picks = rng.choices(range(customers), weights=weights, k=records)
+    driver_picks = rng.choices(range(drivers), k=records)
+
+    template = compile_template(DEFAULT_SETTINGS["message_template"])
+    tid = TemplateRegistry.template_id(template.text)
+    used = [0] * customers
+    start = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+    step = days * 86400 / records
+    pending_from = int(records * 0.98)
+    record_list = []
+    for n in range(records):
+        ci = picks[n]
+        c = customer_list[ci]
+        d = driver_list[driver_picks[n]]
+        minutes = rng.choice((30, 60, 60, 90, 120, 120, 180, 240, 360))
+        hours = from_minutes(minutes)
+        created = start + timedelta(seconds=n * step)
+        used_before = from_minutes(used[ci])
+        used[ci] += minutes
+        record_list.append({
+            "id": f"r{n:07d}",
+            "customer_id": c["id"],
+            "customer_name": c["name"],
+            "driver_name": d["name"],
+            "play_hours": hours,
+            "hourly_rate": d["hourly_rate"],
+            "total_pay": round(hours * d["hourly_rate"]),
+            "date": created.date().isoformat(),
+            "message_sent": n < pending_from,
+            "created_at": created.isoformat(),
+            "used_before": used_before,
+            "used_after": from_minutes(used[ci]),
+            # 남은 시간은 아래에서 구매 시간을 정한 뒤 채운다
+            "remaining_after": 0,
+            "message": {"template": tid, "values": None},
+        })
+
+    adjustments = []
+    purchased = []
+    for ci, c in enumerate(customer_list):
+        total = used[ci] + rng.randrange(0, 21) * 60
+        purchased.append(total)
+        c["total_hours"] = from_minutes(total)
+        c["used_hours"] = from_minutes(used[ci])
+        adjustments.append({"id": f"a{ci:06d}", "customer_id": c["id"], "kind": "purchase",
+                            "minutes": total, "at": "", "note": "기초 잔액"})
+    for r in record_list:
+        ci = int(r["customer_id"][1:])
+        total = from_minutes(purchased[ci])
+        r["remaining_after"] = total - r["used_after"]
+        before = dict(customer_list[ci], total_hours=total, used_hours=r["used_before"])
+        values = message_values(DEFAULT_SETTINGS["business_name"], before, r["play_hours"],
+                                r["driver_name"], r["total_pay"], r["date"])
+        r["message"]["values"] = template.snapshot(values)
+    return customer_list, record_list, driver_list, adjustments
+
+
+def write_dataset(dataset):
+    """합성 데이터를 지금의 데이터 폴더에 쓴다"""
+    customers, records, drivers, adjustments = dataset
+    save_json(CUSTOMERS_FILE, customers)
+    save_json(RECORDS_FILE, records)
+    save_json(DRIVERS_FILE, drivers)
+    save_json(LEDGER_FILE, adjustments)
+    # 보관하지 않아야 기록이 모두 메모리에 올라온다
+    save_json(SETTINGS_FILE, dict(DEFAULT_SETTINGS, archive_months=0))
+    template = DEFAULT_SETTINGS["message_template"]
+    save_json(TEMPLATES_FILE, {TemplateRegistry.template_id(template): template})
+
+
+# ─── 측정 ───
+class Benchmark:
+    """구간마다 repeat 번 재서 중앙값과 최솟값을 남긴다"""
+
+    def __init__(self, repeat=5):
+        self.repeat = repeat
+        self.results = {}
+
+    def time(self, name, fn, repeat=None, number=1):
+        """fn 을 number 번 부르는 데 걸린 시간을 repeat 번 잰다. 결과는 호출 한 번당 초"""
+        runs = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                fn()
+            runs.append((time.perf_counter() - started) / number)
+        self.results[name] = {"median": statistics.median(runs), "min": min(runs),
+                              "runs": len(runs), "number": number}
+        print(f"  {name:<36}{format_seconds(self.results[name]['median']):>12}", flush=True)
+        return self.results[name]
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 0.001:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+def file_cases(bench, heavy_repeat=3):
+    """load_json / save_json / 배열 스트리밍 읽기. 읽은 목록은 함수가 끝나면 놓아서 다음 구간의 메모리를 비운다"""
+    records_path = os.path.join(DATA_DIR, "bench-records.json")
+    customers_path = os.path.join(DATA_DIR, "bench-customers.json")
+
+    bench.time("load_json customers", lambda: load_json(CUSTOMERS_FILE, []))
+    bench.time("load_json records", lambda: load_json(RECORDS_FILE, []), repeat=heavy_repeat)
+    bench.time("load_json_array records", lambda: load_json_array(RECORDS_FILE, []), repeat=heavy_repeat)
+    bench.time("iter_json_array records (건수만)", lambda: sum(1 for _ in open_json_array(RECORDS_FILE)[1]),
+               repeat=heavy_repeat)
+    customers = load_json(CUSTOMERS_FILE, [])
+    records = load_json(RECORDS_FILE, [])
+    bench.time("save_json customers", lambda: save_json(customers_path, customers))
+    bench.time("save_json records", lambda: save_json(records_path, records), repeat=heavy_repeat)
+
+
+def core_cases(bench, heavy_repeat=3):
+    """화면 없이 잴 수 있는 구간. 마지막으로 불러온 저장소를 돌려준다"""
+    file_cases(bench, heavy_repeat)
+
+    def load_repository():
+        repo = Repository().load()
+        repo.release()
+        return repo
+
+    bench.time("Repository.load (시작 데이터)", load_repository, repeat=heavy_repeat)
+    repo = load_repository()
+
+    bench.time("대시보드 집계 (DashboardStats)",
+               lambda: DashboardStats(repo.customers, repo.records), repeat=heavy_repeat)
+    bench.time("대시보드 요약 조회", lambda: (repo.stats.summary(), repo.stats.recent()), number=1000)
+
+    rng = random.Random(7)
+    ids = [rng.choice(repo.customers)["id"] for _ in range(1000)]
+    labels = [repo.customer_index.label_of(cid) for cid in ids]
+    it = iter(range(10 ** 9))
+    bench.time("고객 조회 (id)", lambda: repo.customer_index.get(ids[next(it) % 1000]), number=10000)
+    bench.time("고객 조회 (콤보 표시 문자열)",
+               lambda: repo.customer_index.find_by_label(labels[next(it) % 1000]), number=10000)
+    queries = [repo.customer_index.get(cid)["name"][:2] for cid in ids[:100]]
+    bench.time("고객 검색 (이름 앞 두 글자)",
+               lambda: repo.customer_search.ranked(queries[next(it) % 100]), number=100)
+
+    renderer = MessageRenderer(repo.settings, repo.templates, repo.ledger)
+    driver = repo.drivers[0]
+    customers = [repo.customer_index.get(cid) for cid in ids]
+    bench.time("미리보기 메시지 만들기",
+               lambda: renderer.render(customers[next(it) % 1000], 2.5, driver), number=1000)
+    sample = rng.sample(repo.records, 1000)
+    bench.time("기록 메시지 되살리기",
+               lambda: renderer.record_message(sample[next(it) % 1000]), number=1000)
+    bench.time("알림 내역 한 화면 읽기 (RecordPager)",
+               lambda: repo.record_pager.fetch(0, 50), number=100)
+    bench.time("월별 정산 (전체 기간)", lambda: repo.settlement.rows("month"))
+    bench.time("기사별 정산 합계 (한 달)",
+               lambda: repo.settlement.totals("2024-06-01", "2024-06-30"), number=10)
+    column_cases(bench, repo, heavy_repeat)
+    return repo
+
+
+def column_cases(bench, repo, heavy_repeat=3):
+    """같은 집계를 기록 목록을 훑어서 할 때와 열 배열(RecordColumns)로 할 때"""
+    records = repo.records
+
+    def scan_drivers(start, end):
+        sums = {}
+        for r in records:
+            if start <= r.date <= end:
+                s = sums.get(r.driver_name)
+                if s is None:
+                    s = sums[r.driver_name] = [0, 0, 0]
+                s[0] += 1
+                s[1] += r.minutes
+                s[2] += r.total_pay
+        return sums
+
+    def scan_days():
+        sums = {}
+        for r in records:
+            s = sums.get(r.date)
+            if s is None:
+                s = sums[r.date] = [0, 0, 0]
+            s[0] += 1
+            s[1] += r.minutes
+            s[2] += r.total_pay
+        return sums
+
+    engine = "NumPy" if columns.numpy is not None else "array"
+    bench.time("열 배열 만들기", lambda: RecordColumns(records), repeat=heavy_repeat)
+    repo.columns  # 처음 부를 때 만드는 사본을 미리 만들어 아래 집계 시간에 섞이지 않게 한다
+    bench.time("기사별 합계 한 달 (기록 훑기)", lambda: scan_drivers("2024-06-01", "2024-06-30"),
+               repeat=heavy_repeat)
+    bench.time(f"기사별 합계 한 달 (열 배열, {engine})",
+               lambda: repo.columns.totals("driver", "2024-06-01", "2024-06-30"), number=10)
+    bench.time("날짜별 합계 전체 (기록 훑기)", scan_days, repeat=heavy_repeat)
+    bench.time(f"날짜별 합계 전체 (열 배열, {engine})", lambda: repo.columns.totals("day"))
+    bench.time(f"월·기사별 합계 전체 (열 배열, {engine})", lambda: repo.columns.totals(("month", "driver")))
+
+
+# ─── 기준값 비교 ───
+def machine_info():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine()}
+
+
+def compare(results, baseline, tolerance=0.25, floor=0.0005):
+    """(이름, 기준값, 이번 값, 비율, 상태) 목록. 상태는 "느려짐"/"빨라짐"/"새 항목"/"" 이다.
+
+    다른 프로그램 때문에 튀는 값을 피하려고 구간별 최솟값끼리 비교하고,
+    아주 짧은 구간은 잡음이 크므로 (반복 횟수를 곱한) 차이가 floor 초보다 작으면 판정하지 않는다.
+    """
+    rows = []
+    for name, now in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, now["min"], None, "새 항목"))
+            continue
+        ratio = now["min"] / base["min"] if base["min"] else float("inf")
+        diff = abs(now["min"] - base["min"]) * now.get("number", 1)
+        status = ""
+        if diff >= floor:
+            if ratio > 1 + tolerance:
+                status = "느려짐"
+            elif ratio < 1 / (1 + tolerance):
+                status = "빨라짐"
+        rows.append((name, base["min"], now["min"], ratio, status))
+    return rows
+
+
+def bench_dir(args):
+    return os.path.join(tempfile.gettempdir(), "alimtalk-bench",
+                        f"seed{args.seed}-{args.customers}c-{args.records}r-{args.drivers}d")
+
+
+def add_arguments(parser):
+    parser.add_argument("--customers", type=int, default=DEFAULT_SIZES["customers"])
+    parser.add_argument("--records", type=int, default=DEFAULT_SIZES["records"])
+    parser.add_argument("--drivers", type=int, default=DEFAULT_SIZES["drivers"])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="구간마다 잴 횟수")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="기준값 파일 (기본: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장합니다")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="이 비율보다 느려지면 실패로 봅니다 (기본: %(default)s)")
+
+
+def run_isolated(args, command):
+    """벤치마크용 데이터 폴더를 지정한 하위 프로세스에서 command + 같은 옵션을 실행한다.
+
+    이미 그 폴더에서 돌고 있으면 None 을 돌려주고, 부르는 쪽이 그대로 측정을 이어간다.
+    """
+    directory = os.path.join(bench_dir(args), "data")
+    if os.path.normcase(os.path.abspath(DATA_DIR)) == os.path.normcase(directory):
+        return None
+    os.makedirs(directory, exist_ok=True)
+    options = []
+    for name in ("customers", "records", "drivers", "seed", "repeat", "baseline", "tolerance"):
+        options += [f"--{name}", str(getattr(args, name))]
+    if args.save_baseline:
+        options.append("--save-baseline")
+    env = dict(os.environ, ALIMTALK_DATA_DIR=directory)
+    return subprocess.call(command + options, env=env)
+
+
+def run(args, extra_cases=None):
+    """데이터를 준비하고 측정한 뒤 기준값과 비교한다. 느려진 구간이 있으면 1 을 돌려준다"""
+    params = {"customers": args.customers, "records": args.records, "drivers": args.drivers,
+              "seed": args.seed}
+    manifest = os.path.join(DATA_DIR, "bench-dataset.json")
+    if load_json(manifest, None) != params:
+        print(f"합성 데이터 만드는 중: 고객 {args.customers:,}명, 기록 {args.records:,}건, "
+              f"기사 {args.drivers}명 (seed {args.seed})", flush=True)
+        started = time.perf_counter()
+        write_dataset(generate_dataset(args.seed, args.customers, args.records, args.drivers))
+        save_json(manifest, params)
+        print(f"  {time.perf_counter() - started:.1f}초 ({DATA_DIR})")
+
+    print("측정 중...")
+    bench = Benchmark(args.repeat)
+    repo = core_cases(bench, heavy_repeat=min(args.repeat, 3))
+    if extra_cases:
+        extra_cases(bench, repo)
+
+    report = {"created_at": datetime.now().isoformat(timespec="seconds"), "machine": machine_info(),
+              "params": params, "results": bench.results}
+    baseline = load_json(args.baseline, None)
+    status = 0
+    if baseline:
+        if baseline.get("params") != params:
+            print(f"\n기준값({args.baseline})의 데이터 크기가 달라 비교하지 않습니다: {baseline.get('params')}")
+        else:
+            if baseline.get("machine") != report["machine"]:
+                print("\n주의: 기준값을 잰 PC 와 환경이 다릅니다", baseline.get("machine"))
+            print(f"\n기준값 비교 ({baseline.get('created_at', '')}, 허용 {args.tolerance:.0%})")
+            for name, base, now, ratio, mark in compare(bench.results, baseline["results"], args.tolerance):
+                base_text = format_seconds(base) if base is not None else "-"
+                ratio_text = f"{ratio:.2f}x" if ratio is not None else ""
+                print(f"  {name:<36}{base_text:>12} → {format_seconds(now):>10} {ratio_text:>7} {mark}")
+                if mark == "느려짐":
+                    status = 1
+    if args.save_baseline or not baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n기준값을 저장했습니다: {args.baseline}")
+    if status:
+        print("\n느려진 구간이 있습니다")
+    return status
+
+
+def main(args):
+    """python -m alimtalk bench 진입점"""
+    code = run_isolated(args, [sys.executable, "-m", "alimtalk", "bench"])
+    if code is not None:
+        return code
+    return run(args)
@@ -0,0 +1,309 @@
+"""명령줄 도구: python -m alimtalk <명령>
+
+화면 없이 저장소를 열어 고객 가져오기, 미발송 메시지 만들기, 기사 정산 같은 일괄 작업을 한다.
+데이터 폴더는 프로그램과 같고, ALIMTALK_DATA_DIR 로 바꿀 수 있다.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+from . import bench, columns
+from .config import CUSTOMERS_FILE, DATA_DIR, RECORDS_FILE
+from .messages import MessageRenderer
+from .reports import SETTLEMENT_PERIODS, export_settlement_csv, period_label
+from .repository import Repository
+from .storage import (DataLockedError, load_json_array, migrate_json_to_sqlite, open_json_array,
+                      open_store)
+from .util import format_number, format_time, normalize_phone, to_minutes
+
+# CSV 머리글 → 고객 필드. 프로그램 화면의 이름과 영문 필드 이름을 모두 받는다
+CUSTOMER_COLUMNS = {
+    "name": ("고객명", "name"),
+    "phone": ("전화번호", "phone"),
+    "game_name": ("게임명", "game_name"),
+    "total_hours": ("총 구매 시간", "총구매시간", "total_hours"),
+    "used_hours": ("사용 시간", "사용시간", "used_hours"),
+    "memo": ("메모", "memo"),
+}
+
+
+def _open_repository(read_only=False):
+    """저장소를 연다. 바꾸는 명령은 데이터 폴더를 잠그고, read_only 면 파일을 전혀 쓰지 않는다"""
+    started = time.perf_counter()
+    repo = Repository(read_only=read_only).load()
+    print(f"데이터 불러옴: 고객 {len(repo.customers):,}명, 기록 {len(repo.records):,}건 "
+          f"({time.perf_counter() - started:.2f}초, {DATA_DIR})", file=sys.stderr)
+    return repo
+
+
+def _close_repository(repo):
+    failed = repo.close()
+    if failed:
+        print(f"저장 실패: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _read_customer_rows(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        columns = {}
+        for field, names in CUSTOMER_COLUMNS.items():
+            for name in names:
+                if name in (reader.fieldnames or ()):
+                    columns[field] = name
+                    break
+        if "name" not in columns:
+            raise ValueError("CSV 에 고객명(name) 열이 없습니다")
+        for row in reader:
+            yield {field: (row.get(name) or "").strip() for field, name in columns.items()}
+
+
+def cmd_import_customers(args):
+    """CSV 의 고객을 추가한다. 전화번호가 같은 고객이 있으면 그 고객의 정보를 바꾼다"""
+    repo = _open_repository()
+    started = time.perf_counter()
+    rows = []
+    errors = []
+    phones = set()
+    for n, row in enumerate(_read_customer_rows(args.file), 2):
+        if not row.get("name"):
+            errors.append(f"{n}행: 고객명이 없습니다")
+            continue
+        phone = normalize_phone(row.get("phone"))
+        if phone in phones:
+            errors.append(f"{n}행: 앞에서 나온 전화번호입니다")
+            continue
+        if phone:
+            phones.add(phone)
+        existing = repo.customer_index.find_by_phone(row.get("phone"))
+        try:
+            total = float(row["total_hours"]) if row.get("total_hours") else \
+                (existing["total_hours"] if existing else 0)
+            used = float(row["used_hours"]) if row.get("used_hours") else \
+                (existing["used_hours"] if existing else 0)
+        except ValueError:
+            errors.append(f"{n}행: 시간은 숫자로 입력해주세요")
+            continue
+        data = {key: row[key] for key in ("name", "phone", "game_name", "memo") if key in row}
+        if not existing:
+            data.setdefault("phone", "")
+            data["game_name"] = data.get("game_name") or "리니지"
+            data.setdefault("memo", "")
+        rows.append((data, to_minutes(total), to_minutes(used), existing["id"] if existing else None))
+
+    for error in errors[:20]:
+        print(error, file=sys.stderr)
+    updated = sum(1 for *_, customer_id in rows if customer_id)
+    counts = f"추가 {len(rows) - updated:,}명, 수정 {updated:,}명, 오류 {len(errors):,}건"
+    if args.dry_run:
+        print(counts + " (저장하지 않음)")
+        repo.release()
+        return 1 if errors else 0
+
+    # 모두 메모리에 반영한 뒤 저널 한 줄로 함께 기록한다
+    repo.commit([repo.save_customer(*row)[1] for row in rows])
+    print(f"{counts} ({time.perf_counter() - started:.2f}초)")
+    return _close_repository(repo) or (1 if errors else 0)
+
+
+def cmd_render_pending(args):
+    """미발송 기록의 메시지를 차감 당시 내용 그대로 출력한다"""
+    repo = _open_repository(read_only=not args.mark_sent)
+    renderer = MessageRenderer(repo.settings, repo.templates, repo.ledger)
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    started = time.perf_counter()
+    sent = []
+    skipped = 0
+    try:
+        for r in repo.unsent_records():
+            customer = repo.customer_index.get(r.get("customer_id"))
+            if not customer:
+                skipped += 1
+                continue
+            msg = renderer.message_for(r, customer)
+            if args.format == "jsonl":
+                out.write(json.dumps({"record_id": r["id"], "customer": customer["name"],
+                                      "phone": normalize_phone(customer.get("phone", "")),
+                                      "date": r.get("date", ""), "message": msg},
+                                     ensure_ascii=False) + "\n")
+            else:
+                out.write(f"### {customer['name']} {customer.get('phone', '')} · {r.get('date', '')}\n"
+                          f"{msg}\n\n")
+            sent.append(r)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"메시지 {len(sent):,}건, 고객 정보가 없어 제외 {skipped:,}건 "
+          f"({time.perf_counter() - started:.2f}초)", file=sys.stderr)
+    if args.mark_sent and sent:
+        repo.commit([repo.mark_sent(r) for r in sent])
+    return _close_repository(repo)
+
+
+def cmd_settlement(args):
+    """기사별 정산 합계를 기간별로 출력하거나 CSV 로 저장한다"""
+    repo = _open_repository(read_only=True)
+    started = time.perf_counter()
+    rows = repo.settlement.rows(args.period, args.start, args.end)
+    if args.csv:
+        export_settlement_csv(args.csv, rows, args.period)
+        print(f"{len(rows):,}줄을 저장했습니다: {args.csv}")
+    else:
+        print(f"{'기간':<24}{'기사':<12}{'건수':>8}{'플레이':>14}{'정산금액':>14}")
+        for key, driver, count, minutes, pay in rows:
+            print(f"{period_label(key, args.period):<24}{driver:<12}{count:>8,}"
+                  f"{format_time(minutes / 60):>14}{format_number(pay):>13}원")
+    total_pay = sum(r[4] for r in rows)
+    print(f"합계 {format_number(total_pay)}원 ({time.perf_counter() - started:.3f}초)", file=sys.stderr)
+    repo.release()
+    return 0
+
+
+def cmd_summary(args):
+    """대시보드 요약 숫자를 출력한다"""
+    repo = _open_repository(read_only=True)
+    summary = repo.stats.summary(args.day)
+    print(f"총 고객 수 {summary['customers']:,}명 · 차감 {summary['today']:,}건 · "
+          f"미발송 {summary['pending']:,}건 · 남은 시간 {format_time(summary['remaining'])}")
+    repo.release()
+    return 0
+
+
+QUERY_HEADERS = {"day": "날짜", "week": "주", "month": "월", "driver": "기사", "customer": "고객"}
+
+
+def cmd_query(args):
+    """기록을 기간·기사·고객별로 묶어 건수·플레이 시간·정산금액 합계를 출력한다 (보관 파일의 기록은 빼고)"""
+    repo = _open_repository(read_only=True)
+    customer_id = None
+    if args.customer:
+        customer = repo.customer_index.find_by_phone(args.customer) or repo.customer_index.get(args.customer)
+        if not customer:
+            print(f"고객을 찾을 수 없습니다: {args.customer}", file=sys.stderr)
+            repo.release()
+            return 1
+        customer_id = customer["id"]
+    started = time.perf_counter()
+    rows = repo.columns.totals(args.by, args.start, args.end, customer_id, args.driver)
+    elapsed = time.perf_counter() - started
+    if not args.by:
+        rows = [rows]
+    print("".join(f"{QUERY_HEADERS[key]:<14}" for key in args.by) + f"{'건수':>8}{'플레이':>14}{'정산금액':>14}")
+    for row in rows:
+        labels = []
+        for key, value in zip(args.by, row):
+            if key == "customer":
+                customer = repo.customer_index.get(value)
+                value = customer["name"] if customer else value
+            labels.append(f"{value:<14}")
+        count, minutes, pay = row[len(args.by):]
+        print("".join(labels) + f"{count:>8,}{format_time(minutes / 60):>14}{format_number(pay):>13}원")
+    engine = "NumPy" if columns.numpy is not None else "array"
+    print(f"{len(rows):,}줄 ({elapsed:.3f}초, {engine})", file=sys.stderr)
+    repo.release()
+    return 0
+
+
+def cmd_check(args):
+    """기록 파일을 한 건씩 읽으며 깨진 부분과 맞지 않는 기록을 찾는다. 파일이 커도 메모리가 늘지 않는다"""
+    store = open_store()
+    if store:
+        result = store.integrity_check()
+        print(f"SQLite 저장소 검사: {result}")
+        return 0 if result == "ok" else 1
+
+    started = time.perf_counter()
+    customer_ids = {c.get("id") for c in load_json_array(CUSTOMERS_FILE, [])}
+    path, items, damaged = open_json_array(RECORDS_FILE)
+    if path is None:
+        print("기록 파일이 없습니다")
+        return 0
+    if path != RECORDS_FILE:
+        print(f"원본을 읽지 못해 백업을 검사합니다: {path}")
+    seen = set()
+    count = duplicates = orphans = pending = 0
+    for r in items:
+        count += 1
+        record_id = r.get("id")
+        if record_id in seen:
+            duplicates += 1
+        seen.add(record_id)
+        if r.get("customer_id") not in customer_ids:
+            orphans += 1
+        if not r.get("message_sent", False):
+            pending += 1
+    for index, offset, message in damaged[:20]:
+        print(f"손상: {index + 1:,}번째 기록 근처 (글자 위치 {offset:,}) {message}")
+    print(f"기록 {count:,}건 · 미발송 {pending:,}건 · 손상된 부분 {len(damaged):,}곳 · "
+          f"중복 id {duplicates:,}건 · 고객 정보 없음 {orphans:,}건 "
+          f"({time.perf_counter() - started:.2f}초)")
+    return 1 if damaged or duplicates or path != RECORDS_FILE else 0
+
+
+def cmd_bench(args):
+    return bench.main(args)
+
+
+def cmd_migrate_sqlite(args):
+    migrate_json_to_sqlite()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m alimtalk", description="알림톡 관리 명령줄 도구")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="명령")
+
+    p = commands.add_parser("import-customers", help="CSV 파일의 고객을 가져옵니다")
+    p.add_argument("file", help="고객명·전화번호·게임명·총 구매 시간·사용 시간·메모 열이 있는 CSV")
+    p.add_argument("--dry-run", action="store_true", help="확인만 하고 저장하지 않습니다")
+    p.set_defaults(func=cmd_import_customers)
+
+    p = commands.add_parser("render-pending", help="미발송 메시지를 모두 출력합니다")
+    p.add_argument("--out", help="출력할 파일 (기본: 화면)")
+    p.add_argument("--format", choices=("text", "jsonl"), default="text")
+    p.add_argument("--mark-sent", action="store_true", help="출력한 기록을 발송완료로 표시합니다")
+    p.set_defaults(func=cmd_render_pending)
+
+    p = commands.add_parser("settlement", help="기사 정산 합계를 계산합니다")
+    p.add_argument("--period", choices=tuple(SETTLEMENT_PERIODS), default="month")
+    p.add_argument("--from", dest="start", metavar="YYYY-MM-DD")
+    p.add_argument("--to", dest="end", metavar="YYYY-MM-DD")
+    p.add_argument("--csv", help="CSV 파일로 저장합니다")
+    p.set_defaults(func=cmd_settlement)
+
+    p = commands.add_parser("summary", help="대시보드 요약을 출력합니다")
+    p.add_argument("--day", metavar="YYYY-MM-DD", help="차감 건수를 셀 날짜 (기본: 오늘)")
+    p.set_defaults(func=cmd_summary)
+
+    p = commands.add_parser("query", help="기록을 기간·기사·고객별로 묶어 합계를 냅니다")
+    p.add_argument("--by", action="append", choices=columns.GROUP_KEYS, default=[],
+                   help="묶을 기준. 여러 번 쓰면 함께 묶습니다 (예: --by month --by driver)")
+    p.add_argument("--from", dest="start", metavar="YYYY-MM-DD")
+    p.add_argument("--to", dest="end", metavar="YYYY-MM-DD")
+    p.add_argument("--customer", help="고객 전화번호 또는 id")
+    p.add_argument("--driver", help="기사 이름")
+    p.set_defaults(func=cmd_query)
+
+    p = commands.add_parser("check", help="기록 파일에 깨진 부분이 없는지 검사합니다")
+    p.set_defaults(func=cmd_check)
+
+    p = commands.add_parser("bench", help="합성 데이터로 속도를 재고 기준값과 비교합니다")
+    bench.add_arguments(p)
+    p.set_defaults(func=cmd_bench)
+
+    p = commands.add_parser("migrate-sqlite", help="JSON 데이터를 SQLite 저장소로 옮깁니다")
+    p.set_defaults(func=cmd_migrate_sqlite)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except DataLockedError as e:
+        print(e, file=sys.stderr)
+        return 1
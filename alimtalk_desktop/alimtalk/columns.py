@@ -0,0 +1,358 @@
+"""차감 기록의 열 단위 사본
+
+메모리에 있는 기록을 날짜 서수·고객 번호·기사 번호·플레이 분·정산금액 배열로 나란히 들고 있어서
+"이번 달 기사별 시간", "날짜별 차감 건수" 같은 집계를 기록 객체를 하나씩 보지 않고 배열 연산으로 한다.
+NumPy 가 설치되어 있으면 NumPy 로 계산하고, 없으면 표준 array 모듈로 같은 결과를 낸다 (더 느리다).
+보관 파일로 옮긴 달은 담지 않는다. 그 달의 정산은 reports.Settlement 가 따로 읽는다.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date
+from itertools import chain, compress, repeat
+from operator import add, and_, attrgetter, le, mul, sub
+
+try:
+    import numpy
+except ImportError:  # 선택 사항. 없으면 array 모듈로 계산한다
+    numpy = None
+
+from .reports import period_key
+
+# 묶을 수 있는 기준. 주·월은 날짜별로 묶은 뒤 합친다
+GROUP_KEYS = ("day", "week", "month", "driver", "customer")
+
+
+class Dictionary(dict):
+    """값 → 정수 번호. 처음 보는 값에는 다음 번호를 주고, values[번호] 로 되돌린다"""
+
+    def __init__(self):
+        super().__init__()
+        self.values = []
+
+    def __missing__(self, value):
+        code = self[value] = len(self.values)
+        self.values.append(value)
+        return code
+
+
+class _Periods(dict):
+    """날짜 서수 → 그 날이 속한 주(월요일)·월(1일) 첫날의 서수"""
+
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+
+    def __missing__(self, ordinal):
+        first = 0
+        if ordinal > 0:
+            d = date.fromordinal(ordinal)
+            first = (d.replace(day=1) if self.period == "month" else d).toordinal()
+            if self.period == "week":
+                first -= d.weekday()
+        self[ordinal] = first
+        return first
+
+
+class _Labels(dict):
+    """날짜 서수 → 표시할 날짜 (day: YYYY-MM-DD, week: 월요일 날짜, month: YYYY-MM)"""
+
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+
+    def __missing__(self, ordinal):
+        label = period_key(date.fromordinal(ordinal).isoformat(), self.period) if ordinal > 0 else ""
+        self[ordinal] = label
+        return label
+
+
+class _Ordinals(dict):
+    """"YYYY-MM-DD" → 날짜 서수. 날짜가 없거나 잘못되었으면 0"""
+
+    def __missing__(self, day):
+        try:
+            ordinal = date.fromisoformat(day).toordinal()
+        except (TypeError, ValueError):
+            ordinal = 0
+        self[day] = ordinal
+        return ordinal
+
+
+def _column(records, attr, default):
+    try:
+        return list(map(attrgetter(attr), records))
+    except AttributeError:
+        # 예전 기록처럼 빠진 값이 있다
+        return [getattr(r, attr, default) for r in records]
+
+
+def _ints(typecode, values):
+    try:
+        return array(typecode, values)
+    except TypeError:
+        # 예전 기록의 소수 금액 같은 값은 반올림한다
+        return array(typecode, (round(v) if isinstance(v, (int, float)) else 0 for v in values))
+
+
+class RecordColumns:
+    """기록 목록과 같은 순서로 채운 열 배열.
+
+    day 는 날짜 서수, customer·driver 는 customers·drivers 사전의 번호(고객 id, 기사 이름),
+    minutes 는 플레이 분, pay 는 정산금액이다. 저장소를 불러올 때 한 번 만들고 차감할 때마다 append 한다.
+    NumPy 로 계산할 때는 배열을 복사하지 않고 그대로 빌려 보므로, 조회와 append 는 같은 스레드에서 부른다.
+    """
+
+    def __init__(self, records=()):
+        self.customers = Dictionary()
+        self.drivers = Dictionary()
+        self._ordinals = _Ordinals()
+        self._periods = {"week": _Periods("week"), "month": _Periods("month")}
+        self._labels = {period: _Labels(period) for period in ("day", "week", "month")}
+        self._rank_cache = {}
+        # 날짜 열이 오름차순이면 기간 조건을 이분 탐색으로 잘라낸다 (보통 차감한 순서대로 쌓인다)
+        self._ascending = True
+        self.day = array("i")
+        self.customer = array("i")
+        self.driver = array("i")
+        self.minutes = array("i")
+        self.pay = array("q")
+        self.extend(records)
+
+    def __len__(self):
+        return len(self.day)
+
+    # ─── 채우기 ───
+    def extend(self, records):
+        records = list(records)
+        # 열을 모두 만든 뒤에 붙여서, 중간에 실패해도 열 길이가 어긋나지 않게 한다
+        columns = (
+            array("i", map(self._ordinals.__getitem__, _column(records, "date", ""))),
+            array("i", map(self.customers.__getitem__, _column(records, "customer_id", None))),
+            array("i", map(self.drivers.__getitem__, _column(records, "driver_name", ""))),
+            _ints("i", _column(records, "minutes", 0)),
+            _ints("q", _column(records, "total_pay", 0)),
+        )
+        days = columns[0]
+        if self._ascending and days:
+            self._ascending = all(map(le, chain(self.day[-1:], days), days if self.day else days[1:]))
+        for target, values in zip((self.day, self.customer, self.driver, self.minutes, self.pay),
+                                  columns):
+            target.extend(values)
+
+    def append(self, record):
+        self.extend((record,))
+
+    # ─── 조회 ───
+    def totals(self, by=(), start=None, end=None, customer_id=None, driver=None):
+        """조건에 맞는 기록의 합계.
+
+        by 가 비어 있으면 (건수, 플레이 분, 정산금액) 하나를, 아니면 (묶은 값..., 건수, 플레이 분, 정산금액)
+        줄을 묶은 값 순으로 돌려준다. by 는 GROUP_KEYS 의 이름이고 주는 월요일 날짜, 월은 YYYY-MM 으로 나온다.
+        start·end 는 YYYY-MM-DD (둘 다 포함), customer_id·driver 는 고객 id·기사 이름으로 거른다.
+        """
+        by = (by,) if isinstance(by, str) else tuple(by)
+        for key in by:
+            if key not in GROUP_KEYS:
+                raise ValueError(f"묶을 수 없는 기준입니다: {key}")
+        # 고객·기사 조건은 번호로 바꿔 비교한다. 처음 보는 값이면 맞는 기록이 없다
+        codes = {}
+        if customer_id is not None:
+            codes["customer"] = self.customers.get(customer_id, -1)
+        if driver is not None:
+            codes["driver"] = self.drivers.get(driver, -1)
+        lo = self._ordinals[start] if start else None
+        hi = self._ordinals[end] if end else None
+        i, j = 0, len(self.day)
+        if self._ascending:
+            if lo is not None:
+                i = bisect_left(self.day, lo)
+            if hi is not None:
+                j = bisect_right(self.day, hi)
+            lo = hi = None
+        columns = (self._numpy_totals if numpy is not None else self._array_totals)(
+            by, i, j, lo, hi, codes)
+        if not by:
+            return tuple(column[0] for column in columns) if columns[0] else (0, 0, 0)
+        return self._rows(by, columns)
+
+    def _numpy_totals(self, by, i, j, lo, hi, codes):
+        """[i, j) 구간에서 조건에 맞는 기록을 묶어 [묶은 번호 목록..., 건수, 분, 금액] 열 목록으로"""
+        def view(name):
+            column = getattr(self, name)
+            return numpy.frombuffer(column, dtype=column.typecode)[i:j]
+
+        day = view("day")
+        conditions = []
+        if lo is not None:
+            conditions.append(day >= lo)
+        if hi is not None:
+            conditions.append(day <= hi)
+        for name, code in codes.items():
+            conditions.append(view(name) == code)
+        mask = None
+        for condition in conditions:
+            mask = condition if mask is None else mask & condition
+        minutes = view("minutes")
+        pay = view("pay")
+        # 주·월은 기간마다 0, 1, 2... 로 번호를 새로 매기고, firsts[번호] 로 첫날 서수를 되찾는다
+        keys, firsts = [], []
+        for name in by:
+            k, first = (view(name), None) if name in ("driver", "customer") else \
+                self._numpy_period(day, name)
+            keys.append(k)
+            firsts.append(first)
+        if mask is not None:
+            minutes, pay = minutes[mask], pay[mask]
+            keys = [k[mask] for k in keys]
+        if not keys:
+            # 윈도의 NumPy 는 int32 를 int32 로 더하므로 64비트로 더한다
+            return [[len(minutes)], [int(minutes.sum(dtype=numpy.int64))], [int(pay.sum())]] \
+                if len(minutes) else [[], [], []]
+        if not len(minutes):
+            return [[] for _ in range(len(keys) + 3)]
+
+        # 묶는 열들을 번호 하나로 합친다. 가짓수가 적으면 그대로 bincount, 많으면 unique 로 번호를 다시 매긴다
+        combined = None
+        lows, sizes = [], []
+        for k in keys:
+            low = int(k.min())
+            size = int(k.max()) - low + 1
+            shifted = k - numpy.int64(low)
+            combined = shifted if combined is None else combined * size + shifted
+            lows.append(low)
+            sizes.append(size)
+        length = 1
+        for size in sizes:
+            length *= size
+        ids = None
+        if length > 4 * len(combined) + 1024:
+            ids, combined = numpy.unique(combined, return_inverse=True)
+            length = len(ids)
+        counts = numpy.bincount(combined, minlength=length)
+        # weights 로 더하면 float64 가 되지만 2**53 보다 작은 정수 합이라 값은 정확하다
+        minute_sums = numpy.bincount(combined, weights=minutes, minlength=length)
+        pay_sums = numpy.bincount(combined, weights=pay, minlength=length)
+        present = numpy.flatnonzero(counts)
+
+        # 합친 번호를 다시 열마다의 번호로 나눈다
+        n = present if ids is None else ids[present]
+        columns = []
+        for low, size, first in zip(reversed(lows), reversed(sizes), reversed(firsts)):
+            n, part = numpy.divmod(n, size)
+            part += low
+            columns.append((part if first is None else first[part]).tolist())
+        columns.reverse()
+        return columns + [counts[present].tolist(),
+                          numpy.rint(minute_sums[present]).astype(numpy.int64).tolist(),
+                          numpy.rint(pay_sums[present]).astype(numpy.int64).tolist()]
+
+    def _numpy_period(self, day, name):
+        """(기간 번호 열, 기간 번호 → 첫날 서수). 날짜별이면 서수를 그대로 쓴다"""
+        if name == "day":
+            return day, None
+        # 날짜 범위만큼의 표로 날짜를 기간 번호로 바꾼다. 날짜가 없는 기록(0)은 0번이다
+        dated = day[day > 0]
+        if not len(dated):
+            return day, None
+        low, high = int(dated.min()), int(dated.max())
+        periods = self._periods[name]
+        firsts, table = numpy.unique([periods[o] for o in range(low, high + 1)], return_inverse=True)
+        codes = numpy.where(day > 0, table[numpy.clip(day - low, 0, high - low)] + 1, 0)
+        return codes, numpy.concatenate(([0], firsts))
+
+    def _array_totals(self, by, i, j, lo, hi, codes):
+        """NumPy 가 없을 때. 거르기는 map·compress 로 C 에서 돌리고, 묶기는 남은 기록을 한 번 훑는다"""
+        def view(name):
+            column = getattr(self, name)
+            return column if i == 0 and j == len(column) else column[i:j]
+
+        day = view("day")
+        conditions = []
+        if lo is not None:
+            conditions.append(map(lo.__le__, day))
+        if hi is not None:
+            conditions.append(map(hi.__ge__, day))
+        for name, code in codes.items():
+            conditions.append(map(code.__eq__, view(name)))
+        mask = None
+        for condition in conditions:
+            mask = list(condition) if mask is None else list(map(and_, mask, condition))
+
+        def select(column):
+            return column if mask is None else array(column.typecode, compress(column, mask))
+
+        minutes, pay = select(view("minutes")), select(view("pay"))
+        if not by:
+            return [[len(minutes)], [sum(minutes)], [sum(pay)]] if minutes else [[], [], []]
+        if not minutes:
+            return [[] for _ in range(len(by) + 3)]
+        keys = []
+        for name in by:
+            if name in ("driver", "customer"):
+                keys.append(select(view(name)))
+            elif name == "day":
+                keys.append(select(day))
+            else:
+                keys.append(array("i", map(self._periods[name].__getitem__, select(day))))
+        if len(keys) == 1:
+            keys = keys[0]
+        else:
+            # 여러 열로 묶을 때도 NumPy 쪽처럼 번호 하나로 합쳐서, 기록마다 튜플을 만들지 않는다
+            lows, sizes = [], []
+            combined = None
+            for k in keys:
+                low = min(k)
+                shifted = map(sub, k, repeat(low))
+                sizes.append(max(k) - low + 1)
+                lows.append(low)
+                combined = shifted if combined is None else \
+                    map(add, map(mul, combined, repeat(sizes[-1])), shifted)
+            keys = list(combined)
+        # 건수는 Counter 가 C 에서 센다. 합계는 정수만 담은 dict 에 더해서 GC 가 끼어들 객체를 만들지 않는다
+        counts = Counter(keys)
+        minute_sums = dict.fromkeys(counts, 0)
+        pay_sums = dict.fromkeys(counts, 0)
+        for key, m, p in zip(keys, minutes, pay):
+            minute_sums[key] += m
+            pay_sums[key] += p
+        sums = [list(counts.values()), list(minute_sums.values()), list(pay_sums.values())]
+        if len(by) == 1:
+            return [list(counts)] + sums
+        columns = [[] for _ in by]
+        for n in counts:
+            for column, low, size in zip(reversed(columns), reversed(lows), reversed(sizes)):
+                n, part = divmod(n, size)
+                column.append(part + low)
+        return columns + sums
+
+    def _ranks(self, name):
+        """고객·기사 번호 → 값(고객 id·기사 이름)의 정렬 순위. 값이 늘었을 때만 다시 만든다"""
+        values = (self.drivers if name == "driver" else self.customers).values
+        ranks = self._rank_cache.get(name)
+        if ranks is None or len(ranks) != len(values):
+            ranks = array("i", bytes(4 * len(values)))
+            order = sorted(range(len(values)), key=lambda n: "" if values[n] is None else values[n])
+            for rank, n in enumerate(order):
+                ranks[n] = rank
+            self._rank_cache[name] = ranks
+        return ranks
+
+    def _rows(self, by, columns):
+        """번호 열을 묶은 값 순으로 정렬하고 날짜·고객 id·기사 이름으로 바꿔 (묶은 값..., 건수, 분, 금액) 줄로"""
+        # 고객·기사는 값의 정렬 순위로, 날짜·주·월은 서수로 정렬하면 바꾼 값의 순서와 같다
+        keys = [list(map(self._ranks(name).__getitem__, columns[n])) if name in ("driver", "customer")
+                else columns[n] for n, name in enumerate(by)]
+        if numpy is not None:
+            order = numpy.lexsort(keys[::-1]).tolist() if columns[0] else []
+        else:
+            order = sorted(range(len(columns[0])),
+                           key=(keys[0] if len(keys) == 1 else list(zip(*keys))).__getitem__)
+        decoders = [self.drivers.values if name == "driver" else
+                    self.customers.values if name == "customer" else self._labels[name]
+                    for name in by]
+        columns = [list(map(decoder.__getitem__, map(column.__getitem__, order)))
+                   for decoder, column in zip(decoders, columns)] + \
+                  [list(map(column.__getitem__, order)) for column in columns[len(by):]]
+        return list(zip(*columns))
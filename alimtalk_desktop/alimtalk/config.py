@@ -0,0 +1,70 @@
+"""데이터 파일 경로와 기본 설정"""
+
+import logging
+import os
+
+# ─── 데이터 파일 경로 ───
+# ALIMTALK_DATA_DIR 로 다른 폴더를 쓸 수 있다 (명령줄 도구·벤치마크용)
+DATA_DIR = (os.environ.get("ALIMTALK_DATA_DIR")
+            or os.path.join(os.path.expanduser("~"), "알림톡관리_데이터"))
+CUSTOMERS_FILE = os.path.join(DATA_DIR, "customers.json")
+RECORDS_FILE = os.path.join(DATA_DIR, "records.json")
+DRIVERS_FILE = os.path.join(DATA_DIR, "drivers.json")
+SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
+JOURNAL_FILE = os.path.join(DATA_DIR, "journal.log")
+# 기록에 남긴 메시지의 형식 원문 (형식 id → 본문)
+TEMPLATES_FILE = os.path.join(DATA_DIR, "message_templates.json")
+# 구매·보정 내역 (차감 내역은 records.json 이 원본이다)
+LEDGER_FILE = os.path.join(DATA_DIR, "ledger.json")
+# 오래된 차감 기록을 월별로 압축해 두는 폴더
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+# 실행할 때마다 시작 단계별 소요 시간을 한 줄씩 남긴다
+STARTUP_LOG = os.path.join(DATA_DIR, "startup.log")
+# 성능 계측에서 잡은 cProfile 결과
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+# 알림톡 게이트웨이로 아직 보내지 못한 메시지
+OUTBOX_FILE = os.path.join(DATA_DIR, "outbox.json")
+# 이 파일이 있으면 JSON 대신 SQLite 에 저장한다 (--migrate-sqlite 로 생성)
+DB_FILE = os.path.join(DATA_DIR, "alimtalk.db")
+# 화면 프로그램과 명령줄 도구가 같은 폴더를 동시에 바꾸지 않도록 거는 잠금 파일
+LOCK_FILE = os.path.join(DATA_DIR, "alimtalk.lock")
+
+# 저장할 때마다 직전 파일을 .1, .2, ... 로 밀어서 이만큼 보관한다
+BACKUP_GENERATIONS = 3
+
+# 저널이 이만큼 쌓이면 백그라운드에서 스냅샷으로 합친다
+JOURNAL_COMPACT_EVERY = 500
+
+# ─── 기본 설정 ───
+DEFAULT_SETTINGS = {
+    "business_name": "리니지 학교",
+    "message_template": """[{업체명}] 시간 차감 안내
+
+안녕하세요, {고객명} 고객님!
+
+금일 플레이가 종료되어 안내드립니다.
+
+━━━━━━━━━━━━━━━━━━━━
+  금일 플레이 시간:  {플레이시간}
+  총 누적 사용 시간:  {누적시간}
+  남은 이용 시간:  {남은시간}
+━━━━━━━━━━━━━━━━━━━━
+
+궁금한 점이 있으시면 언제든 문의해주세요.
+
+감사합니다.""",
+    # 발송 방식: "clipboard" (복사해서 직접 붙여넣기) 또는 "gateway" (알림톡 게이트웨이)
+    "delivery_mode": "clipboard",
+    "gateway_url": "",
+    "gateway_api_key": "",
+    "gateway_rate": 10,
+    # 이보다 오래되고 발송이 끝난 기록은 월별 보관 파일로 옮긴다 (0 이면 보관하지 않음)
+    "archive_months": 3,
+    # 성능 계측 (환경 변수 ALIMTALK_PROFILE=1 로도 켤 수 있다)
+    "instrumentation": False,
+}
+
+log = logging.getLogger("alimtalk")
+
+# 손상된 원본 대신 백업 세대에서 불러온 파일 (시작 시 사용자에게 알린다)
+RECOVERED_FILES = []
@@ -0,0 +1,229 @@
+"""고객·기사 조회와 초성 검색 색인"""
+
+import heapq
+import itertools
+
+from .util import normalize_phone
+
+# ─── 메모리 색인 ───
+class EntityIndex:
+    """고객/기사 목록 위의 색인: id → 객체, 콤보박스 표시 문자열 → id, 전화번호 → id.
+
+    목록을 바꾸는 곳에서 add / update / remove 를 불러 함께 갱신한다.
+    """
+
+    def __init__(self, items, label_fn):
+        self.label_fn = label_fn
+        self.rebuild(items)
+
+    def rebuild(self, items):
+        self.by_id = {}
+        self.by_label = {}
+        self.by_phone = {}
+        self._labels = {}
+        self._phones = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        item_id = item["id"]
+        self.by_id[item_id] = item
+        label = self.label_fn(item)
+        if label in self.by_label:
+            # 이름과 남은 시간이 같은 고객도 구분되도록 전화번호 끝자리를 붙인다
+            label = f"{label} · {normalize_phone(item.get('phone'))[-4:] or item_id}"
+        self.by_label[label] = item_id
+        self._labels[item_id] = label
+        phone = normalize_phone(item.get("phone"))
+        if phone:
+            self.by_phone[phone] = item_id
+            self._phones[item_id] = phone
+
+    def update(self, item):
+        """이름·시간·전화번호가 바뀐 뒤 다시 색인한다 (목록 순서는 유지)"""
+        self._unlink(item["id"])
+        self.add(item)
+
+    def remove(self, item_id):
+        self._unlink(item_id)
+        self.by_id.pop(item_id, None)
+        self._labels.pop(item_id, None)
+
+    def _unlink(self, item_id):
+        label = self._labels.get(item_id)
+        if label is not None and self.by_label.get(label) == item_id:
+            del self.by_label[label]
+        phone = self._phones.pop(item_id, None)
+        if phone is not None and self.by_phone.get(phone) == item_id:
+            del self.by_phone[phone]
+
+    def get(self, item_id):
+        return self.by_id.get(item_id)
+
+    def find_by_label(self, label):
+        return self.by_id.get(self.by_label.get(label))
+
+    def find_by_phone(self, phone):
+        return self.by_id.get(self.by_phone.get(normalize_phone(phone)))
+
+    def labels(self):
+        return list(self._labels.values())
+
+    def label_of(self, item_id):
+        return self._labels.get(item_id)
+
+
+# ─── 고객 검색 색인 ───
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+
+def to_choseong(text):
+    """한글 음절을 초성으로 바꾼다 (홍길동 → ㅎㄱㄷ). 한글이 아닌 글자는 그대로 둔다"""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        out.append(CHOSEONG[code // 588] if 0 <= code < 11172 else ch)
+    return "".join(out)
+
+
+class SearchIndex:
+    """이름·전화번호·게임명에 대한 n-gram 색인.
+
+    각 항목의 검색 문자열(이름, 이름 초성, 전화번호 숫자, 게임명)에서 1·2글자 조각을
+    뽑아 두고, 검색어의 조각이 모두 들어 있는 후보만 확인하므로 고객 수가 많아도
+    한 글자씩 입력할 때마다 전체를 훑지 않는다.
+    """
+
+    def __init__(self, items):
+        self.rebuild(items)
+
+    def rebuild(self, items):
+        self._grams = {}
+        self._keys = {}
+        self._by_phone = {}
+        # 등록 순번. 결과를 등록 순서로 늘어놓을 때 후보만 정렬하면 된다
+        self._seq = {}
+        self._next_seq = itertools.count()
+        for item in items:
+            self.add(item)
+
+    @staticmethod
+    def search_keys(item):
+        # (이름, 이름 초성, 전화번호 숫자, 게임명) — 빈 문자열은 조각이 없으므로 색인되지 않는다
+        name = (item.get("name") or "").lower()
+        return (name, to_choseong(name), normalize_phone(item.get("phone")),
+                (item.get("game_name") or "").lower())
+
+    @staticmethod
+    def _ngrams(text):
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+
+    def add(self, item):
+        item_id = item["id"]
+        keys = self.search_keys(item)
+        self._keys[item_id] = keys
+        if item_id not in self._seq:
+            self._seq[item_id] = next(self._next_seq)
+        if keys[2]:
+            self._by_phone.setdefault(keys[2], set()).add(item_id)
+        for key in keys:
+            for gram in self._ngrams(key):
+                self._grams.setdefault(gram, set()).add(item_id)
+
+    def update(self, item):
+        self._unlink(item["id"])
+        self.add(item)
+
+    def remove(self, item_id):
+        self._unlink(item_id)
+        self._seq.pop(item_id, None)
+
+    def _unlink(self, item_id):
+        keys = self._keys.pop(item_id, ())
+        if keys and keys[2]:
+            ids = self._by_phone.get(keys[2])
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._by_phone[keys[2]]
+        for key in keys:
+            for gram in self._ngrams(key):
+                ids = self._grams.get(gram)
+                if ids is not None:
+                    ids.discard(item_id)
+                    if not ids:
+                        del self._grams[gram]
+
+    @staticmethod
+    def _needle(query):
+        digits = normalize_phone(query)
+        # 010-1234 처럼 입력해도 전화번호 숫자와 비교한다
+        if digits and len(digits) == len(query.replace("-", "").replace(" ", "")):
+            return digits
+        return query
+
+    def _matches(self, query):
+        """검색어(소문자, 앞뒤 공백 없음)가 포함된 항목 id 집합"""
+        needle = self._needle(query)
+        grams = sorted(self._ngrams(needle) if len(needle) > 1 else {needle},
+                       key=lambda g: len(self._grams.get(g, ())))
+        candidates = None
+        for gram in grams:
+            ids = self._grams.get(gram)
+            if not ids:
+                return set()
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        if len(needle) <= 2:
+            # 1·2글자 조각은 색인 자체가 정확하다
+            return candidates
+        keys = self._keys
+        return {i for i in candidates if any(needle in key for key in keys[i])}
+
+    def search(self, query):
+        """검색어가 포함된 항목 id 를 등록 순서대로 돌려준다"""
+        query = query.strip().lower()
+        if not query:
+            return list(self._seq)
+        return sorted(self._matches(query), key=self._seq.__getitem__)
+
+    def ranked(self, query, limit=10):
+        """선택 창에 보여 줄 상위 limit 개를 이름 일치 → 전화번호 끝자리 → 이름 앞부분
+        → 초성 → 그 밖의 포함 순으로 돌려준다.
+
+        id 나 전화번호 전체가 그대로 맞으면 그 항목만 돌려준다.
+        """
+        query = query.strip()
+        if query in self._keys:
+            return [query]
+        query = query.lower()
+        if not query:
+            return list(itertools.islice(self._seq, limit))
+        seq = self._seq
+        needle = self._needle(query)
+        exact = self._by_phone.get(needle)
+        if exact:
+            return sorted(exact, key=seq.__getitem__)[:limit]
+
+        digits = normalize_phone(query)
+        is_choseong = all(ch in CHOSEONG for ch in query)
+        keys = self._keys
+
+        def rank(item_id):
+            name, choseong, phone, _ = keys[item_id]
+            if name == query:
+                order = 0
+            elif digits and phone.endswith(digits):
+                order = 1
+            elif name.startswith(query):
+                order = 2
+            elif is_choseong and choseong.startswith(query):
+                order = 3
+            else:
+                order = 4
+            # 같은 순위끼리는 등록 순서대로
+            return order, seq[item_id]
+
+        return heapq.nsmallest(limit, self._matches(query), key=rank)
@@ -0,0 +1,172 @@
+"""분 단위 시간 원장"""
+
+import bisect
+from datetime import datetime
+
+from .util import from_minutes, generate_id, to_minutes
+
+# ─── 시간 원장 ───
+class Ledger:
+    """고객별 구매·차감·보정 내역을 분 단위 정수로 쌓아 잔액을 구한다.
+
+    차감은 차감 기록(records)에서 그대로 가져오고, 구매와 보정만 adjustments 에 따로 남긴다.
+    보관 파일로 옮긴 차감은 고객·월별 합계(archived)로 adjustments 에 남는다.
+    기초 잔액이 0/0 인 고객은 내역 대신 opening 표시를 남겨 기초 잔액을 잡았음을 기억한다.
+    고객마다 누적 잔액을 들고 있고 CHECKPOINT_EVERY 건마다 중간 합계를 남겨서
+    특정 시점의 잔액은 가장 가까운 중간 합계부터 몇 건만 더해 구한다.
+    """
+
+    CHECKPOINT_EVERY = 256
+
+    def __init__(self, adjustments, records):
+        self.adjustments = adjustments
+        self.rebuild(records)
+
+    def rebuild(self, records):
+        self._entries = {}
+        # 기초 잔액을 잡은 고객 (구매·보정 내역이나 opening 표시가 있는 고객)
+        self._opened = set()
+        for r in records:
+            self._entries.setdefault(getattr(r, "customer_id", None), []).append(
+                (getattr(r, "created_at", ""), 0, getattr(r, "minutes", 0)))
+        for a in self.adjustments:
+            if a["kind"] != "archived":
+                self._opened.add(a["customer_id"])
+            if a["kind"] == "opening":
+                continue
+            self._entries.setdefault(a["customer_id"], []).append(self._adjustment_entry(a))
+        self._times = {}
+        self._balances = {}
+        self._checkpoints = {}
+        for cid, entries in self._entries.items():
+            entries.sort(key=lambda e: e[0])
+            self._recompute(cid)
+
+    @staticmethod
+    def _adjustment_entry(a):
+        if a["kind"] == "purchase":
+            return (a["at"], a["minutes"], 0)
+        return (a["at"], 0, a["minutes"])
+
+    def _recompute(self, cid):
+        entries = self._entries[cid]
+        self._times[cid] = [e[0] for e in entries]
+        checkpoints = [(0, 0)]
+        purchased = used = 0
+        for n, (_, d_total, d_used) in enumerate(entries, 1):
+            purchased += d_total
+            used += d_used
+            if n % self.CHECKPOINT_EVERY == 0:
+                checkpoints.append((purchased, used))
+        self._checkpoints[cid] = checkpoints
+        self._balances[cid] = (purchased, used)
+
+    def _add(self, cid, entry):
+        entries = self._entries.setdefault(cid, [])
+        times = self._times.setdefault(cid, [])
+        if times and entry[0] < times[-1]:
+            # 시간 순서가 어긋난 내역은 제자리에 끼우고 중간 합계를 다시 만든다
+            pos = bisect.bisect_right(times, entry[0])
+            entries.insert(pos, entry)
+            self._recompute(cid)
+            return
+        entries.append(entry)
+        times.append(entry[0])
+        purchased, used = self._balances.get(cid, (0, 0))
+        self._balances[cid] = (purchased + entry[1], used + entry[2])
+        if len(entries) % self.CHECKPOINT_EVERY == 0:
+            self._checkpoints.setdefault(cid, [(0, 0)]).append(self._balances[cid])
+
+    def add_deduction(self, record):
+        self._add(record.customer_id, (getattr(record, "created_at", ""), 0, record.minutes))
+
+    def adjust(self, customer_id, kind, minutes, note="", at=None):
+        """구매(purchase, 총 구매 시간 증감) 또는 보정(correction, 사용 시간 증감) 을 남긴다"""
+        if not minutes:
+            return None
+        entry = {
+            "id": generate_id(),
+            "customer_id": customer_id,
+            "kind": kind,
+            "minutes": minutes,
+            "at": datetime.now().isoformat() if at is None else at,
+            "note": note,
+        }
+        self.adjustments.append(entry)
+        self._opened.add(customer_id)
+        self._add(customer_id, self._adjustment_entry(entry))
+        return entry
+
+    def is_opened(self, customer_id):
+        return customer_id in self._opened
+
+    def mark_opened(self, customer_id, note="", at=""):
+        """구매·보정 내역 없이 0/0 으로 시작하는 고객에게 기초 잔액을 잡았다는 표시를 남긴다"""
+        if customer_id in self._opened:
+            return None
+        entry = {"id": generate_id(), "customer_id": customer_id, "kind": "opening",
+                 "minutes": 0, "at": at, "note": note}
+        self.adjustments.append(entry)
+        self._opened.add(customer_id)
+        return entry
+
+    def balance(self, customer_id):
+        """(총 구매 분, 사용 분)"""
+        return self._balances.get(customer_id, (0, 0))
+
+    def remaining(self, customer_id):
+        purchased, used = self.balance(customer_id)
+        return purchased - used
+
+    def balance_as_of(self, customer_id, when, inclusive=True):
+        """when(ISO 날짜/시각) 시점의 (총 구매 분, 사용 분). inclusive 가 False 면 그 시각의 내역은 뺀다.
+
+        날짜만 주면 그날 하루 끝까지의 잔액이다.
+        """
+        times = self._times.get(customer_id)
+        if not times:
+            return (0, 0)
+        if inclusive and len(when) == 10:
+            when += "T24"
+        end = (bisect.bisect_right if inclusive else bisect.bisect_left)(times, when)
+        k = end // self.CHECKPOINT_EVERY
+        purchased, used = self._checkpoints[customer_id][k]
+        for _, d_total, d_used in self._entries[customer_id][k * self.CHECKPOINT_EVERY:end]:
+            purchased += d_total
+            used += d_used
+        return purchased, used
+
+    def history(self, customer_id):
+        """(시각, 총 구매 증감 분, 사용 증감 분) 을 시간 순으로"""
+        return list(self._entries.get(customer_id, ()))
+
+    def apply_to(self, customer):
+        """원장 잔액을 고객 정보의 총 구매/사용 시간에 반영한다"""
+        purchased, used = self.balance(customer["id"])
+        customer["total_hours"] = from_minutes(purchased)
+        customer["used_hours"] = from_minutes(used)
+
+    def reconcile(self, customers):
+        """customers.json 의 시간을 원장과 맞춘다.
+
+        기초 잔액을 잡지 않은 고객(원장 도입 전 고객)은 현재 시간을 기초 잔액으로 남긴다.
+        차이가 없어도 opening 표시를 남기므로, 0/0 으로 시작한 고객도 이후 어긋나면 불일치로 잡힌다.
+        그 밖에 어긋난 고객은 차이만큼 보정 내역을 남기고 (고객명, 구매 차이 분, 사용 차이 분) 목록을 돌려준다.
+        """
+        mismatches = []
+        for c in customers:
+            cid = c["id"]
+            purchased, used = self.balance(cid)
+            d_total = to_minutes(c.get("total_hours", 0)) - purchased
+            d_used = to_minutes(c.get("used_hours", 0)) - used
+            if cid not in self._opened:
+                # 기초 잔액은 모든 차감보다 앞선 시점으로 둔다
+                self.adjust(cid, "purchase", d_total, "기초 잔액", at="")
+                self.adjust(cid, "correction", d_used, "기초 잔액", at="")
+                self.mark_opened(cid, "기초 잔액")
+            elif d_total or d_used:
+                self.adjust(cid, "purchase", d_total, "불일치 보정")
+                self.adjust(cid, "correction", d_used, "불일치 보정")
+                mismatches.append((c.get("name", cid), d_total, d_used))
+            self.apply_to(c)
+        return mismatches
@@ -0,0 +1,170 @@
+"""알림 메시지 템플릿과 렌더러"""
+
+import functools
+import hashlib
+import re
+from datetime import date
+
+from .storage import load_json, save_json
+from .util import format_number, format_time, from_minutes, pay_for, to_minutes
+
+# ─── 메시지 템플릿 ───
+# 템플릿 변수 → 설명 (설정 화면 안내에도 쓴다)
+TEMPLATE_FIELDS = {
+    "업체명": "설정의 업체명",
+    "고객명": "고객 이름",
+    "플레이시간": "이번 플레이 시간",
+    "누적시간": "차감 후 총 사용 시간",
+    "남은시간": "차감 후 남은 시간",
+    "총구매시간": "고객의 총 구매 시간",
+    "기사명": "플레이한 기사 이름",
+    "날짜": "차감 날짜",
+    "정산금액": "기사 정산 금액",
+}
+
+
+class MessageTemplate:
+    """메시지 형식을 한 번만 분석해 두고, 렌더링은 조각을 이어 붙이기만 한다.
+
+    모르는 {변수} 는 글자 그대로 남기고 unknown_fields 에 모아 둔다.
+    """
+
+    PLACEHOLDER = re.compile(r"\{([^{}\s]+)\}")
+
+    def __init__(self, text):
+        self.text = text
+        self.unknown_fields = []
+        self._pieces = []
+        self._slots = []
+        pos = 0
+        for m in self.PLACEHOLDER.finditer(text):
+            name = m.group(1)
+            if name not in TEMPLATE_FIELDS:
+                if name not in self.unknown_fields:
+                    self.unknown_fields.append(name)
+                continue
+            self._pieces.append(text[pos:m.start()])
+            self._slots.append((len(self._pieces), name))
+            self._pieces.append("")
+            pos = m.end()
+        self._pieces.append(text[pos:])
+        self.fields = {name for _, name in self._slots}
+        # 기록에 값을 남길 때 쓰는 순서 (처음 나온 순서, 중복 없음)
+        self.field_order = tuple(dict.fromkeys(name for _, name in self._slots))
+
+    def render(self, values):
+        pieces = self._pieces[:]
+        for slot, name in self._slots:
+            pieces[slot] = values[name]
+        return "".join(pieces)
+
+    def render_many(self, values_list):
+        """여러 건을 한 번에 렌더링한다"""
+        pieces, slots = self._pieces, self._slots
+        out = []
+        for values in values_list:
+            buf = pieces[:]
+            for slot, name in slots:
+                buf[slot] = values[name]
+            out.append("".join(buf))
+        return out
+
+    def snapshot(self, values):
+        """기록에 남길 값 목록. render_snapshot 으로 같은 메시지를 다시 만든다"""
+        return [values[name] for name in self.field_order]
+
+    def render_snapshot(self, snapshot):
+        return self.render(dict(zip(self.field_order, snapshot)))
+
+
+@functools.lru_cache(maxsize=8)
+def compile_template(text):
+    return MessageTemplate(text)
+
+
+class TemplateRegistry:
+    """기록에 쓰인 메시지 형식을 본문 해시로 한 번씩만 보관한다.
+
+    각 기록에는 형식 id 와 변수 값만 남기므로 같은 본문이 기록마다 반복되지 않는다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.texts = load_json(path, {})
+
+    @staticmethod
+    def template_id(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+    def intern(self, text):
+        tid = self.template_id(text)
+        if tid not in self.texts:
+            self.texts[tid] = text
+            # 이 형식을 가리키는 기록보다 먼저 디스크에 있어야 하므로 바로 저장한다
+            save_json(self.path, self.texts)
+        return tid
+
+    def get(self, tid):
+        return self.texts.get(tid)
+
+
+def message_values(business_name, customer, play_hours, driver_name="", total_pay=0, day=None):
+    """템플릿 변수 값을 만든다. 누적/남은 시간은 이번 플레이를 더한 값이다"""
+    # 분 단위 정수로 더하고 뺀다
+    play = to_minutes(play_hours)
+    used = to_minutes(customer["used_hours"])
+    remaining = from_minutes(to_minutes(customer["total_hours"]) - used - play)
+    new_used = from_minutes(used + play)
+    return {
+        "업체명": business_name,
+        "고객명": customer["name"],
+        "플레이시간": format_time(play_hours),
+        "누적시간": format_time(new_used),
+        "남은시간": format_time(remaining),
+        "총구매시간": format_time(customer["total_hours"]),
+        "기사명": driver_name,
+        "날짜": day or date.today().isoformat(),
+        "정산금액": f"{format_number(total_pay)}원",
+    }
+
+
+class MessageRenderer:
+    """설정의 메시지 형식으로 알림 메시지를 만들고, 기록에 남긴 메시지를 되살린다"""
+
+    def __init__(self, settings, templates, ledger=None):
+        self.settings = settings
+        self.templates = templates
+        self.ledger = ledger
+
+    def template(self):
+        return compile_template(self.settings["message_template"])
+
+    def values(self, customer, play_hours, driver=None, day=None):
+        driver_name = driver["name"] if driver else ""
+        total_pay = pay_for(to_minutes(play_hours), driver["hourly_rate"]) if driver else 0
+        return message_values(self.settings["business_name"], customer, play_hours,
+                              driver_name, total_pay, day)
+
+    def render(self, customer, play_hours, driver=None, day=None):
+        return self.template().render(self.values(customer, play_hours, driver, day))
+
+    def record_message(self, record):
+        """기록에 남긴 메시지를 그대로 돌려준다. 메시지를 남기기 전의 기록이면 None"""
+        snap = record.get("message")
+        if not snap:
+            return None
+        text = self.templates.get(snap["template"])
+        if text is None:
+            return None
+        return compile_template(text).render_snapshot(snap["values"])
+
+    def legacy_record_message(self, record, customer):
+        """메시지를 남기지 않던 예전 기록의 메시지를 원장의 차감 직전 잔액으로 되살린다"""
+        purchased, used = self.ledger.balance_as_of(customer["id"], record.get("created_at", ""),
+                                                    inclusive=False)
+        before = dict(customer, total_hours=from_minutes(purchased), used_hours=from_minutes(used))
+        driver = {"name": record.get("driver_name", ""), "hourly_rate": record.get("hourly_rate", 0)}
+        return self.render(before, record["play_hours"], driver, record.get("date"))
+
+    def message_for(self, record, customer):
+        return self.record_message(record) or self.legacy_record_message(record, customer)
@@ -0,0 +1,140 @@
+"""성능 계측: 구간별 소요 시간, 위젯 생성·삭제 수, cProfile 캡처"""
+
+import cProfile
+import functools
+import os
+import pstats
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+from .config import PROFILE_DIR
+
+# ─── 성능 계측 ───
+class Metrics:
+    """켜져 있을 때만 구간별 소요 시간과 위젯 생성·삭제 수를 모은다.
+
+    구간마다 최근 WINDOW 건만 보관해서 백분위는 최근 동작 기준이다.
+    저장은 백그라운드 스레드에서도 불리므로 잠금으로 보호한다.
+    """
+
+    WINDOW = 500
+
+    def __init__(self):
+        self.enabled = False
+        self.counters = Counter()
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._patched = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._patch_widgets()
+
+    def disable(self):
+        self.enabled = False
+        self._unpatch_widgets()
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.WINDOW)
+            samples.append(seconds)
+            self.counters[f"calls:{name}"] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self.counters.clear()
+
+    def summary(self):
+        """(이름, 전체 호출 수, p50, p90, p99, 최대) 목록. 시간은 초"""
+        with self._lock:
+            items = [(name, list(samples)) for name, samples in self._samples.items()]
+            calls = dict(self.counters)
+        rows = []
+        for name, samples in sorted(items):
+            samples.sort()
+            n = len(samples)
+            pick = lambda q: samples[min(n - 1, int(q * n))]
+            rows.append((name, calls.get(f"calls:{name}", n), pick(0.5), pick(0.9), pick(0.99), samples[-1]))
+        return rows
+
+    def _patch_widgets(self):
+        # 위젯 생성·삭제 수는 tkinter 의 공통 기반 클래스를 감싸서 센다.
+        # 화면 없이 쓰는 경우를 위해 tkinter 는 여기서 불러온다
+        from tkinter import BaseWidget
+        counters = self.counters
+        init, destroy = BaseWidget.__init__, BaseWidget.destroy
+
+        def counted_init(widget, *args, **kwargs):
+            counters["widgets created"] += 1
+            init(widget, *args, **kwargs)
+
+        def counted_destroy(widget):
+            counters["widgets destroyed"] += 1
+            destroy(widget)
+
+        self._patched = (init, destroy)
+        BaseWidget.__init__ = counted_init
+        BaseWidget.destroy = counted_destroy
+
+    def _unpatch_widgets(self):
+        if self._patched:
+            from tkinter import BaseWidget
+            BaseWidget.__init__, BaseWidget.destroy = self._patched
+            self._patched = None
+
+
+metrics = Metrics()
+if os.environ.get("ALIMTALK_PROFILE"):
+    metrics.enable()
+
+
+def timed(name=None):
+    """계측이 켜져 있으면 함수 실행 시간을 name(기본: 함수 이름) 구간으로 기록한다"""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.record(label, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+class ProfileCapture:
+    """cProfile 로 한 동작을 잡아 PROFILE_DIR 에 .prof 와 읽기 쉬운 .txt 로 남긴다"""
+
+    def __init__(self):
+        self._profile = None
+
+    @property
+    def running(self):
+        return self._profile is not None
+
+    def start(self):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self, label="capture"):
+        """저장한 .txt 경로를 돌려준다"""
+        profile, self._profile = self._profile, None
+        profile.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{label}")
+        profile.dump_stats(base + ".prof")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            stats = pstats.Stats(profile, stream=f)
+            stats.sort_stats("cumulative").print_stats(40)
+        return base + ".txt"
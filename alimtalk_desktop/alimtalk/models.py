@@ -0,0 +1,289 @@
+"""고객·차감 기록·기사 모델
+
+JSON 의 dict 를 그대로 들고 있지 않고 __slots__ 객체로 바꿔서 한 건당 메모리를 줄인다.
+시간은 분 단위 정수, 금액은 원 단위 정수로 두고, 파일에 쓸 때는 원래 JSON 모양으로 돌려놓는다.
+r["play_hours"], c.get("phone") 처럼 dict 로 쓰던 코드는 그대로 동작한다.
+"""
+
+from sys import intern
+
+from .util import from_minutes
+
+# 되풀이되는 금액·분은 한 객체를 함께 쓴다. 문자열은 intern 으로 함께 쓴다
+_shared = {}
+
+
+def _share(value):
+    if type(value) is str:
+        return intern(value)
+    return _shared.setdefault(value, value)
+
+
+def _exact_minutes(value):
+    """시간 값이 정수 분으로 딱 떨어지면 그 분을, 아니면 None"""
+    if type(value) not in (int, float):
+        return None
+    minutes = round(value * 60)
+    return minutes if from_minutes(minutes) == value else None
+
+
+def _hours_property(key, attr):
+    def get(self):
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        return from_minutes(getattr(self, attr))
+
+    def set(self, value):
+        if self.extra is not None:
+            self.extra.pop(key, None)
+        minutes = _exact_minutes(value)
+        if minutes is None:
+            # 분으로 떨어지지 않는 값은 가장 가까운 분으로 계산하고 원래 값은 저장할 때 그대로 돌려준다
+            self.extra = dict(self.extra or (), **{key: value})
+            minutes = round(value * 60) if type(value) in (int, float) else None
+        if minutes is None:
+            if hasattr(self, attr):
+                delattr(self, attr)
+        else:
+            setattr(self, attr, _share(minutes))
+
+    return property(get, set, doc=f"{key} (시간). {attr} 에 분 단위 정수로 들어 있다")
+
+
+class Model:
+    """JSON 객체 하나를 담는 __slots__ 객체의 공통 부분.
+
+    KEYS 는 JSON 키 순서, HOURS 는 분 단위 정수 속성으로 바꿔 두는 시간 키, SHARED 는 함께 쓰는 값의 키다.
+    모르는 키는 extra 에 그대로 두어 다시 저장해도 빠지지 않는다.
+    """
+
+    __slots__ = ("extra",)
+    KEYS = ()
+    HOURS = {}
+    SHARED = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for key, attr in cls.HOURS.items():
+            setattr(cls, key, _hours_property(key, attr))
+        cls._known = frozenset(cls.KEYS)
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls.__new__(cls)
+        obj.extra = None
+        hours, shared, known = cls.HOURS, cls.SHARED, cls._known
+        for key, value in data.items():
+            if key in hours:
+                setattr(obj, key, value)
+            elif key in known:
+                if key in shared:
+                    if type(value) is str or type(value) is int:
+                        value = _share(value)
+                    elif type(value) is float and value.is_integer():
+                        value = _share(int(value))
+                setattr(obj, key, value)
+            else:
+                if obj.extra is None:
+                    obj.extra = {}
+                obj.extra[key] = value
+        return obj
+
+    def to_dict(self):
+        data = {}
+        for key in self.KEYS:
+            try:
+                data[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self):
+        obj = self.__class__.__new__(self.__class__)
+        for cls in type(self).__mro__:
+            for attr in getattr(cls, "__slots__", ()):
+                try:
+                    setattr(obj, attr, getattr(self, attr))
+                except AttributeError:
+                    pass
+        if self.extra is not None:
+            obj.extra = dict(self.extra)
+        return obj
+
+    # ─── dict 처럼 쓰기 ───
+    def __getitem__(self, key):
+        if key in self._known:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._known:
+            return getattr(self, key, default)
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __setitem__(self, key, value):
+        if key in self._known:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        if key in self._known:
+            return hasattr(self, key)
+        return self.extra is not None and key in self.extra
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def update(self, data):
+        for key, value in data.items():
+            self[key] = value
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+class Customer(Model):
+    __slots__ = ("id", "name", "phone", "game_name", "total_minutes", "used_minutes", "memo",
+                 "created_at")
+    KEYS = ("id", "name", "phone", "game_name", "total_hours", "used_hours", "memo", "created_at")
+    HOURS = {"total_hours": "total_minutes", "used_hours": "used_minutes"}
+
+    @property
+    def remaining_minutes(self):
+        return getattr(self, "total_minutes", 0) - getattr(self, "used_minutes", 0)
+
+
+class Driver(Model):
+    __slots__ = ("id", "name", "hourly_rate")
+    KEYS = ("id", "name", "hourly_rate")
+    SHARED = frozenset({"hourly_rate"})
+
+
+class Record(Model):
+    """차감 기록. 플레이 시간은 minutes, 차감 당시 시간 값도 각각 분 단위로 둔다"""
+
+    __slots__ = ("id", "customer_id", "customer_name", "driver_name", "minutes", "hourly_rate",
+                 "total_pay", "date", "message_sent", "created_at", "used_before_minutes",
+                 "used_after_minutes", "remaining_after_minutes", "message_template",
+                 "message_values")
+    KEYS = ("id", "customer_id", "customer_name", "driver_name", "play_hours", "hourly_rate",
+            "total_pay", "date", "message_sent", "created_at", "used_before", "used_after",
+            "remaining_after", "message")
+    HOURS = {"play_hours": "minutes", "used_before": "used_before_minutes",
+             "used_after": "used_after_minutes", "remaining_after": "remaining_after_minutes"}
+    SHARED = frozenset({"customer_id", "customer_name", "driver_name", "hourly_rate", "total_pay",
+                        "date"})
+
+    @classmethod
+    def from_dict(cls, data):
+        # 기록은 수십만 건이라 키가 모두 있는 보통의 기록은 속성마다 바로 넣는다.
+        # 분으로 떨어지지 않는 시간처럼 예상과 다른 값이 있으면 일반 경로로 간다
+        if len(data) != len(cls.KEYS):
+            return super().from_dict(data)
+        share = _shared.setdefault
+        r = cls.__new__(cls)
+        try:
+            hours = data["play_hours"]
+            m = round(hours * 60)
+            r.minutes = m = share(m, m)
+            exact = m / 60 == hours
+            hours = data["used_before"]
+            m = round(hours * 60)
+            r.used_before_minutes = m = share(m, m)
+            exact = exact and m / 60 == hours
+            hours = data["used_after"]
+            m = round(hours * 60)
+            r.used_after_minutes = m = share(m, m)
+            exact = exact and m / 60 == hours
+            hours = data["remaining_after"]
+            m = round(hours * 60)
+            r.remaining_after_minutes = m = share(m, m)
+            snap = data["message"]
+            if not (exact and m / 60 == hours and type(snap) is dict and len(snap) == 2
+                    and type(snap["values"]) is list):
+                return super().from_dict(data)
+            r.message_template = intern(snap["template"])
+            r.message_values = tuple(map(intern, snap["values"]))
+            r.customer_id = intern(data["customer_id"])
+            r.customer_name = intern(data["customer_name"])
+            r.driver_name = intern(data["driver_name"])
+            rate, pay = data["hourly_rate"], data["total_pay"]
+            if type(rate) is not int or type(pay) is not int:
+                return super().from_dict(data)
+            r.hourly_rate = share(rate, rate)
+            r.total_pay = share(pay, pay)
+            r.date = intern(data["date"])
+            r.id = data["id"]
+            r.message_sent = data["message_sent"]
+            r.created_at = data["created_at"]
+        except (KeyError, TypeError):
+            return super().from_dict(data)
+        r.extra = None
+        return r
+
+    def to_dict(self):
+        if self.extra is not None:
+            return super().to_dict()
+        try:
+            m = (self.minutes, self.used_before_minutes, self.used_after_minutes,
+                 self.remaining_after_minutes)
+            data = {
+                "id": self.id,
+                "customer_id": self.customer_id,
+                "customer_name": self.customer_name,
+                "driver_name": self.driver_name,
+                "play_hours": m[0] // 60 if m[0] % 60 == 0 else m[0] / 60,
+                "hourly_rate": self.hourly_rate,
+                "total_pay": self.total_pay,
+                "date": self.date,
+                "message_sent": self.message_sent,
+                "created_at": self.created_at,
+                "used_before": m[1] // 60 if m[1] % 60 == 0 else m[1] / 60,
+                "used_after": m[2] // 60 if m[2] % 60 == 0 else m[2] / 60,
+                "remaining_after": m[3] // 60 if m[3] % 60 == 0 else m[3] / 60,
+                "message": {"template": self.message_template, "values": list(self.message_values)},
+            }
+        except AttributeError:
+            # 예전 기록처럼 빠진 키가 있다
+            return super().to_dict()
+        return data
+
+    # 메시지 스냅샷 {"template": id, "values": [...]} 은 형식 id 와 값 튜플로 나눠 둔다
+    @property
+    def message(self):
+        if self.extra is not None and "message" in self.extra:
+            return self.extra["message"]
+        return {"template": self.message_template, "values": list(self.message_values)}
+
+    @message.setter
+    def message(self, snap):
+        if self.extra is not None:
+            self.extra.pop("message", None)
+        if (type(snap) is dict and len(snap) == 2 and type(snap.get("template")) is str
+                and type(snap.get("values")) is list):
+            self.message_template = intern(snap["template"])
+            self.message_values = tuple(intern(v) if type(v) is str else v for v in snap["values"])
+        else:
+            self.extra = dict(self.extra or (), message=snap)
+
+
+def json_default(obj):
+    """json.dumps 의 default. 모델은 원래 JSON 모양으로 쓴다"""
+    if isinstance(obj, Model):
+        return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} 은(는) JSON 으로 쓸 수 없습니다")
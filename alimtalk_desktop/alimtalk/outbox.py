@@ -0,0 +1,350 @@
+"""메시지 발송 대기열 (클립보드 / 알림톡 게이트웨이)"""
+
+import heapq
+import http.client
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from .config import log
+from .storage import dump_json
+
+# ─── 메시지 발송 (outbox) ───
+class DeliveryError(Exception):
+    """발송 실패. retryable 이 False 면 다시 시도해도 소용없는 오류다"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class OutboxJob:
+    __slots__ = ("record_id", "phone", "message", "attempts", "last_error")
+
+    def __init__(self, record_id, phone, message, attempts=0, last_error=""):
+        self.record_id = record_id
+        self.phone = phone
+        self.message = message
+        self.attempts = attempts
+        self.last_error = last_error
+
+    def to_dict(self):
+        return {"record_id": self.record_id, "phone": self.phone, "message": self.message,
+                "attempts": self.attempts, "last_error": self.last_error}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["record_id"], data.get("phone", ""), data["message"],
+                   data.get("attempts", 0), data.get("last_error", ""))
+
+
+class Transport:
+    """발송 방식의 공통 인터페이스. send 가 예외 없이 끝나면 발송 완료로 본다"""
+
+    name = ""
+    # False 면 UI 스레드에서만 부를 수 있다
+    thread_safe = True
+
+    def send(self, job):
+        raise NotImplementedError
+
+
+class ClipboardTransport(Transport):
+    """메시지를 클립보드에 복사한다. 사용자가 카카오톡에 붙여넣는 기존 방식"""
+
+    name = "clipboard"
+    thread_safe = False
+
+    def __init__(self, root):
+        self.root = root
+
+    def send(self, job):
+        self.root.clipboard_clear()
+        self.root.clipboard_append(job.message)
+        self.root.update()
+
+
+class HttpGatewayTransport(Transport):
+    """알림톡 게이트웨이에 JSON 으로 POST 한다. 스레드마다 연결을 재사용한다"""
+
+    name = "gateway"
+
+    def __init__(self, url, api_key="", timeout=10):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"게이트웨이 주소가 올바르지 않습니다: {url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        self.api_key = api_key
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = cls(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def send(self, job):
+        if not job.phone:
+            raise DeliveryError("전화번호가 없습니다", retryable=False)
+        body = dump_json({"to": job.phone, "message": job.message, "ref": job.record_id}).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        conn = self._connection()
+        try:
+            conn.request("POST", self.path, body, headers)
+            resp = conn.getresponse()
+            detail = resp.read().decode("utf-8", "replace")[:200]
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            self._local.conn = None
+            raise DeliveryError(f"연결 오류: {e}") from e
+        if 200 <= resp.status < 300:
+            return
+        # 요청 한도 초과와 서버 오류는 잠시 뒤 다시 보내고, 나머지는 요청 자체가 잘못된 것이다
+        retryable = resp.status == 429 or resp.status >= 500
+        raise DeliveryError(f"HTTP {resp.status}: {detail}", retryable=retryable)
+
+
+class RateLimiter:
+    """초당 rate 건까지만 통과시키는 토큰 버킷 (여러 스레드에서 함께 쓴다)"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.capacity = max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Outbox:
+    """미발송 메시지를 작업 스레드 여러 개로 보내는 대기열.
+
+    실패하면 지수적으로 늘어나는 간격으로 다시 시도하고, 성공한 것만 on_sent 로 알린다.
+    on_sent / on_failed 는 작업 스레드에서 불리므로 UI 를 직접 건드리면 안 된다.
+    """
+
+    def __init__(self, transport, on_sent=None, on_failed=None, workers=4,
+                 max_attempts=5, base_delay=1.0, max_delay=60.0, rate=10):
+        self.transport = transport
+        self.on_sent = on_sent or (lambda job: None)
+        self.on_failed = on_failed or (lambda job, error: None)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = RateLimiter(rate)
+        self.sent_count = 0
+        self.failed_count = 0
+        self.retry_count = 0
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads = [threading.Thread(target=self._work, name=f"outbox-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def enqueue(self, job, delay=0.0):
+        with self._cond:
+            self._jobs[job.record_id] = job
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._jobs)
+
+    def has(self, record_id):
+        return record_id in self._jobs
+
+    def snapshot(self):
+        """outbox.json 에 저장할 남은 작업 목록"""
+        with self._cond:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def wait_idle(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._jobs:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, wait=True, timeout=2.0):
+        """새 작업을 꺼내지 않게 한다. wait 가 False 면 작업 스레드를 기다리지 않는다 (join 참고)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            self.join(timeout)
+
+    def join(self, timeout=None):
+        """작업 스레드가 끝날 때까지 기다린다. 보내던 메시지는 끝까지 보내고, 다시 시도할 작업은 대기열에 남는다"""
+        for t in self._threads:
+            t.join(timeout)
+
+    def _next_job(self):
+        with self._cond:
+            while not self._stopping:
+                if self._heap:
+                    due = self._heap[0][0] - time.monotonic()
+                    if due <= 0:
+                        return heapq.heappop(self._heap)[2]
+                    self._cond.wait(due)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self.limiter.acquire()
+            job.attempts += 1
+            try:
+                self.transport.send(job)
+            except Exception as e:
+                retryable = getattr(e, "retryable", True)
+                self._retry_or_fail(job, e, retryable)
+            else:
+                self.on_sent(job)
+                self._finish(job, sent=True)
+
+    def _retry_or_fail(self, job, error, retryable):
+        job.last_error = str(error)
+        if retryable and job.attempts < self.max_attempts:
+            # 1, 2, 4, 8 ... 초 간격에 약간의 흔들림을 더해 한꺼번에 몰리지 않게 한다
+            delay = min(self.max_delay, self.base_delay * 2 ** (job.attempts - 1))
+            with self._cond:
+                self.retry_count += 1
+            self.enqueue(job, delay * random.uniform(0.8, 1.2))
+            return
+        log.warning("메시지 발송 실패 (%s): %s", job.record_id, error)
+        self.on_failed(job, error)
+        self._finish(job, sent=False)
+
+    def _finish(self, job, sent):
+        # 결과를 알린 뒤에 대기열에서 빼야 wait_idle 이후에 알림이 빠지지 않는다
+        with self._cond:
+            self._jobs.pop(job.record_id, None)
+            if sent:
+                self.sent_count += 1
+            else:
+                self.failed_count += 1
+            self._cond.notify_all()
+
+
+class MockGateway:
+    """오프라인 시험용 알림톡 게이트웨이.
+
+    POST 로 받은 메시지를 세기만 하고, failure_rate 비율로 503/429 를 돌려주며
+    latency 초만큼 늦게 응답한다.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, failure_rate=0.0, latency=0.0, seed=None):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.received = 0
+        self.rejected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 헤더와 본문을 따로 써서 Nagle 지연(40ms)이 생기지 않게 한다
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    payload = {}
+                status = gateway._decide(payload)
+                if gateway.latency:
+                    time.sleep(gateway.latency)
+                body = dump_json({"result": "ok" if status == 200 else "error"}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1/alimtalk"
+
+    def _decide(self, payload):
+        if not payload.get("to") or not payload.get("message"):
+            return 400
+        with self._lock:
+            if self._random.random() < self.failure_rate:
+                self.rejected += 1
+                return self._random.choice((429, 503))
+            self.received += 1
+            return 200
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-gateway", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def benchmark_outbox(count=1000, workers=4, rate=500, failure_rate=0.1, latency=0.005):
+    """로컬 가짜 게이트웨이로 outbox 처리량과 실패 처리를 측정한다"""
+    gateway = MockGateway(failure_rate=failure_rate, latency=latency, seed=1).start()
+    failed = []
+    outbox = Outbox(HttpGatewayTransport(gateway.url), on_failed=lambda job, e: failed.append(job),
+                    workers=workers, rate=rate, base_delay=0.05, max_delay=1.0)
+    start = time.perf_counter()
+    for i in range(count):
+        outbox.enqueue(OutboxJob(f"bench-{i}", "010-0000-0000", f"벤치마크 메시지 {i}"))
+    outbox.wait_idle()
+    elapsed = time.perf_counter() - start
+    outbox.stop()
+    gateway.stop()
+    print(f"메시지 {count}건, 작업 스레드 {workers}개, 초당 한도 {rate}건, 실패율 {failure_rate:.0%}")
+    print(f"  소요 {elapsed:.2f}초 ({count / elapsed:.0f}건/초)")
+    print(f"  성공 {outbox.sent_count}건, 재시도 {outbox.retry_count}회, 최종 실패 {outbox.failed_count}건")
+    return {"elapsed": elapsed, "sent": outbox.sent_count,
+            "retries": outbox.retry_count, "failed": outbox.failed_count}
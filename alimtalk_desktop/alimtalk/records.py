@@ -0,0 +1,164 @@
+"""차감 기록 보관 파일과 알림 내역 페이지 읽기"""
+
+import bisect
+import gzip
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from .models import Record
+from .storage import dump_json, iter_json_array, write_bytes_atomic
+
+
+# ─── 기록 보관 ───
+def archive_cutoff(months, today=None):
+    """months 달 전 1일. 이 날짜보다 앞선 기록이 보관 대상이다"""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1).isoformat()
+
+
+class RecordArchive:
+    """오래된 차감 기록을 달마다 gzip 으로 압축한 records-YYYY-MM.json.gz 로 보관한다.
+
+    시작할 때는 열지 않고, 내역·정산 화면이 그 달을 찾을 때 읽어서 최근 몇 달치만 들고 있는다.
+    """
+
+    FILE_PATTERN = re.compile(r"^records-(\d{4}-\d{2})\.json\.gz$")
+    CACHED_MONTHS = 6
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._cache = OrderedDict()
+
+    def path(self, month):
+        return os.path.join(self.directory, f"records-{month}.json.gz")
+
+    def months(self):
+        """보관된 달 목록 (오래된 순)"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(m.group(1) for m in map(self.FILE_PATTERN.match, names) if m)
+
+    def load(self, month):
+        records = self._cache.get(month)
+        if records is not None:
+            self._cache.move_to_end(month)
+            return records
+        path = self.path(month)
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            records = [Record.from_dict(r) for r in json.load(f)]
+        self._remember(month, records)
+        return records
+
+    def stream(self, month):
+        """그 달의 기록을 캐시에 올리지 않고 하나씩 돌려준다. 전체 내보내기처럼 모든 달을 훑을 때 쓴다"""
+        records = self._cache.get(month)
+        if records is not None:
+            yield from records
+            return
+        path = self.path(month)
+        if not os.path.exists(path):
+            return
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            yield from map(Record.from_dict, iter_json_array(f))
+
+    def _remember(self, month, records):
+        self._cache[month] = records
+        self._cache.move_to_end(month)
+        if len(self._cache) > self.CACHED_MONTHS:
+            self._cache.popitem(last=False)
+
+    def add(self, records):
+        """기록을 달별 파일에 합친다. 이미 보관된 기록은 건너뛰고, 새로 들어간 기록만 돌려준다"""
+        by_month = {}
+        for r in records:
+            by_month.setdefault(r.get("date", "")[:7], []).append(r)
+        added = []
+        for month, items in sorted(by_month.items()):
+            existing = self.load(month)
+            ids = {r["id"] for r in existing}
+            new = [r for r in items if r["id"] not in ids]
+            if not new:
+                continue
+            merged = existing + new
+            merged.sort(key=lambda r: r.get("created_at", ""))
+            write_bytes_atomic(self.path(month), gzip.compress(dump_json(merged).encode("utf-8")))
+            self._remember(month, merged)
+            added.extend(new)
+        return added
+
+
+# ─── 알림 내역 페이지 읽기 ───
+class RecordPager:
+    """차감 기록을 최신순으로 필요한 구간만 읽는다.
+
+    JSON 저장소에서는 created_at 순으로 쌓인 메모리 목록을 뒤에서부터 읽고,
+    SQLite 저장소에서는 created_at 인덱스로 페이지 단위 조회 후 최근 페이지만 보관한다.
+    """
+
+    PAGE_SIZE = 200
+    CACHED_PAGES = 20
+
+    def __init__(self, records, store=None):
+        self.records = records
+        self.store = store
+        self._pages = OrderedDict()
+        self._count = None
+
+    def count(self):
+        if self.store is None:
+            return len(self.records)
+        if self._count is None:
+            self._count = self.store.count_records()
+        return self._count
+
+    def fetch(self, start, stop):
+        if self.store is None:
+            n = len(self.records)
+            return [self.records[n - 1 - i] for i in range(start, min(stop, n))]
+        items = []
+        for page_no in range(start // self.PAGE_SIZE, (stop - 1) // self.PAGE_SIZE + 1):
+            page = self._page(page_no)
+            base = page_no * self.PAGE_SIZE
+            items.extend(page[max(start - base, 0):stop - base])
+        return items
+
+    def index_of_date(self, day):
+        """day 당일 또는 그 이전의 가장 최근 기록이 몇 번째인지 돌려준다"""
+        next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        if self.store is None:
+            newer = len(self.records) - bisect.bisect_left(
+                self.records, next_day, key=lambda r: getattr(r, "created_at", ""))
+        else:
+            newer = self.store.count_records(created_from=next_day)
+        return min(newer, max(self.count() - 1, 0))
+
+    def invalidate(self):
+        self._pages.clear()
+        self._count = None
+
+    def _page(self, page_no):
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self.store.recent_records(self.PAGE_SIZE, page_no * self.PAGE_SIZE)
+            self._pages[page_no] = page
+            if len(self._pages) > self.CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_no)
+        return page
+
+
+def sort_records_by_created(records):
+    """알림 내역은 목록이 created_at 순이라고 가정하므로, 어긋난 경우 한 번 정렬해 둔다"""
+    for prev, cur in zip(records, records[1:]):
+        if getattr(prev, "created_at", "") > getattr(cur, "created_at", ""):
+            records.sort(key=lambda r: getattr(r, "created_at", ""))
+            return
@@ -0,0 +1,206 @@
+"""대시보드 집계와 기사 정산"""
+
+import csv
+import heapq
+from collections import Counter
+from datetime import date, timedelta
+
+from .util import format_time
+
+
+# ─── 대시보드 집계 ───
+class DashboardStats:
+    """대시보드 숫자를 데이터가 바뀔 때마다 갱신해 두어, 화면을 그릴 때 다시 세지 않는다"""
+
+    def __init__(self, customers, records, recent_size=5):
+        self.recent_size = recent_size
+        self.rebuild(customers, records)
+
+    def rebuild(self, customers, records):
+        self.per_day = Counter()
+        self.pending = set()
+        self._remaining = {}
+        self._remaining_total = 0
+        self._recent = []
+        self._seq = 0
+        for c in customers:
+            self.set_customer(c)
+        for r in records:
+            self.add_record(r)
+
+    # ─── 갱신 ───
+    def add_record(self, record):
+        # 기록은 models.Record 라서 dict 처럼 get 을 부르지 않고 속성을 바로 읽는다
+        self.per_day[getattr(record, "date", None)] += 1
+        if not getattr(record, "message_sent", False):
+            self.pending.add(record.id)
+        # created_at 이 가장 이른 것이 맨 앞에 오는 크기 제한 힙
+        self._seq += 1
+        entry = (getattr(record, "created_at", ""), self._seq, record)
+        if len(self._recent) < self.recent_size:
+            heapq.heappush(self._recent, entry)
+        elif entry[:2] > self._recent[0][:2]:
+            heapq.heapreplace(self._recent, entry)
+
+    def mark_sent(self, record_id):
+        self.pending.discard(record_id)
+
+    def set_customer(self, customer):
+        # 분 단위 정수로 더해서 소수 오차가 쌓이지 않게 한다
+        minutes = round(max(0, customer.get("total_hours", 0) - customer.get("used_hours", 0)) * 60)
+        self._remaining_total += minutes - self._remaining.get(customer["id"], 0)
+        self._remaining[customer["id"]] = minutes
+
+    def remove_customer(self, customer_id):
+        self._remaining_total -= self._remaining.pop(customer_id, 0)
+
+    # ─── 조회 ───
+    def count_on(self, day):
+        return self.per_day.get(day, 0)
+
+    def pending_count(self):
+        return len(self.pending)
+
+    def customer_count(self):
+        return len(self._remaining)
+
+    def total_remaining_hours(self):
+        return self._remaining_total / 60
+
+    def recent(self):
+        return [r for _, _, r in sorted(self._recent, key=lambda e: e[:2], reverse=True)]
+
+    def summary(self, day=None):
+        """대시보드 요약 카드 값: 고객 수, day(기본 오늘) 차감 건수, 미발송 건수, 남은 시간 합계"""
+        return {
+            "customers": self.customer_count(),
+            "today": self.count_on(day or date.today().isoformat()),
+            "pending": self.pending_count(),
+            "remaining": self.total_remaining_hours(),
+        }
+
+
+# ─── 기사 정산 ───
+SETTLEMENT_PERIODS = {"day": "일별", "week": "주별", "month": "월별"}
+
+
+def period_key(day, period):
+    """차감 날짜(YYYY-MM-DD)가 속한 기간. 주는 그 주 월요일 날짜, 월은 YYYY-MM"""
+    if period == "month":
+        return day[:7]
+    if period == "week":
+        d = date.fromisoformat(day)
+        return (d - timedelta(days=d.weekday())).isoformat()
+    return day
+
+
+def period_label(key, period):
+    if period == "week":
+        end = date.fromisoformat(key) + timedelta(days=6)
+        return f"{key} ~ {end.isoformat()}"
+    return key
+
+
+class Settlement:
+    """기사별·기간별 정산 합계.
+
+    기록을 한 번 훑어 (날짜, 기사) 별 부분합을 만들고, 주·월 합계는 처음 볼 때 이 부분합에서 모은다.
+    새 기록은 부분합과 이미 만든 합계에 바로 더하므로 전체를 다시 훑지 않는다.
+    """
+
+    def __init__(self, records, archive=None):
+        self.archive = archive
+        self.rebuild(records)
+
+    def rebuild(self, records):
+        self._days = {}
+        self._views = {}
+        # 이미 합계에 넣은 보관 달
+        self._archived = set()
+        for r in records:
+            self._add_to(self._days, (getattr(r, "date", ""), getattr(r, "driver_name", "")), r)
+
+    @staticmethod
+    def _add_to(sums, key, r):
+        s = sums.get(key)
+        if s is None:
+            s = sums[key] = [0, 0, 0]
+        s[0] += 1
+        s[1] += getattr(r, "minutes", 0)
+        s[2] += getattr(r, "total_pay", 0)
+
+    def add_record(self, record):
+        day, driver = getattr(record, "date", ""), getattr(record, "driver_name", "")
+        self._add_to(self._days, (day, driver), record)
+        for period, view in self._views.items():
+            self._add_to(view, (period_key(day, period), driver), record)
+
+    def _view(self, period):
+        if period == "day":
+            return self._days
+        view = self._views.get(period)
+        if view is None:
+            view = {}
+            keys = {}
+            for (day, driver), (count, minutes, pay) in self._days.items():
+                key = keys.get(day)
+                if key is None:
+                    key = keys[day] = period_key(day, period)
+                s = view.get((key, driver))
+                if s is None:
+                    s = view[(key, driver)] = [0, 0, 0]
+                s[0] += count
+                s[1] += minutes
+                s[2] += pay
+            self._views[period] = view
+        return view
+
+    def _load_archived(self, start, end):
+        """조회 범위에 걸친 보관 달을 처음 한 번만 읽어 합계에 더한다"""
+        if self.archive is None:
+            return
+        lo, hi = (start or "")[:7], (end or "\uffff")[:7]
+        for month in self.archive.months():
+            if lo <= month <= hi and month not in self._archived:
+                self._archived.add(month)
+                for r in self.archive.load(month):
+                    self.add_record(r)
+
+    def rows(self, period, start=None, end=None):
+        """(기간, 기사, 건수, 플레이 분, 정산금액) 을 최근 기간부터, 같은 기간은 기사 이름순으로"""
+        lo = period_key(start, period) if start else ""
+        hi = period_key(end, period) if end else "\uffff"
+        # 범위 끝의 주는 end 뒤의 날짜까지 포함하므로 그 주가 끝나는 달까지 읽는다
+        last = end
+        if end and period == "week":
+            last = (date.fromisoformat(hi) + timedelta(days=6)).isoformat()
+        self._load_archived(lo, last)
+        rows = [(key, driver, count, minutes, pay)
+                for (key, driver), (count, minutes, pay) in self._view(period).items()
+                if lo <= key <= hi]
+        rows.sort(key=lambda r: r[1])
+        rows.sort(key=lambda r: r[0], reverse=True)
+        return rows
+
+    def totals(self, start=None, end=None):
+        """기간 안의 기사별 (기사, 건수, 플레이 분, 정산금액), 정산금액이 큰 순"""
+        self._load_archived(start, end)
+        lo, hi = start or "", end or "\uffff"
+        sums = {}
+        for (day, driver), (count, minutes, pay) in self._days.items():
+            if lo <= day <= hi:
+                s = sums.setdefault(driver, [0, 0, 0])
+                s[0] += count
+                s[1] += minutes
+                s[2] += pay
+        return sorted(((driver, *s) for driver, s in sums.items()), key=lambda t: -t[3])
+
+
+def export_settlement_csv(filepath, rows, period):
+    """정산 표를 엑셀에서 바로 열리는 CSV(UTF-8 BOM)로 저장한다"""
+    with open(filepath, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["기간", "기사", "건수", "플레이(분)", "플레이 시간", "정산금액"])
+        for key, driver, count, minutes, pay in rows:
+            writer.writerow([period_label(key, period), driver, count, minutes,
+                             format_time(minutes / 60), pay])
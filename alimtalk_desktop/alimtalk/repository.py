@@ -0,0 +1,301 @@
+"""고객·차감 기록·기사·설정 저장소. 화면과 명령줄 도구가 함께 쓴다"""
+
+import os
+from datetime import datetime
+
+from .columns import RecordColumns
+from .config import (ARCHIVE_DIR, CUSTOMERS_FILE, DEFAULT_SETTINGS, DRIVERS_FILE,
+                     JOURNAL_COMPACT_EVERY, JOURNAL_FILE, LEDGER_FILE, RECORDS_FILE,
+                     SETTINGS_FILE, TEMPLATES_FILE, log)
+from .index import EntityIndex, SearchIndex
+from .ledger import Ledger
+from .messages import TemplateRegistry
+from .models import Customer, Driver, Record
+from .records import RecordArchive, RecordPager, archive_cutoff, sort_records_by_created
+from .reports import DashboardStats, Settlement
+from .storage import (DataDirLock, PersistenceWorker, RecordJournal, load_json, load_json_array,
+                      open_store, save_json)
+from .util import customer_label, driver_label, generate_id
+
+
+class Repository:
+    """데이터 파일을 읽고, 바꾼 내용을 색인·집계·저널에 함께 반영한다.
+
+    바꾸는 메서드는 저널 항목을 돌려주고 commit() 으로 한꺼번에 기록한다.
+    화면을 다시 그리는 일은 부르는 쪽이 맡는다.
+
+    열어 두는 동안 데이터 폴더를 잠가서 다른 프로세스가 같은 폴더를 바꾸지 못하게 한다.
+    read_only 로 열면 잠그지 않는 대신 보관·압축·원장 저장을 하지 않아 파일을 전혀 쓰지 않는다.
+    """
+
+    DEFAULT_DRIVERS = [
+        {"id": "d1", "name": "기사A", "hourly_rate": 5000},
+        {"id": "d2", "name": "기사B", "hourly_rate": 6000},
+    ]
+
+    def __init__(self, persist=None, read_only=False):
+        # 저장은 백그라운드 스레드에서
+        self.persist = persist or PersistenceWorker()
+        self.read_only = read_only
+        self.lock = None if read_only else DataDirLock()
+        self.ledger_mismatches = []
+
+    # ─── 불러오기 ───
+    def load(self):
+        """데이터 파일을 읽고 색인을 만든다. 위젯을 건드리지 않으므로 백그라운드 스레드에서 불러도 된다.
+
+        다른 프로세스가 데이터 폴더를 잠그고 있으면 DataLockedError.
+        """
+        if self.lock:
+            self.lock.acquire()
+        try:
+            return self._load()
+        except BaseException:
+            if self.lock:
+                self.lock.release()
+            raise
+
+    def _load(self):
+        # 큰 기록 파일은 원소 단위로 읽고, 깨진 원소가 있으면 건너뛰고 나머지를 살린다
+        damaged = []
+        self.customers = load_json_array(CUSTOMERS_FILE, [], damaged, Customer.from_dict)
+        self.records = load_json_array(RECORDS_FILE, [], damaged, Record.from_dict)
+        self.drivers = [Driver.from_dict(d) for d in load_json(DRIVERS_FILE, self.DEFAULT_DRIVERS)]
+        self.settings = load_json(SETTINGS_FILE, DEFAULT_SETTINGS.copy())
+        self.templates = TemplateRegistry(TEMPLATES_FILE)
+
+        # 마지막 스냅샷 이후의 변경 적용
+        self.journal = RecordJournal(JOURNAL_FILE, worker=self.persist)
+        self.journal.replay(self.customers, self.records)
+        if damaged and not self.read_only:
+            # 살린 내용으로 파일을 다시 써 둔다. 깨진 파일은 백업 세대로 남는다
+            self.journal.compact(self.customers, self.records, force=True)
+
+        # 오래된 기록은 월별 보관 파일로 옮기고 최근 기록만 메모리에 둔다
+        sort_records_by_created(self.records)
+        adjustments = load_json_array(LEDGER_FILE, [])
+        self.archive = RecordArchive(ARCHIVE_DIR)
+        if not self.read_only:
+            self._archive_old_records(adjustments)
+
+        # 시간 원장: 구매·차감·보정 내역으로 잔액을 구하고 고객 정보와 맞춘다
+        self.ledger = Ledger(adjustments, self.records)
+        self._ledger_saved = len(self.ledger.adjustments)
+        self.ledger_mismatches = self.ledger.reconcile(self.customers)
+        if not self.read_only:
+            self.save_ledger(changed_only=True)
+
+        # 선택·검색용 색인
+        self.customer_index = EntityIndex(self.customers, customer_label)
+        self.driver_index = EntityIndex(self.drivers, driver_label)
+        self.customer_search = SearchIndex(self.customers)
+        self.stats = DashboardStats(self.customers, self.records)
+        self.settlement = Settlement(self.records, self.archive)
+        # 열 단위 사본은 집계를 처음 할 때 만든다 (columns 참고)
+        self._columns = None
+        self.records_by_id = {r.id: r for r in self.records}
+        self.record_pager = RecordPager(self.records, open_store())
+        return self
+
+    @property
+    def columns(self):
+        """기간·기사·고객별 집계를 배열 연산으로 하는 열 단위 사본.
+
+        화면 프로그램은 쓰지 않으므로 시작할 때 만들지 않고 처음 부를 때 한 번 만든다.
+        """
+        if self._columns is None:
+            self._columns = RecordColumns(self.records)
+        return self._columns
+
+    def _archive_old_records(self, adjustments):
+        """보관 기준보다 오래되고 발송이 끝난 기록을 보관 파일로 옮긴다.
+
+        원장에는 보관한 차감을 고객·월별 합계 한 건씩으로 남겨서 잔액이 그대로 유지된다.
+        """
+        months = int(self.settings.get("archive_months", DEFAULT_SETTINGS["archive_months"]) or 0)
+        if months <= 0:
+            return
+        cutoff = archive_cutoff(months)
+        old = [r for r in self.records
+               if getattr(r, "message_sent", False) and getattr(r, "date", "") < cutoff]
+        if not old:
+            return
+
+        # 보관 파일 → 원장 → 기록 순으로 쓴다. 중간에 꺼져도 다시 실행하면 이미 보관된 기록은
+        # 원장에 두 번 들어가지 않고, 어긋난 잔액은 시작할 때 reconcile 이 보정한다
+        added = self.archive.add(old)
+        sums = {}
+        for r in added:
+            s = sums.setdefault((r["customer_id"], r["date"][:7]), [0, ""])
+            s[0] += getattr(r, "minutes", 0)
+            s[1] = max(s[1], r.get("created_at", ""))
+        for (customer_id, month), (minutes, at) in sums.items():
+            adjustments.append({"id": generate_id(), "customer_id": customer_id, "kind": "archived",
+                                "minutes": minutes, "at": at, "note": f"{month} 보관"})
+        if sums:
+            save_json(LEDGER_FILE, adjustments)
+
+        ids = {r.id for r in old}
+        self.records[:] = [r for r in self.records if r.id not in ids]
+        store = open_store()
+        if store:
+            store.delete_records(ids)
+        self.journal.compact(self.customers, self.records, force=True)
+        log.info("기록 %d건을 보관 파일로 옮겼습니다 (%s 이전)", len(old), cutoff)
+
+    # ─── 고객 ───
+    def save_customer(self, data, total_minutes, used_minutes, customer_id=None):
+        """고객을 새로 만들거나 customer_id 의 정보를 바꾸고 (고객, 저널 항목) 을 돌려준다.
+
+        시간은 원장의 구매·보정 내역으로 남긴다. 없는 id 면 (None, None).
+        """
+        if customer_id:
+            c = self.customer_index.get(customer_id)
+            if not c:
+                return None, None
+            c.update(data)
+            self.adjust_hours(c, total_minutes, used_minutes)
+            self.customer_index.update(c)
+            self.customer_search.update(c)
+        else:
+            c = Customer.from_dict(dict(data, id=generate_id(), created_at=datetime.now().isoformat()))
+            self.adjust_hours(c, total_minutes, used_minutes)
+            self.customers.append(c)
+            self.customer_index.add(c)
+            self.customer_search.add(c)
+        self.stats.set_customer(c)
+        return c, {"op": "customer", "customer": c}
+
+    def adjust_hours(self, customer, total_minutes, used_minutes):
+        """직접 입력한 시간을 원장의 구매·보정 내역으로 남기고 고객 정보에 반영한다.
+
+        원장 파일은 commit() 에서 한 번에 저장한다.
+        """
+        purchased, used = self.ledger.balance(customer["id"])
+        self.ledger.adjust(customer["id"], "purchase", total_minutes - purchased, "고객 정보 수정")
+        self.ledger.adjust(customer["id"], "correction", used_minutes - used, "고객 정보 수정")
+        # 0/0 으로 등록한 고객도 기초 잔액을 잡은 것으로 남긴다
+        self.ledger.mark_opened(customer["id"], "고객 등록", at=customer.get("created_at", ""))
+        self.ledger.apply_to(customer)
+
+    def delete_customer(self, customer_id):
+        self.customers[:] = [c for c in self.customers if c["id"] != customer_id]
+        self.customer_index.remove(customer_id)
+        self.customer_search.remove(customer_id)
+        self.stats.remove_customer(customer_id)
+        return {"op": "customer_deleted", "id": customer_id}
+
+    # ─── 차감 기록 ───
+    def add_record(self, record, customer):
+        """차감 기록을 넣고 원장에서 분 단위로 더한 사용 시간을 고객 정보에 반영한다"""
+        self.records.append(record)
+        self.records_by_id[record["id"]] = record
+        self.stats.add_record(record)
+        self.settlement.add_record(record)
+        if self._columns is not None:
+            self._columns.append(record)
+        self.ledger.add_deduction(record)
+        self.ledger.apply_to(customer)
+        self.customer_index.update(customer)
+        self.stats.set_customer(customer)
+        return [
+            {"op": "record", "record": record.to_dict()},
+            {"op": "used_hours", "id": customer["id"], "value": customer["used_hours"]},
+        ]
+
+    def mark_sent(self, record):
+        r = self.records_by_id.get(record["id"])
+        if r:
+            r["message_sent"] = True
+        record["message_sent"] = True
+        self.stats.mark_sent(record["id"])
+        return {"op": "sent", "id": record["id"]}
+
+    def unsent_records(self):
+        return [r for r in self.records if not getattr(r, "message_sent", False)]
+
+    # ─── 기사 ───
+    def save_driver(self, name, hourly_rate, driver_id=None):
+        if driver_id:
+            d = self.driver_index.get(driver_id)
+            if not d:
+                return None
+            d["name"] = name
+            d["hourly_rate"] = hourly_rate
+            self.driver_index.update(d)
+        else:
+            d = Driver.from_dict({"id": generate_id(), "name": name, "hourly_rate": hourly_rate})
+            self.drivers.append(d)
+            self.driver_index.add(d)
+        self.save_drivers()
+        return d
+
+    def delete_driver(self, driver_id):
+        self.drivers[:] = [d for d in self.drivers if d["id"] != driver_id]
+        self.driver_index.remove(driver_id)
+        self.save_drivers()
+
+    def save_drivers(self):
+        # 저장 스레드가 인코딩하는 동안 화면이 목록을 바꿀 수 있으므로 지금 내용을 복사해 넘긴다
+        snapshot = [d.to_dict() for d in self.drivers]
+        self.persist.save(DRIVERS_FILE, lambda: snapshot)
+
+    # ─── 설정 ───
+    def save_settings(self):
+        snapshot = dict(self.settings)
+        self.persist.save(SETTINGS_FILE, lambda: snapshot)
+
+    def reset_settings(self):
+        # 메시지 렌더러가 같은 dict 를 보고 있으므로 그 자리에서 바꾼다
+        self.settings.clear()
+        self.settings.update(DEFAULT_SETTINGS)
+        self.save_settings()
+
+    def save_ledger(self, changed_only=False):
+        """원장 내역을 저장한다. changed_only 면 마지막 저장 이후 늘어난 내역이 있을 때만"""
+        if changed_only and len(self.ledger.adjustments) == self._ledger_saved:
+            return
+        # 내역 항목은 추가만 되고 바뀌지 않으므로 목록만 복사하면 된다
+        snapshot = list(self.ledger.adjustments)
+        self._ledger_saved = len(snapshot)
+        self.persist.save(LEDGER_FILE, lambda: snapshot)
+
+    # ─── 저장 ───
+    def commit(self, entries):
+        """저널 항목을 기록한다. 여러 건이면 한 줄로 묶어서 모두 적용되거나 모두 빠지게 한다.
+
+        고객 시간을 고치며 쌓인 원장 내역도 여기서 한 번만 저장한다.
+        """
+        if self.read_only:
+            raise RuntimeError("읽기 전용으로 연 저장소에는 기록할 수 없습니다")
+        if len(entries) == 1:
+            fields = dict(entries[0])
+            self.journal.append(fields.pop("op"), **fields)
+        elif entries:
+            self.journal.append_batch(entries)
+        self.save_ledger(changed_only=True)
+        self.record_pager.invalidate()
+        self.maybe_compact()
+
+    def maybe_compact(self):
+        if self.journal.pending >= JOURNAL_COMPACT_EVERY:
+            self.journal.compact(self.customers, self.records, background=True)
+
+    def close(self):
+        """쌓인 저널을 스냅샷에 합치고 남은 저장을 마친다. 저장에 실패한 파일 이름 목록을 돌려준다"""
+        if self.read_only:
+            self.release()
+            return []
+        try:
+            self.journal.compact(self.customers, self.records)
+            self.journal.close()
+            self.persist.stop()
+        finally:
+            self.lock.release()
+        return sorted({os.path.basename(key) for key, _ in self.persist.errors})
+
+    def release(self):
+        """저널을 합치지 않고 남은 저장만 마친 뒤 잠금을 푼다 (읽기만 했거나 불러오다 실패했을 때)"""
+        self.persist.stop()
+        if self.lock:
+            self.lock.release()
@@ -0,0 +1,84 @@
+"""시간 차감 처리"""
+
+from datetime import date, datetime
+
+from .models import Record
+from .util import from_minutes, generate_id, pay_for, to_minutes
+
+
+class DeductionService:
+    """차감 기록을 만들고 저장소에 반영한다. 메시지는 차감 전의 고객 시간으로 만든다"""
+
+    def __init__(self, repo, renderer):
+        self.repo = repo
+        self.renderer = renderer
+
+    @staticmethod
+    def validate(customer, driver, play_hours):
+        """입력 오류 문구를 돌려준다. 문제가 없으면 None"""
+        if not customer:
+            return "고객을 선택해주세요"
+        if not driver:
+            return "기사를 선택해주세요"
+        if play_hours <= 0:
+            return "플레이 시간을 입력해주세요"
+        return None
+
+    def build(self, customer, driver, play_hours, day=None):
+        """차감 한 건의 (기록, 메시지) 를 만든다. 저장소는 건드리지 않는다"""
+        day = day or date.today().isoformat()
+        # 시간은 분 단위 정수로 계산한다
+        minutes = to_minutes(play_hours)
+        play_hours = from_minutes(minutes)
+        template = self.renderer.template()
+        values = self.renderer.values(customer, play_hours, driver, day)
+        msg = template.render(values)
+        used_before = to_minutes(customer.get("used_hours", 0))
+        total = to_minutes(customer["total_hours"])
+        record = Record.from_dict({
+            "id": generate_id(),
+            "customer_id": customer["id"],
+            "customer_name": customer["name"],
+            "driver_name": driver["name"],
+            "play_hours": play_hours,
+            "hourly_rate": driver["hourly_rate"],
+            "total_pay": pay_for(minutes, driver["hourly_rate"]),
+            "date": day,
+            "message_sent": False,
+            "created_at": datetime.now().isoformat(),
+            # 나중에 다시 복사해도 그때의 메시지가 나오도록 차감 당시 값을 남긴다
+            "used_before": from_minutes(used_before),
+            "used_after": from_minutes(used_before + minutes),
+            "remaining_after": from_minutes(total - used_before - minutes),
+            "message": {"template": self.renderer.templates.intern(template.text),
+                        "values": template.snapshot(values)},
+        })
+        return record, msg
+
+    def deduct(self, items, day=None):
+        """(고객, 기사, 시간) 목록을 모두 반영한 뒤 저널 한 줄로 함께 기록한다.
+
+        모든 건을 검사하고 기록과 메시지를 다 만든 다음에 저장소에 반영하므로,
+        중간에 실패하면 (잘못된 입력은 ValueError) 아무 건도 반영되지 않는다.
+        [(기록, 메시지), ...] 를 돌려준다.
+        """
+        for n, (customer, driver, play_hours) in enumerate(items, 1):
+            error = self.validate(customer, driver, play_hours)
+            if error:
+                raise ValueError(f"{n}번째 차감: {error}")
+
+        # 같은 고객이 여러 번 나오면 앞 건을 차감한 뒤의 사용 시간으로 메시지를 만든다
+        used_after = {}
+        results = []
+        for customer, driver, play_hours in items:
+            used = used_after.get(customer["id"])
+            before = customer if used is None else dict(customer, used_hours=used)
+            record, msg = self.build(before, driver, play_hours, day)
+            used_after[customer["id"]] = record["used_after"]
+            results.append((record, msg))
+
+        entries = []
+        for (customer, _, _), (record, _) in zip(items, results):
+            entries.extend(self.repo.add_record(record, customer))
+        self.repo.commit(entries)
+        return results
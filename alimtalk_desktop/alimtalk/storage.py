@@ -0,0 +1,889 @@
+"""JSON 파일 저장, 백그라운드 저장, 변경 저널, SQLite 저장소"""
+
+import gc
+import itertools
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+from .config import (BACKUP_GENERATIONS, CUSTOMERS_FILE, DATA_DIR, DB_FILE, DRIVERS_FILE,
+                     JOURNAL_FILE, LOCK_FILE, RECORDS_FILE, RECOVERED_FILES, SETTINGS_FILE, log)
+from .metrics import timed
+from .models import Customer, Record, json_default
+
+
+# ─── 유틸리티 함수 ───
+def ensure_data_dir():
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+
+def backup_path(filepath, generation):
+    return f"{filepath}.{generation}"
+
+@timed()
+def load_json(filepath, default):
+    store = open_store()
+    if store and store.handles(filepath):
+        return store.load(filepath, default)
+    candidates = [filepath] + [backup_path(filepath, g) for g in range(1, BACKUP_GENERATIONS + 1)]
+    for path in candidates:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("%s 을(를) 읽지 못했습니다: %s", path, e)
+            continue
+        _note_recovery(filepath, path)
+        return data
+    return default
+
+def _note_recovery(filepath, path, errors=()):
+    """백업에서 읽었거나 깨진 부분을 건너뛰었으면 시작 화면에서 알릴 수 있게 남긴다"""
+    name = os.path.basename(filepath)
+    if path != filepath:
+        log.warning("%s 대신 백업 %s 에서 복구했습니다", filepath, path)
+        RECOVERED_FILES.append(f"{name} (백업에서 불러옴)")
+    if errors:
+        log.warning("%s 에서 손상된 부분 %d곳을 건너뛰었습니다", path, len(errors))
+        RECOVERED_FILES.append(f"{name} (손상된 부분 {len(errors)}곳 건너뜀)")
+
+def dump_json(data):
+    # 한 번에 문자열로 만들어야 C 인코더가 쓰여서 빠르다
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+@timed()
+def save_json(filepath, data):
+    store = open_store()
+    if store and store.handles(filepath):
+        store.save(filepath, data)
+        return
+    write_text_atomic(filepath, dump_json(data))
+
+def write_text_atomic(filepath, text):
+    write_bytes_atomic(filepath, text.encode("utf-8"))
+
+def write_bytes_atomic(filepath, data):
+    """임시 파일에 쓰고 fsync 한 뒤 이름을 바꿔서, 쓰는 도중 꺼져도 원본이 깨지지 않게 한다"""
+    ensure_data_dir()
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath),
+                                    prefix=os.path.basename(filepath) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _rotate_backups(filepath)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(os.path.dirname(filepath))
+
+def _rotate_backups(filepath):
+    if not os.path.exists(filepath):
+        return
+    for g in range(BACKUP_GENERATIONS - 1, 0, -1):
+        older = backup_path(filepath, g)
+        if os.path.exists(older):
+            os.replace(older, backup_path(filepath, g + 1))
+    os.replace(filepath, backup_path(filepath, 1))
+
+def _fsync_dir(dirpath):
+    # 이름 바꾸기까지 디스크에 남기려면 디렉터리도 fsync 해야 한다 (Windows 는 지원하지 않음)
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(dirpath, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def export_json(filepath, data):
+    """사람이 읽기 좋게 들여쓰기 한 사본을 내보낸다 (저장소 파일은 압축 형식)"""
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
+
+def export_json_array(filepath, items):
+    """export_json 과 같은 모양으로, 목록을 한꺼번에 만들지 않고 원소를 하나씩 써 내려간다"""
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write("[")
+        count = 0
+        for item in items:
+            f.write(",\n  " if count else "\n  ")
+            f.write(json.dumps(item, ensure_ascii=False, indent=2, default=json_default)
+                    .replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+# ─── 배열 스트리밍 읽기 ───
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# 깨진 원소 뒤에서 다음 원소가 시작할 만한 자리
+_NEXT_ELEMENT = re.compile(r",[ \t\n\r]*(?=[{\[])")
+_BOUNDARY = re.compile(r"[}\]][ \t\n\r]*(,)[ \t\n\r]*[{\[]")
+
+
+def _shape(item):
+    # 종류와 첫 키. 기록·고객은 언제나 "id" 로 시작한다
+    return type(item), next(iter(item), None) if isinstance(item, dict) else None
+
+
+def iter_json_array(f, errors=None, chunk_size=1 << 20, max_element=1 << 22):
+    """텍스트 파일 f 의 최상위 JSON 배열을 원소 하나씩 돌려준다.
+
+    파일을 chunk_size 글자씩 읽어 json 의 raw_decode 로 원소를 하나씩 풀기 때문에
+    파일 전체 문자열을 한꺼번에 들고 있지 않는다. 들여쓰기 한 파일도 읽는다.
+    중간이나 끝이 깨진 원소는 (그 앞까지 읽은 원소 수, 글자 위치, 오류) 를 errors 에 넣고
+    다음 원소부터 이어서 읽는다. 배열로 시작하지 않으면 ValueError.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    base = 0  # buf[0] 의 파일 안 글자 위치
+    eof = False
+
+    def more():
+        nonlocal buf, pos, base, eof
+        if eof:
+            return False
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        # 이미 읽은 앞부분은 버려서 버퍼가 chunk_size 남짓으로 유지되게 한다
+        base += pos
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or not more():
+                return
+
+    def report(index, message):
+        if errors is not None:
+            errors.append((index, base + pos, message))
+        log.warning("JSON 배열 %d번째 원소 근처 (글자 위치 %d): %s", index + 1, base + pos, message)
+
+    def find_next_element():
+        # 깨진 부분을 건너뛰고 다음 원소 후보의 시작으로 간다. 없으면 False
+        nonlocal pos
+        while True:
+            m = _NEXT_ELEMENT.search(buf, pos)
+            if m:
+                pos = m.end()
+                return True
+            # 버퍼 끝에 걸친 쉼표는 다음 조각과 이어서 다시 찾는다
+            last = buf.rfind(",", pos)
+            pos = last if last >= 0 else len(buf)
+            if not more():
+                return False
+
+    def last_boundary():
+        # 버퍼 끝부분에서 마지막 "}, {" 꼴 쉼표. 원소 사이 경계일 가능성이 높다. 없으면 -1
+        cut = -1
+        for m in _BOUNDARY.finditer(buf, max(pos, len(buf) - (1 << 16))):
+            cut = m.start(1)
+        return cut
+
+    skip_whitespace()
+    if buf[pos:pos + 1] != "[":
+        raise ValueError("JSON 배열이 아닙니다")
+    pos += 1
+    skip_whitespace()
+    if buf[pos:pos + 1] == "]":
+        return
+
+    index = 0
+    skipping = False  # 깨진 부분 뒤에서 다음 원소를 찾는 중
+    batch_from = 0  # 묶음 읽기가 실패한 구간은 이 위치까지 한 원소씩 읽는다
+    shape = None  # 첫 원소의 모양. 깨진 부분 뒤에서는 같은 모양의 원소부터 다시 받는다
+    while True:
+        # 버퍼에 든 원소를 한 번에 푼다. decode 한 번 안에서는 같은 키 문자열을 함께 써서
+        # 원소마다 키를 새로 만드는 것보다 빠르고 메모리가 덜 든다
+        if not skipping and base + pos >= batch_from:
+            cut = last_boundary()
+            if cut > pos:
+                try:
+                    items = decoder.decode("[" + buf[pos:cut] + "]")
+                except ValueError:
+                    # 경계를 잘못 짚었거나 깨진 부분이 있다
+                    batch_from = base + cut
+                else:
+                    yield from items
+                    index += len(items)
+                    if items and shape is None:
+                        shape = _shape(items[0])
+                    pos = cut + 1
+                    skip_whitespace()
+                    continue
+
+        # 원소 하나. 조각 끝에서 잘렸으면 더 읽어서 다시 푼다
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError as e:
+                if not eof and len(buf) - pos <= max_element and more():
+                    continue
+                if not skipping:
+                    report(index, e.msg if isinstance(e, json.JSONDecodeError) else str(e))
+                    skipping = True
+                item = end = None
+                break
+            # 숫자는 조각 끝에서 잘려도 앞부분만으로 풀리므로 뒤에 구분 글자가 올 때까지 더 읽는다
+            if (end == len(buf) or (not isinstance(item, (dict, list, str))
+                                    and buf[end] not in " \t\n\r,]")) and more():
+                continue
+            break
+        if end is None:
+            if not find_next_element():
+                return
+            continue
+        if skipping and shape is not None and _shape(item) != shape:
+            # 깨진 원소 안쪽의 값에 걸렸다
+            if not find_next_element():
+                return
+            continue
+
+        pos = end
+        skip_whitespace()
+        sep = buf[pos:pos + 1]
+        if sep == ",":
+            yield item
+            index += 1
+            skipping = False
+            shape = shape or _shape(item)
+            pos += 1
+            skip_whitespace()
+            if buf[pos:pos + 1] == "]":
+                return
+        elif sep == "]":
+            if skipping:
+                # 뒤에 글자가 더 있으면 최상위 배열이 아니라 깨진 원소 안쪽 배열의 끝이다
+                pos += 1
+                skip_whitespace()
+                if pos < len(buf):
+                    if not find_next_element():
+                        return
+                    continue
+            yield item
+            return
+        elif not sep:
+            yield item
+            report(index + 1, "파일 끝에 닫는 ] 가 없습니다")
+            return
+        else:
+            # 원소 뒤에 알 수 없는 글자: 이 원소까지 믿을 수 없으므로 버린다
+            if not skipping:
+                report(index, f"원소 뒤에 {sep!r} 가 있습니다")
+                skipping = True
+            if not find_next_element():
+                return
+
+
+def _iter_json_file(path, errors):
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_json_array(f, errors)
+
+
+def open_json_array(filepath):
+    """원본과 백업 세대 중 배열로 읽히는 첫 파일을 연다.
+
+    (읽은 경로, 원소 반복자, 건너뛴 부분 목록) 을 돌려준다. 목록은 반복자를 끝까지 읽어야 다 찬다.
+    읽을 파일이 없으면 (None, None, []).
+    """
+    candidates = [filepath] + [backup_path(filepath, g) for g in range(1, BACKUP_GENERATIONS + 1)]
+    for path in candidates:
+        if not os.path.exists(path):
+            continue
+        errors = []
+        items = _iter_json_file(path, errors)
+        try:
+            first = next(items)
+        except StopIteration:
+            if errors:
+                # 원소를 하나도 살리지 못했으면 백업을 본다
+                log.warning("%s 에서 읽을 수 있는 원소가 없습니다", path)
+                continue
+            return path, iter(()), errors
+        except (OSError, ValueError) as e:
+            log.warning("%s 을(를) 읽지 못했습니다: %s", path, e)
+            continue
+        return path, itertools.chain([first], items), errors
+    return None, None, []
+
+@timed()
+def load_json_array(filepath, default, errors=None, factory=None):
+    """최상위가 배열인 파일을 load_json 처럼 읽되 원소 단위로 읽는다.
+
+    깨진 원소는 건너뛰고 나머지를 살린다. errors 를 주면 건너뛴 부분을 거기에 더한다.
+    factory 를 주면 원소를 읽는 대로 factory(원소) 로 바꿔 담는다 (Record.from_dict 등).
+    """
+    store = open_store()
+    if store and store.handles(filepath):
+        data = store.load(filepath, default)
+        return [factory(item) for item in data] if factory and data is not default else data
+    path, items, found = open_json_array(filepath)
+    if items is None:
+        return default
+    # 오래 남을 객체를 한꺼번에 만드는 동안 순환 GC 가 쌓인 목록을 거듭 훑지 않게 잠시 멈춘다
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        data = list(map(factory, items) if factory else items)
+    finally:
+        if collecting:
+            gc.enable()
+    _note_recovery(filepath, path, found)
+    if errors is not None:
+        errors.extend(found)
+    return data
+
+
+# ─── 데이터 폴더 잠금 ───
+class DataLockedError(Exception):
+    """다른 화면 프로그램이나 명령줄 도구가 데이터 폴더를 쓰고 있다"""
+
+
+class DataDirLock:
+    """데이터 폴더를 바꾸는 프로세스를 하나로 제한하는 잠금.
+
+    잠금 파일에 운영체제 잠금을 걸어 두므로 프로그램이 비정상 종료되어도 잠금이 남지 않는다.
+    """
+
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self._fp = None
+
+    def acquire(self):
+        if self._fp is not None:
+            return self
+        ensure_data_dir()
+        fp = open(self.path, "a+")
+        try:
+            fp.seek(0)
+            if os.name == "nt":
+                msvcrt.locking(fp.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fp.close()
+            raise DataLockedError(
+                "다른 알림톡 관리 프로그램이나 명령줄 도구가 이 데이터 폴더를 쓰고 있습니다.\n"
+                f"그 프로그램을 종료한 뒤 다시 실행해주세요. ({DATA_DIR})") from None
+        self._fp = fp
+        return self
+
+    def release(self):
+        if self._fp is None:
+            return
+        try:
+            if os.name == "nt":
+                self._fp.seek(0)
+                msvcrt.locking(self._fp.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# ─── 백그라운드 저장 ───
+class PersistenceWorker:
+    """저장 작업을 UI 스레드 밖에서 처리한다.
+
+    같은 대상에 대한 저장 요청은 delay 동안 모아서 마지막 것 한 번만 쓰고,
+    마지막으로 쓴 내용과 같으면 파일을 건드리지 않는다.
+    """
+
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.errors = []
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._busy = False
+        self._urgent = False
+        self._stopping = False
+        self._saved = {}
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def save(self, filepath, provider):
+        """filepath 를 변경됨으로 표시한다.
+
+        provider 는 저장 스레드에서 불리므로, 부르는 쪽이 미리 떠 둔 사본처럼 그동안 바뀌지 않는 데이터를 돌려줘야 한다.
+        """
+        self.submit(filepath, lambda: self._write_json(filepath, provider()))
+
+    def submit(self, key, job):
+        with self._cond:
+            self._pending[key] = job
+            self._cond.notify_all()
+
+    def flush(self):
+        """대기 중인 저장이 모두 끝날 때까지 기다린다"""
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: not self._pending and not self._busy)
+            self._urgent = False
+
+    def stop(self):
+        self.flush()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if self._stopping and not self._pending:
+                    return
+                # 연달아 들어오는 변경을 모은다 (flush 중이면 바로 진행)
+                deadline = time.monotonic() + self.delay
+                while not self._urgent and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                jobs, self._pending = self._pending, {}
+                self._busy = True
+            for key, job in jobs.items():
+                try:
+                    job()
+                except Exception as e:
+                    log.exception("%s 저장 실패", key)
+                    self.errors.append((key, e))
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    @timed("save_json (백그라운드)")
+    def _write_json(self, filepath, data):
+        # 모델은 인코딩 중에 파이썬 to_dict 를 불러서 그 사이 UI 스레드가 돌 수 있다.
+        # 그래서 data 는 UI 스레드가 바꾸지 않는 사본이어야 한다 (PersistenceWorker.save 참고)
+        text = dump_json(data)
+        digest = hash(text)
+        if self._saved.get(filepath) == digest:
+            return
+        store = open_store()
+        if store and store.handles(filepath):
+            store.save(filepath, data)
+        else:
+            write_text_atomic(filepath, text)
+        self._saved[filepath] = digest
+
+
+# ─── 변경 저널 ───
+class RecordJournal:
+    """차감 기록과 고객 시간 변경을 한 줄씩 덧붙이는 추가 전용 로그.
+
+    차감 한 건의 저장 비용이 전체 기록 크기와 무관하게 일정하도록
+    records.json / customers.json 은 압축(compact) 시점에만 다시 쓴다.
+    """
+
+    def __init__(self, path, worker=None):
+        self.path = path
+        self.old_path = path + ".old"
+        self.pending = 0
+        # worker 가 있으면 fsync 와 스냅샷 쓰기를 그쪽에 맡긴다
+        self.worker = worker
+        self._lock = threading.Lock()
+        self._fp = None
+
+    def append(self, op, **fields):
+        store = open_store()
+        if store:
+            # SQLite 는 한 행씩 바로 반영하므로 로그가 필요 없다
+            store.apply(op, fields)
+            return
+        line = dump_json(dict(fields, op=op)) + "\n"
+        with self._lock:
+            if self._fp is None:
+                ensure_data_dir()
+                self._fp = open(self.path, "a", encoding="utf-8")
+            self._fp.write(line)
+            self._fp.flush()
+        self.pending += 1
+        if self.worker:
+            # 몰려 들어온 줄은 fsync 한 번으로 함께 디스크에 내린다
+            self.worker.submit(self.path, self._sync)
+        else:
+            self._sync()
+
+    def append_batch(self, entries):
+        """여러 변경을 한 줄로 기록해서, 다시 읽을 때 모두 적용되거나 모두 빠지게 한다"""
+        self.append("batch", entries=entries)
+
+    def _sync(self):
+        with self._lock:
+            if self._fp is not None:
+                os.fsync(self._fp.fileno())
+
+    def entries(self):
+        """마지막 스냅샷 이후에 기록된 항목을 순서대로 돌려준다"""
+        for path in (self.old_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # 기록 도중 끊긴 마지막 줄
+                        continue
+
+    def replay(self, customers, records):
+        """마지막 스냅샷 이후의 변경을 메모리 데이터에 다시 적용한다"""
+        customers_by_id = {c["id"]: c for c in customers}
+        records_by_id = {r["id"]: r for r in records}
+        applied = 0
+        for entry in self.entries():
+            self._apply(entry, customers, records, customers_by_id, records_by_id)
+            applied += 1
+        self.pending = applied
+        return applied
+
+    def _apply(self, entry, customers, records, customers_by_id, records_by_id):
+        op = entry.get("op")
+        if op == "batch":
+            for sub in entry["entries"]:
+                self._apply(sub, customers, records, customers_by_id, records_by_id)
+        elif op == "record":
+            record = entry["record"]
+            if record["id"] not in records_by_id:
+                record = Record.from_dict(record)
+                records.append(record)
+                records_by_id[record["id"]] = record
+        elif op == "sent":
+            record = records_by_id.get(entry["id"])
+            if record:
+                record["message_sent"] = True
+        elif op == "used_hours":
+            customer = customers_by_id.get(entry["id"])
+            if customer:
+                customer["used_hours"] = entry["value"]
+        elif op == "customer":
+            data = entry["customer"]
+            customer = customers_by_id.get(data["id"])
+            if customer:
+                customer.update(data)
+            else:
+                customer = Customer.from_dict(data)
+                customers.append(customer)
+                customers_by_id[customer["id"]] = customer
+        elif op == "customer_deleted":
+            if customers_by_id.pop(entry["id"], None):
+                customers[:] = [c for c in customers if c["id"] != entry["id"]]
+
+    def needs_compact(self):
+        return self.pending > 0 or os.path.exists(self.old_path)
+
+    def compact(self, customers, records, background=False, force=False):
+        """쌓인 로그를 스냅샷 파일로 합친다. force 면 로그가 없어도 스냅샷을 다시 쓴다"""
+        self.wait()
+        if not force and not self.needs_compact():
+            return
+        self._rotate()
+        # 현재 시점의 목록을 잡아두고 이후 변경은 새 로그에 쌓는다.
+        # 기록은 비용 때문에 복사하지 않는다 — 도중에 바뀐 발송 여부는 새 로그에도 남아 다시 적용된다
+        customers = [c.copy() for c in customers]
+        records = list(records)
+        if background and self.worker:
+            self.worker.submit(self.old_path, lambda: self._write_snapshots(customers, records))
+        else:
+            self._write_snapshots(customers, records)
+
+    def wait(self):
+        if self.worker:
+            self.worker.flush()
+
+    def close(self):
+        self.wait()
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+    def _rotate(self):
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+        if os.path.exists(self.path):
+            if os.path.exists(self.old_path):
+                # 이전 압축이 끝나지 못했으면 이어 붙여서 함께 합친다
+                with open(self.path, "r", encoding="utf-8") as src, \
+                        open(self.old_path, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.old_path)
+        self.pending = 0
+
+    def _write_snapshots(self, customers, records):
+        save_json(CUSTOMERS_FILE, customers)
+        save_json(RECORDS_FILE, records)
+        if os.path.exists(self.old_path):
+            os.remove(self.old_path)
+
+
+# ─── SQLite 저장소 ───
+_store = None
+
+
+def open_store():
+    """DB_FILE 이 있으면 SQLite 저장소를, 없으면 None 을 돌려준다"""
+    global _store
+    if _store is None and os.path.exists(DB_FILE):
+        _store = SqliteStore(DB_FILE)
+    return _store
+
+
+class SqliteStore:
+    """load_json / save_json 뒤에서 네 가지 데이터를 SQLite 에 보관한다.
+
+    각 행은 원래 JSON 객체를 data 열에 그대로 두고, 조회에 쓰는 값만 별도 열로 뽑는다.
+    인덱스는 알림 내역 페이지 조회(RecordPager)에 쓰는 created_at 에만 건다.
+    집계·정산·원장은 여전히 메모리의 기록 목록으로 계산하므로 기록은 모두 불러온다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS customers (
+            id TEXT PRIMARY KEY, name TEXT, phone TEXT, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS records (
+            id TEXT PRIMARY KEY, customer_id TEXT, date TEXT,
+            message_sent INTEGER NOT NULL DEFAULT 0, created_at TEXT,
+            data TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_records_created_at ON records(created_at);
+        -- 예전 DB 에 남은, 조회에 쓰지 않는 인덱스는 쓰기 비용만 들므로 지운다
+        DROP INDEX IF EXISTS idx_records_customer_id;
+        DROP INDEX IF EXISTS idx_records_date;
+        DROP INDEX IF EXISTS idx_records_message_sent;
+        CREATE TABLE IF NOT EXISTS drivers (id TEXT PRIMARY KEY, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS saved_sets (name TEXT PRIMARY KEY);
+    """
+
+    TABLES = {
+        os.path.basename(CUSTOMERS_FILE): "customers",
+        os.path.basename(RECORDS_FILE): "records",
+        os.path.basename(DRIVERS_FILE): "drivers",
+        os.path.basename(SETTINGS_FILE): "settings",
+    }
+
+    def __init__(self, path):
+        self.path = path
+        # 저널 압축 스레드에서도 쓰므로 잠금으로 직렬화한다
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def handles(self, filepath):
+        return os.path.basename(filepath) in self.TABLES
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def integrity_check(self):
+        with self._lock:
+            return self.conn.execute("PRAGMA integrity_check").fetchone()[0]
+
+    # ─── load_json / save_json ───
+    def load(self, filepath, default):
+        table = self.TABLES[os.path.basename(filepath)]
+        with self._lock:
+            saved = self.conn.execute(
+                "SELECT 1 FROM saved_sets WHERE name = ?", (table,)).fetchone()
+            if not saved:
+                return default
+            if table == "settings":
+                rows = self.conn.execute("SELECT key, value FROM settings").fetchall()
+                return {k: json.loads(v) for k, v in rows}
+            if table == "records":
+                rows = self.conn.execute(
+                    "SELECT data, message_sent FROM records ORDER BY rowid").fetchall()
+                return [self._record(data, sent) for data, sent in rows]
+            rows = self.conn.execute(f"SELECT data FROM {table} ORDER BY rowid").fetchall()
+            return [json.loads(data) for (data,) in rows]
+
+    def save(self, filepath, data):
+        table = self.TABLES[os.path.basename(filepath)]
+        with self._lock, self.conn:
+            if table == "settings":
+                self.conn.execute("DELETE FROM settings")
+                self.conn.executemany(
+                    "INSERT INTO settings (key, value) VALUES (?, ?)",
+                    [(k, json.dumps(v, ensure_ascii=False)) for k, v in data.items()])
+            elif table == "records":
+                # 기록은 지우지 않으므로 덮어쓰기만 한다
+                self.conn.executemany(self._UPSERT_RECORD, [self._record_row(r) for r in data])
+            elif table == "customers":
+                self.conn.execute("DELETE FROM customers")
+                self.conn.executemany(self._UPSERT_CUSTOMER, [self._customer_row(c) for c in data])
+            else:
+                self.conn.execute("DELETE FROM drivers")
+                self.conn.executemany(
+                    "INSERT INTO drivers (id, data) VALUES (?, ?)",
+                    [(d["id"], dump_json(d)) for d in data])
+            self.conn.execute("INSERT OR IGNORE INTO saved_sets (name) VALUES (?)", (table,))
+
+    # ─── 저널 연산을 한 행씩 반영 ───
+    def apply(self, op, fields):
+        # 한 트랜잭션으로 반영하므로 batch 는 모두 들어가거나 모두 빠진다
+        with self._lock, self.conn:
+            self._apply(op, fields)
+
+    def _apply(self, op, fields):
+        if op == "batch":
+            for entry in fields["entries"]:
+                entry = dict(entry)
+                self._apply(entry.pop("op"), entry)
+        elif op == "record":
+            self.conn.execute(self._UPSERT_RECORD, self._record_row(fields["record"]))
+            self.conn.execute("INSERT OR IGNORE INTO saved_sets (name) VALUES ('records')")
+        elif op == "sent":
+            self.conn.execute(
+                "UPDATE records SET message_sent = 1 WHERE id = ?", (fields["id"],))
+        elif op == "used_hours":
+            row = self.conn.execute(
+                "SELECT data FROM customers WHERE id = ?", (fields["id"],)).fetchone()
+            if row:
+                customer = json.loads(row[0])
+                customer["used_hours"] = fields["value"]
+                self.conn.execute(self._UPSERT_CUSTOMER, self._customer_row(customer))
+        elif op == "customer":
+            self.conn.execute(self._UPSERT_CUSTOMER, self._customer_row(fields["customer"]))
+            self.conn.execute("INSERT OR IGNORE INTO saved_sets (name) VALUES ('customers')")
+        elif op == "customer_deleted":
+            self.conn.execute("DELETE FROM customers WHERE id = ?", (fields["id"],))
+
+    def delete_records(self, ids):
+        """보관 파일로 옮긴 기록을 지운다"""
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM records WHERE id = ?", [(i,) for i in ids])
+
+    # ─── 인덱스 조회 ───
+    def count_records(self, created_from=None):
+        sql = "SELECT COUNT(*) FROM records"
+        params = []
+        if created_from is not None:
+            sql += " WHERE created_at >= ?"
+            params.append(created_from)
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def recent_records(self, limit, offset=0):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT data, message_sent FROM records "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [self._record(data, sent) for data, sent in rows]
+
+    _UPSERT_RECORD = (
+        "INSERT INTO records (id, customer_id, date, message_sent, created_at, data) "
+        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+        "customer_id = excluded.customer_id, date = excluded.date, "
+        "message_sent = excluded.message_sent, created_at = excluded.created_at, "
+        "data = excluded.data")
+    _UPSERT_CUSTOMER = (
+        "INSERT INTO customers (id, name, phone, data) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+        "phone = excluded.phone, data = excluded.data")
+
+    @staticmethod
+    def _record(data, sent):
+        record = json.loads(data)
+        record["message_sent"] = bool(sent)
+        return record
+
+    @staticmethod
+    def _record_row(r):
+        return (r["id"], r.get("customer_id"), r.get("date"),
+                int(bool(r.get("message_sent", False))), r.get("created_at"),
+                dump_json(r))
+
+    @staticmethod
+    def _customer_row(c):
+        return (c["id"], c.get("name"), c.get("phone"), dump_json(c))
+
+
+def migrate_json_to_sqlite(batch_size=10000):
+    """기존 JSON 데이터를 한 번에 alimtalk.db 로 옮긴다.
+
+    차감 기록은 파일에서 batch_size 건씩 읽어 바로 넣으므로 기록이 많아도 메모리가 늘지 않는다.
+    옮기는 동안 데이터 폴더를 잠그며, 프로그램이 열려 있으면 DataLockedError 가 난다.
+    """
+    with DataDirLock():
+        _migrate_json_to_sqlite(batch_size)
+
+
+def _migrate_json_to_sqlite(batch_size):
+    if os.path.exists(DB_FILE):
+        print(f"이미 SQLite 저장소를 사용 중입니다: {DB_FILE}")
+        return
+
+    # 다 옮긴 뒤에 이름을 바꿔서, 중간에 실패해도 반쪽짜리 DB 가 쓰이지 않게 한다
+    ensure_data_dir()
+    tmp_path = DB_FILE + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    store = SqliteStore(tmp_path)
+    store.save(CUSTOMERS_FILE, load_json_array(CUSTOMERS_FILE, []))
+    path, items, damaged = open_json_array(RECORDS_FILE)
+    batch = []
+    for record in items or ():
+        batch.append(record)
+        if len(batch) >= batch_size:
+            store.save(RECORDS_FILE, batch)
+            batch = []
+    store.save(RECORDS_FILE, batch)
+    if path:
+        _note_recovery(RECORDS_FILE, path, damaged)
+
+    # 마지막 스냅샷 이후의 변경은 저널에서 한 줄씩 반영한다
+    journal = RecordJournal(JOURNAL_FILE)
+    for entry in journal.entries():
+        store.apply(entry.pop("op"), entry)
+    for filepath in (DRIVERS_FILE, SETTINGS_FILE):
+        data = load_json(filepath, None)
+        if data is not None:
+            store.save(filepath, data)
+    customers = store.conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+    records = store.count_records()
+    store.conn.execute("PRAGMA journal_mode=DELETE")
+    store.close()
+    os.replace(tmp_path, DB_FILE)
+
+    # 저널 내용은 DB 에 모두 들어갔다
+    for path in (journal.path, journal.old_path):
+        if os.path.exists(path):
+            os.remove(path)
+    skipped = f" (손상된 부분 {len(damaged)}곳 건너뜀)" if damaged else ""
+    print(f"고객 {customers}명, 차감 기록 {records}건을 옮겼습니다{skipped}: {DB_FILE}")
@@ -0,0 +1,53 @@
+"""시간·금액 표시와 입력값 변환"""
+
+import uuid
+
+def format_time(hours):
+    h = int(hours)
+    m = round((hours - h) * 60)
+    if m > 0:
+        return f"{h}시간 {m}분"
+    return f"{h}시간"
+
+def generate_id():
+    return str(uuid.uuid4())[:8]
+
+def format_number(n):
+    return f"{n:,.0f}"
+
+def parse_play_hours(hours_text, minutes_text):
+    try:
+        h = float(hours_text or 0)
+    except ValueError:
+        h = 0
+    try:
+        m = float(minutes_text or 0)
+    except ValueError:
+        m = 0
+    # 분 단위로 맞춰서 차감·정산에 소수 오차가 끼지 않게 한다
+    return from_minutes(round(h * 60 + m))
+
+def to_minutes(hours):
+    """시간(소수)을 정수 분으로 바꾼다. 원장은 분 단위 정수로만 더한다"""
+    return round(hours * 60)
+
+def from_minutes(minutes):
+    """정수 분을 시간으로. 딱 떨어지면 정수로 돌려줘서 화면에 10.0시간처럼 나오지 않게 한다"""
+    return minutes // 60 if minutes % 60 == 0 else minutes / 60
+
+def pay_for(minutes, hourly_rate):
+    """플레이 분에 대한 정산 금액(원)"""
+    return round(minutes * hourly_rate / 60)
+
+def remaining_hours(c):
+    """남은 시간. 분 단위로 빼서 9.666666666666668 처럼 소수 오차가 보이지 않게 한다"""
+    return from_minutes(to_minutes(c.get("total_hours", 0)) - to_minutes(c.get("used_hours", 0)))
+
+def customer_label(c):
+    return f"{c['name']} (남은 {remaining_hours(c)}시간)"
+
+def driver_label(d):
+    return f"{d['name']} (시급 {format_number(d['hourly_rate'])}원)"
+
+def normalize_phone(phone):
+    return "".join(ch for ch in phone or "" if ch.isdigit())
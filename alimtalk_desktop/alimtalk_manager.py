@@ -6,40 +6,38 @@
 Python 3.x + tkinter
 """
 
+import time
+
+# 시작 시간 측정의 기준점 (아래 import 에 걸리는 시간도 재기 위해 가장 먼저 잰다)
+STARTED_AT = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import argparse
+import itertools
 import os
-import uuid
-from datetime import datetime, date
+import queue
+import sys
+import threading
+from datetime import datetime, date, timedelta
 import math
 
-# ─── 데이터 파일 경로 ───
-DATA_DIR = os.path.join(os.path.expanduser("~"), "알림톡관리_데이터")
-CUSTOMERS_FILE = os.path.join(DATA_DIR, "customers.json")
-RECORDS_FILE = os.path.join(DATA_DIR, "records.json")
-DRIVERS_FILE = os.path.join(DATA_DIR, "drivers.json")
-SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
-
-# ─── 기본 설정 ───
-DEFAULT_SETTINGS = {
-    "business_name": "리니지 학교",
-    "message_template": """[{업체명}] 시간 차감 안내
-
-안녕하세요, {고객명} 고객님!
-
-금일 플레이가 종료되어 안내드립니다.
-
-━━━━━━━━━━━━━━━━━━━━
-  금일 플레이 시간:  {플레이시간}
-  총 누적 사용 시간:  {누적시간}
-  남은 이용 시간:  {남은시간}
-━━━━━━━━━━━━━━━━━━━━
-
-궁금한 점이 있으시면 언제든 문의해주세요.
-
-감사합니다."""
-}
+from alimtalk import bench
+from alimtalk.config import DEFAULT_SETTINGS, OUTBOX_FILE, PROFILE_DIR, RECOVERED_FILES, STARTUP_LOG, log
+from alimtalk.messages import TEMPLATE_FIELDS, MessageRenderer, compile_template
+from alimtalk.metrics import ProfileCapture, metrics, timed
+from alimtalk.outbox import (ClipboardTransport, HttpGatewayTransport, MockGateway, Outbox, OutboxJob,
+                             benchmark_outbox)
+from alimtalk.records import RecordPager
+from alimtalk.reports import SETTLEMENT_PERIODS, export_settlement_csv, period_label
+from alimtalk.repository import Repository
+from alimtalk.service import DeductionService
+from alimtalk.storage import (DataLockedError, dump_json, ensure_data_dir, export_json, export_json_array,
+                              load_json, migrate_json_to_sqlite)
+from alimtalk.util import (customer_label, format_number, format_time, normalize_phone, parse_play_hours,
+                           remaining_hours, to_minutes)
+
+IMPORTED_AT = time.perf_counter()
 
 # ─── 색상 테마 ───
 COLORS = {
@@ -61,37 +59,211 @@ COLORS = {
     "border": "#E2E8F0",
 }
 
-# ─── 유틸리티 함수 ───
-def ensure_data_dir():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
 
-def load_json(filepath, default):
-    try:
-        if os.path.exists(filepath):
-            with open(filepath, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except:
-        pass
-    return default
+# ─── 가상 목록 위젯 ───
+class VirtualList(tk.Frame):
+    """화면에 보이는 줄만 위젯으로 만들고, 스크롤하면 같은 위젯에 다른 항목을 채워 재사용한다.
+
+    make_row(parent) 로 줄 위젯을 만들고 fill_row(row, item) 으로 내용을 채운다.
+    항목은 set_source 로 넘긴 fetch(start, stop) 로 보이는 구간만 읽는다.
+    """
+
+    ROW_GAP = 3
 
-def save_json(filepath, data):
-    ensure_data_dir()
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    def __init__(self, parent, row_height, make_row, fill_row, bg=None):
+        super().__init__(parent, bg=bg)
+        self.row_height = row_height
+        self.make_row = make_row
+        self.fill_row = fill_row
+
+        self.viewport = tk.Frame(self, bg=bg)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.viewport.bind("<Configure>", lambda e: self._render())
+
+        self._pool = []
+        self._shown = {}
+        self._top = 0
+        self._count = 0
+        self._fetch = lambda start, stop: []
+
+    def set_source(self, count, fetch):
+        self._count = count
+        self._fetch = fetch
+        self._top = min(self._top, self._max_top())
+        self.refresh()
+
+    def refresh(self):
+        """데이터가 바뀌었을 때 보이는 줄을 다시 채운다"""
+        self._shown.clear()
+        self._render()
+
+    def refresh_index(self, index):
+        """index 번째 항목이 화면에 있으면 그 줄만 다시 채운다"""
+        if not self._pool:
+            return
+        slot = index % len(self._pool)
+        if self._shown.get(slot) == index:
+            items = self._fetch(index, index + 1)
+            if items:
+                self.fill_row(self._pool[slot], items[0])
+
+    def refresh_where(self, match):
+        """보이는 줄 가운데 match(item) 이 참인 줄만 다시 채운다"""
+        for slot, index in list(self._shown.items()):
+            items = self._fetch(index, index + 1)
+            if items and match(items[0]):
+                self.fill_row(self._pool[slot], items[0])
+
+    def scroll_to_index(self, index):
+        self._top = min(max(index * self.row_height, 0), self._max_top())
+        self._render()
+
+    def scroll_units(self, units):
+        self._top = min(max(self._top + units * self.row_height // 2, 0), self._max_top())
+        self._render()
+
+    def contains(self, widget):
+        path = str(widget) if widget is not None else ""
+        return path == str(self) or path.startswith(str(self) + ".")
+
+    def _max_top(self):
+        return max(0, self._count * self.row_height - self.viewport.winfo_height())
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._top = int(float(value) * self._count * self.row_height)
+        elif unit == "pages":
+            self._top += int(value) * self.viewport.winfo_height()
+        else:
+            self._top += int(value) * self.row_height
+        self._top = min(max(self._top, 0), self._max_top())
+        self._render()
+
+    def _render(self):
+        height = self.viewport.winfo_height()
+        total = self._count * self.row_height
+        if total > 0:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + height) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+        first = self._top // self.row_height
+        last = min(self._count, (self._top + height) // self.row_height + 1)
+        needed = max(last - first, 0) + 1
+        if len(self._pool) < needed:
+            while len(self._pool) < needed:
+                self._pool.append(self.make_row(self.viewport))
+            self._shown.clear()
+
+        items = self._fetch(first, last) if last > first else []
+        visible = set()
+        for offset, item in enumerate(items):
+            index = first + offset
+            # index 가 같은 줄 위젯에 계속 걸리므로 한 줄만 스크롤하면 한 줄만 다시 채운다
+            slot = index % len(self._pool)
+            row = self._pool[slot]
+            if self._shown.get(slot) != index:
+                self.fill_row(row, item)
+                self._shown[slot] = index
+            row.place(x=0, y=index * self.row_height - self._top + self.ROW_GAP,
+                      relwidth=1, height=self.row_height - 2 * self.ROW_GAP)
+            visible.add(slot)
+        for slot, row in enumerate(self._pool):
+            if slot not in visible:
+                row.place_forget()
+                self._shown.pop(slot, None)
+
+
+class CustomerPicker(tk.Frame):
+    """입력하는 대로 색인에서 고객을 찾아 순위대로 보여 주는 선택기.
+
+    표시 문자열이 아니라 고객 id 를 on_select(customer_id) 로 넘긴다.
+    """
+
+    def __init__(self, parent, search, index, on_select, limit=8, bg=None):
+        super().__init__(parent, bg=bg)
+        self.search = search
+        self.index = index
+        self.on_select = on_select
+        self.limit = limit
+        self.selected_id = None
+        self._result_ids = []
+        self._filling = False
+
+        self.var = tk.StringVar()
+        self.entry = tk.Entry(self, textvariable=self.var, font=("맑은 고딕", 14),
+                              bd=1, relief="solid")
+        self.entry.pack(fill="x", ipady=5)
+        self.listbox = tk.Listbox(self, font=("맑은 고딕", 13), height=limit,
+                                  bd=1, relief="solid", activestyle="dotbox",
+                                  selectbackground=COLORS["primary"])
+
+        self.var.trace_add("write", lambda *args: self._on_type())
+        self.entry.bind("<Down>", lambda e: self._move(1))
+        self.entry.bind("<Up>", lambda e: self._move(-1))
+        self.entry.bind("<Return>", lambda e: self._choose_current())
+        self.entry.bind("<Escape>", lambda e: self._hide())
+        self.entry.bind("<FocusIn>", lambda e: self.selected_id is None and self._show_results())
+        self.listbox.bind("<ButtonRelease-1>", lambda e: self._choose_current())
+        self.listbox.bind("<Return>", lambda e: self._choose_current())
+
+    @staticmethod
+    def result_label(c):
+        phone = c.get("phone", "")
+        return f"{c['name']}  {phone}  (남은 {remaining_hours(c)}시간)" if phone else customer_label(c)
+
+    def select(self, customer_id):
+        customer = self.index.get(customer_id)
+        self.selected_id = customer_id if customer else None
+        self._filling = True
+        self.var.set(customer_label(customer) if customer else "")
+        self._filling = False
+        self._hide()
+        self.on_select(self.selected_id)
+
+    def _on_type(self):
+        if self._filling:
+            return
+        # 선택한 뒤 글자를 고치면 선택을 풀고 다시 찾는다
+        if self.selected_id is not None:
+            self.selected_id = None
+            self.on_select(None)
+        self._show_results()
+
+    def _show_results(self):
+        self._result_ids = self.search.ranked(self.var.get(), self.limit)
+        self.listbox.delete(0, "end")
+        for customer_id in self._result_ids:
+            self.listbox.insert("end", self.result_label(self.index.get(customer_id)))
+        if self._result_ids:
+            self.listbox.configure(height=len(self._result_ids))
+            self.listbox.selection_clear(0, "end")
+            self.listbox.selection_set(0)
+            self.listbox.pack(fill="x")
+        else:
+            self._hide()
 
-def format_time(hours):
-    h = int(hours)
-    m = round((hours - h) * 60)
-    if m > 0:
-        return f"{h}시간 {m}분"
-    return f"{h}시간"
+    def _hide(self):
+        self.listbox.pack_forget()
 
-def generate_id():
-    return str(uuid.uuid4())[:8]
+    def _move(self, step):
+        if not self._result_ids:
+            return "break"
+        current = self.listbox.curselection()
+        pos = (current[0] if current else -1) + step
+        pos = min(max(pos, 0), len(self._result_ids) - 1)
+        self.listbox.selection_clear(0, "end")
+        self.listbox.selection_set(pos)
+        self.listbox.see(pos)
+        return "break"
 
-def format_number(n):
-    return f"{n:,.0f}"
+    def _choose_current(self):
+        current = self.listbox.curselection()
+        if current and current[0] < len(self._result_ids):
+            self.select(self._result_ids[current[0]])
+        return "break"
 
 
 # ─── 메인 애플리케이션 ───
@@ -104,14 +276,26 @@ class AlimtalkManager(tk.Tk):
         self.minsize(1000, 700)
         self.configure(bg=COLORS["bg"])
 
-        # 데이터 로드
-        self.customers = load_json(CUSTOMERS_FILE, [])
-        self.records = load_json(RECORDS_FILE, [])
-        self.drivers = load_json(DRIVERS_FILE, [
-            {"id": "d1", "name": "기사A", "hourly_rate": 5000},
-            {"id": "d2", "name": "기사B", "hourly_rate": 6000},
-        ])
-        self.settings = load_json(SETTINGS_FILE, DEFAULT_SETTINGS)
+        # 데이터와 저장은 화면 없는 핵심 모듈이 맡는다 (저장은 백그라운드 스레드에서)
+        self.repo = Repository()
+        self.persist = self.repo.persist
+
+        # 화면 상태
+        self.loaded = False
+        self.page_frames = {}
+        self.page_lists = {}
+        # 페이지별 (주제 → 처리 함수, 다시 열 때 맞추는 함수). watch / notify 참고
+        self.watchers = {}
+        self.stale_pages = set()
+        # 현재 화면의 가상 목록 (마우스 휠을 이쪽으로 보낸다)
+        self.active_list = None
+
+        # 메시지 발송: 클립보드는 바로, 게이트웨이는 outbox 작업 스레드가 보낸다
+        self.clipboard_transport = ClipboardTransport(self)
+        self.delivery_events = queue.Queue()
+        self.delivery_failures = {}
+        self.outbox = None
+        self.closing = False
 
         # 스타일 설정
         self.setup_styles()
@@ -120,12 +304,97 @@ class AlimtalkManager(tk.Tk):
         self.create_sidebar()
         self.create_main_area()
 
-        # 초기 화면
-        self.show_dashboard()
+        # 창을 먼저 띄우고 데이터는 백그라운드에서 읽는다
+        self.startup_times = {"import": IMPORTED_AT - STARTED_AT}
+        self._show_loading()
+        self._load_error = None
+        self._load_thread = threading.Thread(target=self._load_data, name="load-data", daemon=True)
+        self._load_thread.start()
+        self.after_idle(self._mark_window_painted)
+        self.after(self.LOAD_POLL_MS, self._wait_for_data)
 
         # 종료 시 데이터 저장
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    # ─── 시작 ───
+    LOAD_POLL_MS = 30
+
+    def _show_loading(self):
+        self.loading_frame = tk.Frame(self.page_host, bg=COLORS["bg"])
+        self.loading_frame.pack(fill="both", expand=True)
+        tk.Label(self.loading_frame, text="데이터를 불러오는 중입니다...",
+                 font=("맑은 고딕", 16), bg=COLORS["bg"],
+                 fg=COLORS["text_muted"]).pack(pady=200)
+
+    def _mark_window_painted(self):
+        self.update_idletasks()
+        self.startup_times["window"] = time.perf_counter() - STARTED_AT
+
+    def _load_data(self):
+        """데이터 파일을 읽고 색인을 만든다. 백그라운드 스레드에서 돌므로 위젯을 건드리지 않는다"""
+        started = time.perf_counter()
+        try:
+            self.repo.load()
+            self.renderer = MessageRenderer(self.repo.settings, self.repo.templates, self.repo.ledger)
+            self.deductions = DeductionService(self.repo, self.renderer)
+            self.customer_query = ""
+        except Exception as e:
+            log.exception("데이터를 불러오지 못했습니다")
+            self._load_error = e
+        self.startup_times["load"] = time.perf_counter() - started
+
+    def _wait_for_data(self):
+        if self._load_thread.is_alive():
+            self.after(self.LOAD_POLL_MS, self._wait_for_data)
+            return
+        if self._load_error is not None:
+            messagebox.showerror("오류", f"데이터를 불러오지 못했습니다:\n{self._load_error}")
+            self.repo.release()
+            self.destroy()
+            return
+
+        self.loaded = True
+        self.loading_frame.destroy()
+        if self.repo.settings.get("instrumentation"):
+            metrics.enable()
+        self.bind("<F12>", lambda e: self._open_metrics_panel())
+        self._start_outbox()
+        self.after(self.OUTBOX_POLL_MS, self._poll_outbox)
+
+        # 초기 화면
+        self.navigate("dashboard")
+        self.update_idletasks()
+        self.startup_times["first_page"] = time.perf_counter() - STARTED_AT
+        self._report_startup()
+
+        if RECOVERED_FILES:
+            messagebox.showwarning(
+                "데이터 복구",
+                "다음 파일이 손상되어 복구했습니다. 깨진 파일은 백업으로 남아 있습니다:\n\n"
+                + "\n".join(RECOVERED_FILES))
+        if self.repo.ledger_mismatches:
+            lines = [f"{name}: 구매 {d_total:+}분, 사용 {d_used:+}분"
+                     for name, d_total, d_used in self.repo.ledger_mismatches[:10]]
+            more = f"\n외 {len(self.repo.ledger_mismatches) - 10}명" if len(self.repo.ledger_mismatches) > 10 else ""
+            messagebox.showwarning(
+                "시간 불일치",
+                "고객 정보의 시간이 차감·구매 내역과 달라 보정 내역을 남겼습니다:\n\n"
+                + "\n".join(lines) + more)
+
+    def _report_startup(self):
+        """시작 단계별 시간을 로그와 startup.log 에 남긴다"""
+        times = self.startup_times
+        log.info("시작 시간: 가져오기 %.3f초, 창 표시 %.3f초, 데이터 %.3f초, 첫 화면 %.3f초",
+                 times["import"], times.get("window", 0), times["load"], times["first_page"])
+        line = dump_json({"at": datetime.now().isoformat(timespec="seconds"),
+                          **{k: round(v, 4) for k, v in times.items()}})
+        try:
+            ensure_data_dir()
+            with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            log.warning("시작 시간을 기록하지 못했습니다: %s", e)
+
     def setup_styles(self):
         style = ttk.Style()
         style.theme_use("clam")
@@ -202,7 +471,9 @@ class AlimtalkManager(tk.Tk):
             ("dashboard", "📊  대시보드"),
             ("customers", "👥  고객 관리"),
             ("play_record", "⏱️  시간 차감"),
+            ("batch", "🧾  일괄 차감"),
             ("messages", "📋  알림 내역"),
+            ("settlement", "💰  정산"),
             ("drivers", "🔧  기사 관리"),
             ("settings", "⚙️  설정"),
         ]
@@ -232,47 +503,118 @@ class AlimtalkManager(tk.Tk):
         # 스크롤 가능한 메인 컨텐츠
         self.canvas = tk.Canvas(self.main_area, bg=COLORS["bg"], highlightthickness=0)
         self.scrollbar = ttk.Scrollbar(self.main_area, orient="vertical", command=self.canvas.yview)
-        self.content_frame = tk.Frame(self.canvas, bg=COLORS["bg"])
+        # 페이지마다 page_host 안에 자기 프레임을 두고, content_frame 은 지금 보이는 페이지 프레임이다
+        self.page_host = tk.Frame(self.canvas, bg=COLORS["bg"])
+        self.content_frame = self.page_host
 
-        self.content_frame.bind("<Configure>",
+        self.page_host.bind("<Configure>",
             lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
 
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.content_frame, anchor="nw")
+        self.canvas_window = self.canvas.create_window((0, 0), window=self.page_host, anchor="nw")
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
 
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
 
-        # 캔버스 크기에 맞춰 content_frame 너비 조정
+        # 캔버스 크기에 맞춰 page_host 너비 조정
         self.canvas.bind("<Configure>", self._on_canvas_configure)
 
         # 마우스 휠 스크롤
-        self.canvas.bind_all("<MouseWheel>",
-            lambda e: self.canvas.yview_scroll(int(-1 * (e.delta / 120)), "units"))
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
 
     def _on_canvas_configure(self, event):
         self.canvas.itemconfig(self.canvas_window, width=event.width)
+        self._fit_active_list()
 
-    def navigate(self, page):
-        self.current_page = page
-        # 사이드바 활성 상태 업데이트
-        for key, btn in self.nav_buttons.items():
-            if key == page:
-                btn.configure(bg=COLORS["sidebar_active"])
-            else:
-                btn.configure(bg=COLORS["sidebar_bg"])
+    def _on_mousewheel(self, event):
+        units = int(-1 * (event.delta / 120))
+        if self.active_list is not None and self.active_list.contains(
+                self.winfo_containing(event.x_root, event.y_root)):
+            self.active_list.scroll_units(units)
+        else:
+            self.canvas.yview_scroll(units, "units")
 
+    def _fit_active_list(self):
+        # 가상 목록은 자체 스크롤을 쓰므로 창의 남은 높이를 꽉 채운다
+        if self.active_list is None:
+            return
+        self.update_idletasks()
+        height = self.canvas.winfo_height() - self.active_list.winfo_y() - 20
+        self.active_list.configure(height=max(height, 200))
+
+    def navigate(self, page):
+        if not self.loaded:
+            return
         pages = {
             "dashboard": self.show_dashboard,
             "customers": self.show_customers,
             "play_record": self.show_play_record,
+            "batch": self.show_batch,
             "messages": self.show_messages,
+            "settlement": self.show_settlement,
             "drivers": self.show_drivers,
             "settings": self.show_settings,
         }
-        pages.get(page, self.show_dashboard)()
+        if page not in pages:
+            page = "dashboard"
+
+        # 같은 메뉴를 다시 누르면 새로 그린다
+        refresh = page == self.current_page
+        if self.content_frame is not self.page_host:
+            # 떠나는 페이지의 목록 위젯을 기억해 두었다가 돌아올 때 마우스 휠을 다시 연결한다
+            self.page_lists[self.current_page] = self.active_list
+        self.current_page = page
+        # 사이드바 활성 상태 업데이트
+        for key, btn in self.nav_buttons.items():
+            if key == page:
+                btn.configure(bg=COLORS["sidebar_active"])
+            else:
+                btn.configure(bg=COLORS["sidebar_bg"])
+
+        # 페이지는 처음 열 때 만들고, 그 뒤로는 숨겨 두었다가 다시 보여준다
+        if self.content_frame is not self.page_host:
+            self.content_frame.pack_forget()
+        frame = self.page_frames.get(page)
+        if frame is None:
+            frame = self.page_frames[page] = tk.Frame(self.page_host, bg=COLORS["bg"])
+            refresh = True
+        frame.pack(fill="both", expand=True)
+        self.content_frame = frame
+        if refresh:
+            self.watchers.pop(page, None)
+            pages[page]()
+        else:
+            self.active_list = self.page_lists.get(page)
+            self.canvas.yview_moveto(0)
+            self._fit_active_list()
+        if page in self.stale_pages:
+            self.stale_pages.discard(page)
+            if not refresh:
+                self.watchers[page][1]()
+
+    # ─── 화면 갱신 알림 ───
+    def watch(self, page, handlers, refresh):
+        """page 가 보고 있는 데이터를 등록한다.
+
+        handlers 는 {주제: 처리 함수}. 페이지가 보이는 동안 notify(주제, ...) 가 오면 그 함수로
+        바뀐 줄·카드만 고치고, 숨겨져 있을 때 오면 다음에 열 때 refresh() 를 한 번 부른다.
+        """
+        self.watchers[page] = (handlers, refresh)
+
+    def notify(self, topic, *args):
+        """데이터가 바뀌었음을 알린다. 주제: customer(id), record(기록), sent(id), delivery(id),
+        driver(), settings()"""
+        for page, (handlers, _) in list(self.watchers.items()):
+            handler = handlers.get(topic)
+            if handler is None:
+                continue
+            if page == self.current_page:
+                handler(*args)
+            else:
+                self.stale_pages.add(page)
 
     def clear_content(self):
+        self.active_list = None
         for widget in self.content_frame.winfo_children():
             widget.destroy()
         self.canvas.yview_moveto(0)
@@ -285,6 +627,7 @@ class AlimtalkManager(tk.Tk):
         return card
 
     # ─── 대시보드 ───
+    @timed()
     def show_dashboard(self):
         self.clear_content()
         pad = 30
@@ -306,27 +649,19 @@ class AlimtalkManager(tk.Tk):
                   bg=COLORS["success"], fg="white", bd=0, padx=15, pady=6,
                   cursor="hand2", command=lambda: self.navigate("play_record")).pack()
 
-        # 요약 카드
+        # 요약 카드 (값은 _refresh_dashboard 가 채운다)
         cards_frame = tk.Frame(self.content_frame, bg=COLORS["bg"])
         cards_frame.pack(fill="x", padx=pad, pady=(0, 15))
 
-        today = date.today().isoformat()
-        total_customers = len(self.customers)
-        today_deductions = len([r for r in self.records if r.get("date") == today])
-        pending = len([r for r in self.records if not r.get("message_sent", False)])
-        total_remaining = sum(
-            max(0, c.get("total_hours", 0) - c.get("used_hours", 0))
-            for c in self.customers
-        )
-
         summary_data = [
-            ("👥", "총 고객 수", total_customers, "명", COLORS["primary"]),
-            ("⏱️", "오늘 차감", today_deductions, "건", COLORS["success"]),
-            ("⚠️", "미발송 알림", pending, "건", COLORS["warning"]),
-            ("⏰", "총 잔여 시간", total_remaining, "시간", "#8B5CF6"),
+            ("👥", "총 고객 수", "customers", "명", COLORS["primary"]),
+            ("⏱️", "오늘 차감", "today", "건", COLORS["success"]),
+            ("⚠️", "미발송 알림", "pending", "건", COLORS["warning"]),
+            ("⏰", "총 잔여 시간", "remaining", "시간", "#8B5CF6"),
         ]
 
-        for i, (icon, label, value, unit, color) in enumerate(summary_data):
+        self.dashboard_values = {}
+        for i, (icon, label, key, unit, color) in enumerate(summary_data):
             cards_frame.columnconfigure(i, weight=1, uniform="card")
 
             card = tk.Frame(cards_frame, bg=COLORS["card_bg"],
@@ -341,8 +676,9 @@ class AlimtalkManager(tk.Tk):
 
             val_frame = tk.Frame(inner, bg=COLORS["card_bg"])
             val_frame.pack(anchor="w", pady=(5, 0))
-            tk.Label(val_frame, text=str(value), font=("맑은 고딕", 32, "bold"),
-                     bg=COLORS["card_bg"], fg=COLORS["text_dark"]).pack(side="left")
+            self.dashboard_values[key] = tk.Label(val_frame, font=("맑은 고딕", 32, "bold"),
+                                                  bg=COLORS["card_bg"], fg=COLORS["text_dark"])
+            self.dashboard_values[key].pack(side="left")
             tk.Label(val_frame, text=f" {unit}", font=("맑은 고딕", 14),
                      bg=COLORS["card_bg"], fg=COLORS["text_muted"]).pack(side="left", pady=(12, 0))
 
@@ -353,8 +689,31 @@ class AlimtalkManager(tk.Tk):
 
         tk.Label(recent_frame, text="📋 최근 차감 내역", font=("맑은 고딕", 15, "bold"),
                  bg=COLORS["card_bg"], fg=COLORS["text_dark"]).pack(anchor="w", padx=20, pady=(15, 10))
+        self.dashboard_recent = tk.Frame(recent_frame, bg=COLORS["card_bg"])
+        self.dashboard_recent.pack(fill="x")
+        tk.Frame(recent_frame, bg=COLORS["card_bg"], height=10).pack()
+
+        self._refresh_dashboard()
+        self.watch("dashboard", dict.fromkeys(("customer", "record", "sent"),
+                                              lambda *args: self._refresh_dashboard()),
+                   self._refresh_dashboard)
+
+    @timed()
+    def _refresh_dashboard(self):
+        """요약 숫자는 그대로 둔 라벨에 넣고, 최근 내역 몇 줄만 다시 만든다"""
+        values = {
+            "customers": self.repo.stats.customer_count(),
+            "today": self.repo.stats.count_on(date.today().isoformat()),
+            "pending": self.repo.stats.pending_count(),
+            "remaining": self.repo.stats.total_remaining_hours(),
+        }
+        for key, value in values.items():
+            self.dashboard_values[key].configure(text=str(value))
 
-        recent_records = sorted(self.records, key=lambda r: r.get("created_at", ""), reverse=True)[:5]
+        recent_frame = self.dashboard_recent
+        for widget in recent_frame.winfo_children():
+            widget.destroy()
+        recent_records = self.repo.stats.recent()
 
         if not recent_records:
             tk.Label(recent_frame, text="차감 내역이 없습니다", font=("맑은 고딕", 13),
@@ -389,9 +748,8 @@ class AlimtalkManager(tk.Tk):
                 tk.Label(right, text=status_text, font=("맑은 고딕", 11, "bold"),
                          bg=status_color, fg="white", padx=8, pady=2).pack(side="left")
 
-        tk.Frame(recent_frame, bg=COLORS["card_bg"], height=10).pack()
-
     # ─── 고객 관리 ───
+    @timed()
     def show_customers(self):
         self.clear_content()
         pad = 30
@@ -407,81 +765,151 @@ class AlimtalkManager(tk.Tk):
                   bg=COLORS["success"], fg="white", bd=0, padx=15, pady=8,
                   cursor="hand2", command=self.add_customer_dialog).pack(side="right")
 
-        # 고객 카드 목록
-        for c in self.customers:
-            remaining = c.get("total_hours", 0) - c.get("used_hours", 0)
-            pct = (c.get("used_hours", 0) / max(c.get("total_hours", 1), 1)) * 100
-
-            card = tk.Frame(self.content_frame, bg=COLORS["card_bg"],
-                            highlightbackground=COLORS["border"], highlightthickness=1)
-            card.pack(fill="x", padx=pad, pady=4)
-
-            inner = tk.Frame(card, bg=COLORS["card_bg"])
-            inner.pack(fill="x", padx=20, pady=15)
-
-            # 상단: 이름 + 버튼
-            top = tk.Frame(inner, bg=COLORS["card_bg"])
-            top.pack(fill="x")
-
-            tk.Label(top, text=c.get("name", ""), font=("맑은 고딕", 16, "bold"),
-                     bg=COLORS["card_bg"], fg=COLORS["text_dark"]).pack(side="left")
-
-            tk.Label(top, text=c.get("phone", ""), font=("맑은 고딕", 12),
-                     bg=COLORS["card_bg"], fg=COLORS["text_muted"]).pack(side="left", padx=(10, 0))
-
-            # 상태 뱃지
-            if remaining <= 5:
-                tk.Label(top, text=" 긴급 ", font=("맑은 고딕", 11, "bold"),
-                         bg=COLORS["danger"], fg="white", padx=6, pady=1).pack(side="left", padx=(10, 0))
-            elif remaining <= 10:
-                tk.Label(top, text=" 주의 ", font=("맑은 고딕", 11, "bold"),
-                         bg=COLORS["warning"], fg="white", padx=6, pady=1).pack(side="left", padx=(10, 0))
-
-            btn_frame = tk.Frame(top, bg=COLORS["card_bg"])
-            btn_frame.pack(side="right")
-
-            tk.Button(btn_frame, text="수정", font=("맑은 고딕", 11),
-                      bg=COLORS["primary"], fg="white", bd=0, padx=10, pady=4,
-                      cursor="hand2",
-                      command=lambda cid=c["id"]: self.edit_customer_dialog(cid)).pack(side="left", padx=3)
-            tk.Button(btn_frame, text="삭제", font=("맑은 고딕", 11),
-                      bg=COLORS["danger"], fg="white", bd=0, padx=10, pady=4,
-                      cursor="hand2",
-                      command=lambda cid=c["id"]: self.delete_customer(cid)).pack(side="left", padx=3)
+        # 검색
+        search_frame = tk.Frame(self.content_frame, bg=COLORS["bg"])
+        search_frame.pack(fill="x", padx=pad, pady=(0, 10))
+        tk.Label(search_frame, text="🔍", font=("맑은 고딕", 14),
+                 bg=COLORS["bg"]).pack(side="left", padx=(0, 5))
+        self.customer_search_var = tk.StringVar(value=self.customer_query)
+        search_entry = tk.Entry(search_frame, textvariable=self.customer_search_var,
+                                font=("맑은 고딕", 14), bd=1, relief="solid")
+        search_entry.pack(side="left", fill="x", expand=True, ipady=5)
+        self.customer_count_label = tk.Label(search_frame, font=("맑은 고딕", 12),
+                                             bg=COLORS["bg"], fg=COLORS["text_muted"])
+        self.customer_count_label.pack(side="left", padx=(10, 0))
+        tk.Label(self.content_frame, text="이름, 초성(예: ㅎㄱㄷ), 전화번호, 게임명으로 찾을 수 있습니다",
+                 font=("맑은 고딕", 10), bg=COLORS["bg"], fg=COLORS["text_muted"]
+                 ).pack(anchor="w", padx=pad, pady=(0, 10))
 
-            # 시간 게이지
-            gauge_frame = tk.Frame(inner, bg=COLORS["card_bg"])
-            gauge_frame.pack(fill="x", pady=(10, 0))
+        # 고객 카드 목록
+        self.customer_list = VirtualList(self.content_frame, self.CUSTOMER_ROW_HEIGHT,
+                                         self._make_customer_row, self._fill_customer_row,
+                                         bg=COLORS["bg"])
+        self.customer_list.pack(fill="x", padx=pad)
+        self.customer_list.pack_propagate(False)
+        self.active_list = self.customer_list
+        self._fit_active_list()
+
+        self._search_job = None
+        self.customer_search_var.trace_add("write", lambda *args: self._schedule_customer_search())
+        self._apply_customer_search()
+        search_entry.focus_set()
+        self.watch("customers", {"customer": self._on_customer_changed}, self._apply_customer_search)
+
+    def _schedule_customer_search(self):
+        # 연속 입력은 잠깐 모아서 한 번만 검색한다
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(120, self._apply_customer_search)
+
+    def _apply_customer_search(self):
+        self._search_job = None
+        self.customer_query = self.customer_search_var.get()
+        ids = self.repo.customer_search.search(self.customer_query)
+        self.customer_ids = ids
+        self.customer_count_label.configure(text=f"{format_number(len(ids))}명")
+        self.customer_list.set_source(
+            len(ids), lambda start, stop: [self.repo.customer_index.get(i) for i in ids[start:stop]])
+
+    def _on_customer_changed(self, customer_id):
+        # 검색하지 않을 때 기존 고객이 바뀌었으면 그 카드 한 장만 다시 채운다
+        if not self.customer_query and self.repo.customer_index.get(customer_id):
+            try:
+                index = self.customer_ids.index(customer_id)
+            except ValueError:
+                pass
+            else:
+                self.customer_list.refresh_index(index)
+                return
+        # 추가·삭제되었거나 검색 결과가 달라질 수 있으면 목록을 다시 맞춘다 (보이는 줄만 다시 채운다)
+        self._apply_customer_search()
 
-            info_text = f"사용 {c.get('used_hours', 0)}시간 / 총 {c.get('total_hours', 0)}시간"
-            tk.Label(gauge_frame, text=info_text, font=("맑은 고딕", 12),
-                     bg=COLORS["card_bg"], fg=COLORS["text_muted"]).pack(anchor="w")
+    CUSTOMER_ROW_HEIGHT = 196
 
-            # 프로그레스 바
-            bar_bg = tk.Frame(gauge_frame, bg="#E2E8F0", height=14)
-            bar_bg.pack(fill="x", pady=(5, 0))
+    def _make_customer_row(self, parent):
+        card = tk.Frame(parent, bg=COLORS["card_bg"],
+                        highlightbackground=COLORS["border"], highlightthickness=1)
 
-            bar_color = COLORS["danger"] if remaining <= 5 else (COLORS["warning"] if remaining <= 10 else COLORS["success"])
-            bar_width = min(pct, 100)
-            bar_fill = tk.Frame(bar_bg, bg=bar_color, height=14)
-            bar_fill.place(relwidth=bar_width / 100, relheight=1)
+        inner = tk.Frame(card, bg=COLORS["card_bg"])
+        inner.pack(fill="x", padx=20, pady=15)
+
+        # 상단: 이름 + 버튼
+        top = tk.Frame(inner, bg=COLORS["card_bg"])
+        top.pack(fill="x")
+
+        card.name_label = tk.Label(top, font=("맑은 고딕", 16, "bold"),
+                                   bg=COLORS["card_bg"], fg=COLORS["text_dark"])
+        card.name_label.pack(side="left")
+        card.phone_label = tk.Label(top, font=("맑은 고딕", 12),
+                                    bg=COLORS["card_bg"], fg=COLORS["text_muted"])
+        card.phone_label.pack(side="left", padx=(10, 0))
+
+        # 상태 뱃지
+        card.badge = tk.Label(top, font=("맑은 고딕", 11, "bold"), fg="white", padx=6, pady=1)
+        card.badge.pack(side="left", padx=(10, 0))
+
+        btn_frame = tk.Frame(top, bg=COLORS["card_bg"])
+        btn_frame.pack(side="right")
+
+        card.edit_button = tk.Button(btn_frame, text="수정", font=("맑은 고딕", 11),
+                                     bg=COLORS["primary"], fg="white", bd=0, padx=10, pady=4,
+                                     cursor="hand2")
+        card.edit_button.pack(side="left", padx=3)
+        card.delete_button = tk.Button(btn_frame, text="삭제", font=("맑은 고딕", 11),
+                                       bg=COLORS["danger"], fg="white", bd=0, padx=10, pady=4,
+                                       cursor="hand2")
+        card.delete_button.pack(side="left", padx=3)
+
+        # 시간 게이지
+        gauge_frame = tk.Frame(inner, bg=COLORS["card_bg"])
+        gauge_frame.pack(fill="x", pady=(10, 0))
+
+        card.info_label = tk.Label(gauge_frame, font=("맑은 고딕", 12),
+                                   bg=COLORS["card_bg"], fg=COLORS["text_muted"])
+        card.info_label.pack(anchor="w")
+
+        # 프로그레스 바
+        bar_bg = tk.Frame(gauge_frame, bg="#E2E8F0", height=14)
+        bar_bg.pack(fill="x", pady=(5, 0))
+        card.bar_fill = tk.Frame(bar_bg, height=14)
+
+        # 남은 시간
+        remain_frame = tk.Frame(inner, bg="#F0F4F8")
+        remain_frame.pack(fill="x", pady=(10, 0))
+
+        tk.Label(remain_frame, text="남은 시간", font=("맑은 고딕", 12),
+                 bg="#F0F4F8", fg=COLORS["text_muted"]).pack(side="left", padx=15, pady=10)
+        card.remain_label = tk.Label(remain_frame, font=("맑은 고딕", 22, "bold"), bg="#F0F4F8")
+        card.remain_label.pack(side="right", padx=15, pady=10)
+        return card
 
-            # 남은 시간
-            remain_frame = tk.Frame(inner, bg="#F0F4F8")
-            remain_frame.pack(fill="x", pady=(10, 0))
+    def _fill_customer_row(self, card, c):
+        remaining = remaining_hours(c)
+        pct = (c.get("used_hours", 0) / max(c.get("total_hours", 1), 1)) * 100
 
-            tk.Label(remain_frame, text="남은 시간", font=("맑은 고딕", 12),
-                     bg="#F0F4F8", fg=COLORS["text_muted"]).pack(side="left", padx=15, pady=10)
+        card.name_label.configure(text=c.get("name", ""))
+        card.phone_label.configure(text=c.get("phone", ""))
+        if remaining <= 5:
+            card.badge.configure(text=" 긴급 ", bg=COLORS["danger"])
+        elif remaining <= 10:
+            card.badge.configure(text=" 주의 ", bg=COLORS["warning"])
+        else:
+            card.badge.configure(text="", bg=COLORS["card_bg"])
+        card.edit_button.configure(command=lambda cid=c["id"]: self.edit_customer_dialog(cid))
+        card.delete_button.configure(command=lambda cid=c["id"]: self.delete_customer(cid))
 
-            remain_color = COLORS["danger"] if remaining <= 5 else (COLORS["warning"] if remaining <= 10 else COLORS["success"])
-            tk.Label(remain_frame, text=f"{remaining}시간", font=("맑은 고딕", 22, "bold"),
-                     bg="#F0F4F8", fg=remain_color).pack(side="right", padx=15, pady=10)
+        card.info_label.configure(
+            text=f"사용 {c.get('used_hours', 0)}시간 / 총 {c.get('total_hours', 0)}시간")
+        bar_color = COLORS["danger"] if remaining <= 5 else (COLORS["warning"] if remaining <= 10 else COLORS["success"])
+        card.bar_fill.configure(bg=bar_color)
+        card.bar_fill.place(relwidth=min(pct, 100) / 100, relheight=1)
+        card.remain_label.configure(text=f"{remaining}시간", fg=bar_color)
 
     def add_customer_dialog(self):
         self._customer_dialog(None)
 
     def edit_customer_dialog(self, customer_id):
-        customer = next((c for c in self.customers if c["id"] == customer_id), None)
+        customer = self.repo.customer_index.get(customer_id)
         if customer:
             self._customer_dialog(customer)
 
@@ -538,19 +966,14 @@ class AlimtalkManager(tk.Tk):
                 "memo": entries["memo"].get().strip(),
             }
 
-            if customer:
-                for c in self.customers:
-                    if c["id"] == customer["id"]:
-                        c.update(data)
-                        break
-            else:
-                data["id"] = generate_id()
-                data["created_at"] = datetime.now().isoformat()
-                self.customers.append(data)
-
-            save_json(CUSTOMERS_FILE, self.customers)
+            total_minutes = to_minutes(data.pop("total_hours"))
+            used_minutes = to_minutes(data.pop("used_hours"))
+            c, entry = self.repo.save_customer(data, total_minutes, used_minutes,
+                                               customer["id"] if customer else None)
             dialog.destroy()
-            self.show_customers()
+            if c:
+                self.repo.commit([entry])
+                self.notify("customer", c["id"])
 
         btn_frame = tk.Frame(dialog, bg=COLORS["card_bg"])
         btn_frame.pack(fill="x", padx=30, pady=20)
@@ -564,11 +987,11 @@ class AlimtalkManager(tk.Tk):
 
     def delete_customer(self, customer_id):
         if messagebox.askyesno("확인", "정말로 이 고객을 삭제하시겠습니까?"):
-            self.customers = [c for c in self.customers if c["id"] != customer_id]
-            save_json(CUSTOMERS_FILE, self.customers)
-            self.show_customers()
+            self.repo.commit([self.repo.delete_customer(customer_id)])
+            self.notify("customer", customer_id)
 
     # ─── 시간 차감 등록 ───
+    @timed()
     def show_play_record(self):
         self.clear_content()
         pad = 30
@@ -602,20 +1025,18 @@ class AlimtalkManager(tk.Tk):
         tk.Label(form, text="고객 선택 *", font=("맑은 고딕", 13, "bold"),
                  bg=COLORS["card_bg"]).pack(anchor="w", pady=(0, 5))
 
-        customer_names = [f"{c['name']} (남은 {c['total_hours'] - c['used_hours']}시간)" for c in self.customers]
-        self.customer_var = tk.StringVar()
-        customer_combo = ttk.Combobox(form, textvariable=self.customer_var,
-                                       values=customer_names, state="readonly",
-                                       font=("맑은 고딕", 14))
-        customer_combo.pack(fill="x", ipady=5, pady=(0, 10))
+        self.selected_customer_id = None
+        self.customer_picker = CustomerPicker(form, self.repo.customer_search, self.repo.customer_index,
+                                              self._on_customer_selected, bg=COLORS["card_bg"])
+        self.customer_picker.pack(fill="x", pady=(0, 10))
 
         # 기사 선택
         tk.Label(form, text="기사 선택 *", font=("맑은 고딕", 13, "bold"),
                  bg=COLORS["card_bg"]).pack(anchor="w", pady=(0, 5))
 
-        driver_names = [f"{d['name']} (시급 {format_number(d['hourly_rate'])}원)" for d in self.drivers]
+        driver_names = self.repo.driver_index.labels()
         self.driver_var = tk.StringVar()
-        driver_combo = ttk.Combobox(form, textvariable=self.driver_var,
+        self.driver_combo = driver_combo = ttk.Combobox(form, textvariable=self.driver_var,
                                      values=driver_names, state="readonly",
                                      font=("맑은 고딕", 14))
         driver_combo.pack(fill="x", ipady=5, pady=(0, 10))
@@ -674,6 +1095,20 @@ class AlimtalkManager(tk.Tk):
                                        justify="center")
         self.preview_label.pack(expand=True)
 
+        # 말풍선은 한 번만 만들어 두고 글자만 바꾼다
+        self.bubble_frame = tk.Frame(self.chat_bg, bg=COLORS["kakao_chat_bg"])
+        self.bubble_sender = tk.Label(self.bubble_frame, font=("맑은 고딕", 11),
+                                      bg=COLORS["kakao_chat_bg"], fg="#475569")
+        self.bubble_sender.pack(anchor="w", padx=5, pady=(0, 3))
+        bubble = tk.Frame(self.bubble_frame, bg="white", bd=0)
+        bubble.pack(anchor="w")
+        self.bubble_text = tk.Label(bubble, font=("맑은 고딕", 12),
+                                    bg="white", fg="#1E293B", justify="left",
+                                    wraplength=350, padx=15, pady=12)
+        self.bubble_text.pack()
+        self._current_message = ""
+        self._preview_job = None
+
         # 복사 버튼 영역
         self.copy_frame = tk.Frame(right_card, bg=COLORS["card_bg"])
         self.copy_frame.pack(fill="x")
@@ -690,89 +1125,75 @@ class AlimtalkManager(tk.Tk):
                  fg=COLORS["text_muted"]).pack(pady=(0, 10))
 
         # 미리보기 업데이트 바인딩
-        for var in [self.customer_var, self.driver_var, self.hours_var, self.minutes_var]:
-            var.trace_add("write", lambda *args: self._update_preview())
+        for var in [self.driver_var, self.hours_var, self.minutes_var]:
+            var.trace_add("write", lambda *args: self._schedule_preview())
+
+        # 입력 중인 내용은 그대로 두고 기사 목록과 미리보기만 맞춘다
+        self.watch("play_record", {
+            "driver": self._refresh_driver_choices,
+            "customer": lambda customer_id: self._schedule_preview(),
+            "settings": self._schedule_preview,
+        }, self._refresh_driver_choices)
+
+    def _refresh_driver_choices(self):
+        self.driver_combo.configure(values=self.repo.driver_index.labels())
+        self._schedule_preview()
 
     def _get_play_hours(self):
-        try:
-            h = float(self.hours_var.get() or 0)
-        except ValueError:
-            h = 0
-        try:
-            m = float(self.minutes_var.get() or 0)
-        except ValueError:
-            m = 0
-        return h + m / 60
+        return parse_play_hours(self.hours_var.get(), self.minutes_var.get())
+
+    def _on_customer_selected(self, customer_id):
+        self.selected_customer_id = customer_id
+        self._schedule_preview()
 
     def _get_selected_customer(self):
-        idx = None
-        customer_val = self.customer_var.get()
-        for i, c in enumerate(self.customers):
-            display = f"{c['name']} (남은 {c['total_hours'] - c['used_hours']}시간)"
-            if display == customer_val:
-                idx = i
-                break
-        if idx is not None:
-            return self.customers[idx]
-        return None
+        return self.repo.customer_index.get(self.selected_customer_id)
 
     def _get_selected_driver(self):
-        driver_val = self.driver_var.get()
-        for d in self.drivers:
-            display = f"{d['name']} (시급 {format_number(d['hourly_rate'])}원)"
-            if display == driver_val:
-                return d
-        return None
-
-    def _generate_preview_message(self, customer, play_hours):
-        remaining = customer["total_hours"] - customer["used_hours"] - play_hours
-        new_used = customer["used_hours"] + play_hours
-
-        msg = self.settings["message_template"]
-        msg = msg.replace("{업체명}", self.settings["business_name"])
-        msg = msg.replace("{고객명}", customer["name"])
-        msg = msg.replace("{플레이시간}", format_time(play_hours))
-        msg = msg.replace("{누적시간}", format_time(new_used))
-        msg = msg.replace("{남은시간}", format_time(remaining))
-        return msg
+        return self.repo.driver_index.find_by_label(self.driver_var.get())
 
-    def _update_preview(self):
-        customer = self._get_selected_customer()
-        play_hours = self._get_play_hours()
-
-        if customer and play_hours > 0:
-            msg = self._generate_preview_message(customer, play_hours)
-            # 미리보기 업데이트
-            for w in self.chat_bg.winfo_children():
-                w.destroy()
+    def _generate_preview_message(self, customer, play_hours, driver=None, day=None):
+        return self.renderer.render(customer, play_hours, driver, day)
 
-            # 말풍선 스타일
-            bubble_frame = tk.Frame(self.chat_bg, bg=COLORS["kakao_chat_bg"])
-            bubble_frame.pack(anchor="w", padx=15, pady=15)
+    PREVIEW_DELAY_MS = 150
 
-            tk.Label(bubble_frame, text=self.settings["business_name"],
-                     font=("맑은 고딕", 11), bg=COLORS["kakao_chat_bg"],
-                     fg="#475569").pack(anchor="w", padx=5, pady=(0, 3))
+    def _schedule_preview(self):
+        # 키를 누를 때마다가 아니라 입력이 잠깐 멈췄을 때 한 번만 갱신한다
+        if self._preview_job is not None:
+            self.after_cancel(self._preview_job)
+        self._preview_job = self.after(self.PREVIEW_DELAY_MS, self._update_preview)
 
-            bubble = tk.Frame(bubble_frame, bg="white", bd=0)
-            bubble.pack(anchor="w")
+    def _flush_preview(self):
+        if self._preview_job is not None:
+            self.after_cancel(self._preview_job)
+            self._update_preview()
 
-            msg_label = tk.Label(bubble, text=msg, font=("맑은 고딕", 12),
-                                  bg="white", fg="#1E293B", justify="left",
-                                  wraplength=350, padx=15, pady=12)
-            msg_label.pack()
+    @timed()
+    def _update_preview(self):
+        self._preview_job = None
+        customer = self._get_selected_customer()
+        play_hours = self._get_play_hours()
 
-            self._current_message = msg
+        msg = ""
+        if customer and play_hours > 0:
+            msg = self._generate_preview_message(customer, play_hours, self._get_selected_driver())
+        if msg == self._current_message:
+            return
+        self._current_message = msg
+
+        if msg:
+            self.bubble_sender.configure(text=self.repo.settings["business_name"])
+            self.bubble_text.configure(text=msg)
+            if not self.bubble_frame.winfo_ismapped():
+                self.preview_label.pack_forget()
+                self.bubble_frame.pack(anchor="w", padx=15, pady=15)
         else:
-            for w in self.chat_bg.winfo_children():
-                w.destroy()
-            tk.Label(self.chat_bg, text="고객과 시간을 입력하면\n미리보기가 표시됩니다",
-                     font=("맑은 고딕", 13), bg=COLORS["kakao_chat_bg"],
-                     fg="#64748B", justify="center").pack(expand=True)
-            self._current_message = ""
+            self.bubble_frame.pack_forget()
+            self.preview_label.pack(expand=True)
 
     def _copy_message(self):
-        msg = getattr(self, "_current_message", "")
+        self._flush_preview()
+        msg = self._current_message
         if not msg:
             messagebox.showinfo("알림", "먼저 고객과 시간을 입력해주세요")
             return
@@ -788,149 +1209,686 @@ class AlimtalkManager(tk.Tk):
 
         messagebox.showinfo("복사 완료", "메시지가 클립보드에 복사되었습니다.\n카카오톡에 붙여넣기(Ctrl+V) 하세요!")
 
+    def _deduct(self, items):
+        """(고객, 기사, 시간) 목록을 차감으로 등록하고 [(기록, 메시지), ...] 를 돌려준다"""
+        results = self.deductions.deduct(items)
+        for record, _ in results:
+            self.notify("record", record)
+            self.notify("customer", record["customer_id"])
+        return results
+
+    def _mark_sent(self, record):
+        self.repo.commit([self.repo.mark_sent(record)])
+        self.notify("sent", record["id"])
+
     def _submit_play_record(self):
         customer = self._get_selected_customer()
         driver = self._get_selected_driver()
         play_hours = self._get_play_hours()
 
-        if not customer:
-            messagebox.showerror("오류", "고객을 선택해주세요")
+        error = self.deductions.validate(customer, driver, play_hours)
+        if error:
+            messagebox.showerror("오류", error)
             return
-        if not driver:
-            messagebox.showerror("오류", "기사를 선택해주세요")
-            return
-        if play_hours <= 0:
-            messagebox.showerror("오류", "플레이 시간을 입력해주세요")
-            return
-
-        # 기록 생성
-        record = {
-            "id": generate_id(),
-            "customer_id": customer["id"],
-            "customer_name": customer["name"],
-            "driver_name": driver["name"],
-            "play_hours": play_hours,
-            "hourly_rate": driver["hourly_rate"],
-            "total_pay": round(play_hours * driver["hourly_rate"]),
-            "date": date.today().isoformat(),
-            "message_sent": False,
-            "created_at": datetime.now().isoformat(),
-        }
-        self.records.append(record)
-
-        # 고객 시간 차감
-        for c in self.customers:
-            if c["id"] == customer["id"]:
-                c["used_hours"] = c.get("used_hours", 0) + play_hours
-                break
-
-        save_json(RECORDS_FILE, self.records)
-        save_json(CUSTOMERS_FILE, self.customers)
-
-        # 메시지 생성 및 복사
-        msg = self._generate_preview_message(customer, play_hours)
-        self.clipboard_clear()
-        self.clipboard_append(msg)
-        self.update()
 
-        # 발송 완료 표시
-        record["message_sent"] = True
-        save_json(RECORDS_FILE, self.records)
+        [(record, msg)] = self._deduct([(customer, driver, play_hours)])
+        copied = self._deliver(record, msg, customer)
 
         settlement = format_number(record["total_pay"])
+        if copied:
+            notice = "📋 메시지가 클립보드에 복사되었습니다.\n카카오톡에 붙여넣기(Ctrl+V) 하세요!"
+        else:
+            notice = "📨 메시지를 알림톡으로 발송합니다."
         messagebox.showinfo("등록 완료",
             f"시간 차감이 등록되었습니다!\n\n"
             f"고객: {customer['name']}\n"
             f"플레이: {format_time(play_hours)}\n"
             f"기사 정산: {settlement}원\n\n"
-            f"📋 메시지가 클립보드에 복사되었습니다.\n"
-            f"카카오톡에 붙여넣기(Ctrl+V) 하세요!")
+            f"{notice}")
 
         self.show_play_record()
 
-    # ─── 알림 내역 ───
-    def show_messages(self):
+    # ─── 일괄 차감 ───
+    BATCH_ROWS = 5
+
+    @timed()
+    def show_batch(self):
         self.clear_content()
         pad = 30
 
-        tk.Label(self.content_frame, text="📋 알림 내역",
+        tk.Label(self.content_frame, text="🧾 일괄 차감 등록",
+                 font=("맑은 고딕", 20, "bold"),
+                 bg=COLORS["bg"], fg=COLORS["text_dark"]).pack(anchor="w", padx=pad, pady=(pad, 5))
+        tk.Label(self.content_frame, text="여러 건을 한 번에 입력해 함께 등록하고, 메시지는 차례로 복사합니다",
+                 font=("맑은 고딕", 12), bg=COLORS["bg"], fg=COLORS["text_muted"]
+                 ).pack(anchor="w", padx=pad, pady=(0, 15))
+
+        card = tk.Frame(self.content_frame, bg=COLORS["card_bg"],
+                        highlightbackground=COLORS["border"], highlightthickness=1)
+        card.pack(fill="x", padx=pad, pady=5)
+
+        self.batch_grid = tk.Frame(card, bg=COLORS["card_bg"])
+        self.batch_grid.pack(fill="x", padx=20, pady=(15, 5))
+        self.batch_grid.columnconfigure(1, weight=3)
+        self.batch_grid.columnconfigure(2, weight=2)
+
+        for col, text in enumerate(["#", "고객", "기사", "시간", "분", ""]):
+            tk.Label(self.batch_grid, text=text, font=("맑은 고딕", 12, "bold"),
+                     bg=COLORS["card_bg"], fg=COLORS["text_muted"]).grid(
+                row=0, column=col, sticky="w", padx=4, pady=(0, 5))
+
+        self.batch_rows = []
+        self._batch_grid_row = 1
+        for _ in range(self.BATCH_ROWS):
+            self._add_batch_row()
+        self.watch("batch", {"driver": self._refresh_batch_drivers}, self._refresh_batch_drivers)
+
+        btn_frame = tk.Frame(card, bg=COLORS["card_bg"])
+        btn_frame.pack(fill="x", padx=20, pady=(5, 15))
+        tk.Button(btn_frame, text="＋ 행 추가", font=("맑은 고딕", 12),
+                  bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=15, pady=6,
+                  cursor="hand2", command=self._add_batch_row).pack(side="left")
+        tk.Button(btn_frame, text="✈️  일괄 등록", font=("맑은 고딕", 14, "bold"),
+                  bg=COLORS["success"], fg="white", bd=0, padx=20, pady=8,
+                  cursor="hand2", command=self._submit_batch).pack(side="right")
+
+    def _refresh_batch_drivers(self):
+        labels = self.repo.driver_index.labels()
+        for row in self.batch_rows:
+            if row["driver"].winfo_exists():
+                row["driver"].configure(values=labels)
+
+    def _add_batch_row(self):
+        r = self._batch_grid_row
+        self._batch_grid_row += 1
+        grid = self.batch_grid
+        row = {
+            "number": tk.Label(grid, font=("맑은 고딕", 12), bg=COLORS["card_bg"],
+                               fg=COLORS["text_muted"]),
+            "picker": CustomerPicker(grid, self.repo.customer_search, self.repo.customer_index,
+                                     lambda customer_id: None, limit=6, bg=COLORS["card_bg"]),
+            "driver_var": tk.StringVar(),
+            "hours_var": tk.StringVar(value="0"),
+            "minutes_var": tk.StringVar(value="0"),
+        }
+        row["driver"] = ttk.Combobox(grid, textvariable=row["driver_var"],
+                                     values=self.repo.driver_index.labels(), state="readonly",
+                                     font=("맑은 고딕", 13))
+        row["hours"] = tk.Entry(grid, textvariable=row["hours_var"], font=("맑은 고딕", 14),
+                                width=4, justify="center", bd=1, relief="solid")
+        row["minutes"] = tk.Entry(grid, textvariable=row["minutes_var"], font=("맑은 고딕", 14),
+                                  width=4, justify="center", bd=1, relief="solid")
+        row["remove"] = tk.Button(grid, text="✕", font=("맑은 고딕", 11),
+                                  bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=8,
+                                  cursor="hand2", command=lambda: self._remove_batch_row(row))
+
+        row["number"].grid(row=r, column=0, sticky="nw", padx=4, pady=4)
+        row["picker"].grid(row=r, column=1, sticky="new", padx=4, pady=4)
+        row["driver"].grid(row=r, column=2, sticky="new", padx=4, pady=4, ipady=4)
+        row["hours"].grid(row=r, column=3, sticky="n", padx=4, pady=4, ipady=4)
+        row["minutes"].grid(row=r, column=4, sticky="n", padx=4, pady=4, ipady=4)
+        row["remove"].grid(row=r, column=5, sticky="n", padx=4, pady=4)
+        self.batch_rows.append(row)
+        self._renumber_batch_rows()
+
+    def _remove_batch_row(self, row):
+        for key in ("number", "picker", "driver", "hours", "minutes", "remove"):
+            row[key].destroy()
+        self.batch_rows.remove(row)
+        self._renumber_batch_rows()
+
+    def _renumber_batch_rows(self):
+        for n, row in enumerate(self.batch_rows, 1):
+            row["number"].configure(text=str(n))
+
+    def _submit_batch(self):
+        items = []
+        errors = []
+        for n, row in enumerate(self.batch_rows, 1):
+            customer = self.repo.customer_index.get(row["picker"].selected_id)
+            driver = self.repo.driver_index.find_by_label(row["driver_var"].get())
+            play_hours = parse_play_hours(row["hours_var"].get(), row["minutes_var"].get())
+            if not (customer or driver or play_hours or row["picker"].var.get().strip()):
+                continue  # 빈 행
+            error = self.deductions.validate(customer, driver, play_hours)
+            if error:
+                errors.append(f"{n}행: {error}")
+            items.append((customer, driver, play_hours))
+
+        if errors:
+            more = f"\n외 {len(errors) - 10}건" if len(errors) > 10 else ""
+            messagebox.showerror("오류", "\n".join(errors[:10]) + more)
+            return
+        if not items:
+            messagebox.showerror("오류", "입력된 차감이 없습니다")
+            return
+        if not messagebox.askyesno("확인", f"{len(items)}건의 차감을 등록하시겠습니까?"):
+            return
+
+        # 모든 건의 기록을 만든 뒤에 한꺼번에 반영하고 저널 한 줄로 함께 기록한다
+        messages = self._deduct(items)
+
+        if self.outbox:
+            for record, msg in messages:
+                self._deliver(record, msg)
+            messagebox.showinfo("등록 완료", f"{len(messages)}건이 등록되었습니다.\n메시지를 알림톡으로 발송합니다.")
+            self.navigate("messages")
+            return
+        self._show_message_queue(messages)
+
+    def _show_message_queue(self, items):
+        self.clear_content()
+        pad = 30
+        self.message_queue = items
+        self.queue_rows = []
+
+        tk.Label(self.content_frame, text="📨 메시지 발송 대기열",
                  font=("맑은 고딕", 20, "bold"),
                  bg=COLORS["bg"], fg=COLORS["text_dark"]).pack(anchor="w", padx=pad, pady=(pad, 5))
-        tk.Label(self.content_frame, text=f"총 {len(self.records)}건의 차감 기록이 있습니다",
+        tk.Label(self.content_frame,
+                 text=f"{len(items)}건이 등록되었습니다. 차례로 복사해서 카카오톡에 붙여넣으세요",
                  font=("맑은 고딕", 12), bg=COLORS["bg"], fg=COLORS["text_muted"]
                  ).pack(anchor="w", padx=pad, pady=(0, 15))
 
-        sorted_records = sorted(self.records, key=lambda r: r.get("created_at", ""), reverse=True)
+        self.queue_next_btn = tk.Button(self.content_frame, font=("맑은 고딕", 16, "bold"),
+                                        bg=COLORS["kakao_yellow"], fg=COLORS["kakao_brown"],
+                                        bd=0, pady=12, cursor="hand2",
+                                        command=self._copy_next_in_queue)
+        self.queue_next_btn.pack(fill="x", padx=pad, pady=(0, 10))
 
-        for r in sorted_records:
+        for i, (record, msg) in enumerate(items):
             card = tk.Frame(self.content_frame, bg=COLORS["card_bg"],
                             highlightbackground=COLORS["border"], highlightthickness=1)
             card.pack(fill="x", padx=pad, pady=3)
-
             inner = tk.Frame(card, bg=COLORS["card_bg"])
-            inner.pack(fill="x", padx=20, pady=12)
-
-            # 왼쪽 정보
-            left = tk.Frame(inner, bg=COLORS["card_bg"])
-            left.pack(side="left", fill="x", expand=True)
+            inner.pack(fill="x", padx=20, pady=10)
 
-            name_frame = tk.Frame(left, bg=COLORS["card_bg"])
-            name_frame.pack(anchor="w")
-
-            tk.Label(name_frame, text=r.get("customer_name", ""),
-                     font=("맑은 고딕", 15, "bold"),
+            tk.Label(inner, text=f"{i + 1}. {record['customer_name']}",
+                     font=("맑은 고딕", 14, "bold"),
                      bg=COLORS["card_bg"], fg=COLORS["text_dark"]).pack(side="left")
+            tk.Label(inner, text=f"{record['driver_name']} · {format_time(record['play_hours'])}",
+                     font=("맑은 고딕", 11),
+                     bg=COLORS["card_bg"], fg=COLORS["text_muted"]).pack(side="left", padx=(10, 0))
+            tk.Button(inner, text="복사", font=("맑은 고딕", 12, "bold"),
+                      bg=COLORS["kakao_yellow"], fg=COLORS["kakao_brown"],
+                      bd=0, padx=12, pady=4, cursor="hand2",
+                      command=lambda n=i: self._copy_queue_item(n)).pack(side="right")
+            status = tk.Label(inner, font=("맑은 고딕", 10, "bold"), fg="white", padx=6, pady=1)
+            status.pack(side="right", padx=(0, 10))
+            self.queue_rows.append(status)
 
-            sent = r.get("message_sent", False)
-            status_text = "발송완료" if sent else "미발송"
-            status_color = COLORS["success"] if sent else COLORS["warning"]
-            tk.Label(name_frame, text=f" {status_text} ", font=("맑은 고딕", 10, "bold"),
-                     bg=status_color, fg="white", padx=6, pady=1).pack(side="left", padx=(8, 0))
+        tk.Button(self.content_frame, text="완료", font=("맑은 고딕", 13),
+                  bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=20, pady=8,
+                  cursor="hand2", command=lambda: self.navigate("batch")).pack(anchor="e", padx=pad, pady=15)
+        self._refresh_message_queue()
+
+    def _copy_queue_item(self, n):
+        record, msg = self.message_queue[n]
+        self.clipboard_transport.send(OutboxJob(record["id"], "", msg))
+        if not record.get("message_sent", False):
+            self._mark_sent(record)
+        self._refresh_message_queue()
+
+    def _copy_next_in_queue(self):
+        for n, (record, _) in enumerate(self.message_queue):
+            if not record.get("message_sent", False):
+                self._copy_queue_item(n)
+                return
 
-            info = f"{r.get('date', '')} · {r.get('driver_name', '')} · 정산 {format_number(r.get('total_pay', 0))}원"
-            tk.Label(left, text=info, font=("맑은 고딕", 11),
-                     bg=COLORS["card_bg"], fg=COLORS["text_muted"]).pack(anchor="w", pady=(3, 0))
+    def _refresh_message_queue(self):
+        sent = 0
+        for status, (record, _) in zip(self.queue_rows, self.message_queue):
+            if record.get("message_sent", False):
+                sent += 1
+                status.configure(text=" 복사됨 ", bg=COLORS["success"])
+            else:
+                status.configure(text=" 대기 ", bg=COLORS["warning"])
+        total = len(self.message_queue)
+        if sent < total:
+            self.queue_next_btn.configure(text=f"📋  다음 메시지 복사 ({sent + 1}/{total})",
+                                          state="normal")
+        else:
+            self.queue_next_btn.configure(text="✅  모든 메시지를 복사했습니다", state="disabled")
 
-            # 오른쪽: 시간 + 복사 버튼
-            right = tk.Frame(inner, bg=COLORS["card_bg"])
-            right.pack(side="right")
+    # ─── 알림 내역 ───
+    MESSAGE_ROW_HEIGHT = 86
 
-            tk.Label(right, text=f"{r.get('play_hours', 0)}시간",
-                     font=("맑은 고딕", 18, "bold"),
-                     bg=COLORS["card_bg"], fg=COLORS["primary"]).pack(side="left", padx=(0, 15))
+    @timed()
+    def show_messages(self):
+        self.clear_content()
+        pad = 30
 
-            tk.Button(right, text="복사", font=("맑은 고딕", 12, "bold"),
-                      bg=COLORS["kakao_yellow"], fg=COLORS["kakao_brown"],
-                      bd=0, padx=12, pady=5, cursor="hand2",
-                      command=lambda rec=r: self._copy_record_message(rec)).pack(side="left")
+        tk.Label(self.content_frame, text="📋 알림 내역",
+                 font=("맑은 고딕", 20, "bold"),
+                 bg=COLORS["bg"], fg=COLORS["text_dark"]).pack(anchor="w", padx=pad, pady=(pad, 5))
 
-        if not self.records:
+        top = tk.Frame(self.content_frame, bg=COLORS["bg"])
+        top.pack(fill="x", padx=pad, pady=(0, 15))
+        self.message_pager = self.repo.record_pager
+        total = self.message_pager.count()
+        self.message_count_label = tk.Label(top, font=("맑은 고딕", 12), bg=COLORS["bg"],
+                                            fg=COLORS["text_muted"])
+        self.message_count_label.pack(side="left")
+        self._update_message_count()
+
+        # 보관된 달 (고를 때만 보관 파일을 연다)
+        months = self.repo.archive.months()
+        self.message_month_var = None
+        if months:
+            self.message_month_var = tk.StringVar(value=self.RECENT_RECORDS)
+            month_combo = ttk.Combobox(top, textvariable=self.message_month_var, state="readonly",
+                                       values=[self.RECENT_RECORDS] + months[::-1],
+                                       width=10, font=("맑은 고딕", 11))
+            month_combo.pack(side="left", padx=(15, 0))
+            month_combo.bind("<<ComboboxSelected>>",
+                             lambda e: self._show_message_month(self.message_month_var.get()))
+
+        # 날짜로 이동
+        tk.Button(top, text="이동", font=("맑은 고딕", 11),
+                  bg=COLORS["primary"], fg="white", bd=0, padx=12, pady=3,
+                  cursor="hand2", command=lambda: self._jump_to_date(date_entry.get().strip())
+                  ).pack(side="right")
+        date_entry = tk.Entry(top, font=("맑은 고딕", 12), width=12, bd=1, relief="solid")
+        date_entry.pack(side="right", padx=(0, 5), ipady=3)
+        date_entry.insert(0, date.today().isoformat())
+        date_entry.bind("<Return>", lambda e: self._jump_to_date(date_entry.get().strip()))
+        tk.Label(top, text="날짜로 이동", font=("맑은 고딕", 11),
+                 bg=COLORS["bg"], fg=COLORS["text_muted"]).pack(side="right", padx=(0, 5))
+        if self.outbox and self.repo.stats.pending_count():
+            tk.Button(top, text="📨  미발송 전체 발송", font=("맑은 고딕", 11, "bold"),
+                      bg=COLORS["kakao_yellow"], fg=COLORS["kakao_brown"], bd=0, padx=12, pady=3,
+                      cursor="hand2", command=self._send_unsent).pack(side="right", padx=(0, 15))
+
+        handlers = {"record": self._on_record_added,
+                    "sent": self._refresh_message_row, "delivery": self._refresh_message_row}
+        if not total and not months:
+            self.message_list = None
             tk.Label(self.content_frame, text="알림 내역이 없습니다",
                      font=("맑은 고딕", 14), bg=COLORS["bg"],
                      fg=COLORS["text_muted"]).pack(pady=40)
+            # 첫 기록이 생기면 목록이 있는 화면으로 다시 만든다
+            self.watch("messages", handlers, self.show_messages)
+            return
+
+        self.message_list = VirtualList(self.content_frame, self.MESSAGE_ROW_HEIGHT,
+                                        self._make_message_row, self._fill_message_row,
+                                        bg=COLORS["bg"])
+        self.message_list.pack(fill="x", padx=pad)
+        self.message_list.pack_propagate(False)
+        self.active_list = self.message_list
+        self._fit_active_list()
+        self.message_list.set_source(total, self.message_pager.fetch)
+        self.watch("messages", handlers, self._refresh_messages)
+
+    RECENT_RECORDS = "최근 기록"
+
+    def _on_record_added(self, record):
+        if self.message_list is None:
+            self.show_messages()
+        elif self.message_pager is self.repo.record_pager:
+            # 새 기록은 맨 위에 들어가므로 개수만 맞추고 보이는 줄을 다시 채운다
+            self._update_message_count()
+            self.message_list.set_source(self.message_pager.count(), self.message_pager.fetch)
+
+    def _refresh_message_row(self, record_id):
+        if self.message_list is not None:
+            self.message_list.refresh_where(lambda r: r["id"] == record_id)
+
+    @timed()
+    def _refresh_messages(self):
+        if self.message_list is None:
+            self.show_messages()
+            return
+        self.message_pager.invalidate()
+        self._update_message_count()
+        self.message_list.set_source(self.message_pager.count(), self.message_pager.fetch)
+
+    def _update_message_count(self):
+        total = self.message_pager.count()
+        if self.message_pager is self.repo.record_pager:
+            text = f"총 {format_number(total)}건의 차감 기록이 있습니다"
+        else:
+            text = f"보관된 기록 {format_number(total)}건"
+        self.message_count_label.configure(text=text)
+
+    def _show_message_month(self, month):
+        """최근 기록과 보관된 달 사이를 오간다"""
+        if month == self.RECENT_RECORDS:
+            self.message_pager = self.repo.record_pager
+        else:
+            self.message_pager = RecordPager(self.repo.archive.load(month))
+        self.message_month_var.set(month)
+        self._update_message_count()
+        self.message_list.set_source(self.message_pager.count(), self.message_pager.fetch)
+
+    def _make_message_row(self, parent):
+        card = tk.Frame(parent, bg=COLORS["card_bg"],
+                        highlightbackground=COLORS["border"], highlightthickness=1)
+
+        inner = tk.Frame(card, bg=COLORS["card_bg"])
+        inner.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # 왼쪽 정보
+        left = tk.Frame(inner, bg=COLORS["card_bg"])
+        left.pack(side="left", fill="x", expand=True)
+
+        name_frame = tk.Frame(left, bg=COLORS["card_bg"])
+        name_frame.pack(anchor="w")
+
+        card.name_label = tk.Label(name_frame, font=("맑은 고딕", 15, "bold"),
+                                   bg=COLORS["card_bg"], fg=COLORS["text_dark"])
+        card.name_label.pack(side="left")
+        card.status_label = tk.Label(name_frame, font=("맑은 고딕", 10, "bold"),
+                                     fg="white", padx=6, pady=1)
+        card.status_label.pack(side="left", padx=(8, 0))
+
+        card.info_label = tk.Label(left, font=("맑은 고딕", 11),
+                                   bg=COLORS["card_bg"], fg=COLORS["text_muted"])
+        card.info_label.pack(anchor="w", pady=(3, 0))
+
+        # 오른쪽: 시간 + 복사 버튼
+        right = tk.Frame(inner, bg=COLORS["card_bg"])
+        right.pack(side="right")
+
+        card.hours_label = tk.Label(right, font=("맑은 고딕", 18, "bold"),
+                                    bg=COLORS["card_bg"], fg=COLORS["primary"])
+        card.hours_label.pack(side="left", padx=(0, 15))
+        card.copy_button = tk.Button(right, text="복사", font=("맑은 고딕", 12, "bold"),
+                                     bg=COLORS["kakao_yellow"], fg=COLORS["kakao_brown"],
+                                     bd=0, padx=12, pady=5, cursor="hand2")
+        card.copy_button.pack(side="left")
+        return card
+
+    def _fill_message_row(self, card, r):
+        card.name_label.configure(text=r.get("customer_name", ""))
+        if r.get("message_sent", False):
+            card.status_label.configure(text=" 발송완료 ", bg=COLORS["success"])
+        elif r["id"] in self.delivery_failures:
+            card.status_label.configure(text=" 발송실패 ", bg=COLORS["danger"])
+        elif self.outbox and self.outbox.has(r["id"]):
+            card.status_label.configure(text=" 발송중 ", bg=COLORS["primary"])
+        else:
+            card.status_label.configure(text=" 미발송 ", bg=COLORS["warning"])
+        card.info_label.configure(
+            text=f"{r.get('date', '')} · {r.get('driver_name', '')} · 정산 {format_number(r.get('total_pay', 0))}원")
+        card.hours_label.configure(text=f"{r.get('play_hours', 0)}시간")
+        card.copy_button.configure(command=lambda rec=r: self._copy_record_message(rec))
+
+    def _jump_to_date(self, day):
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            messagebox.showerror("오류", "날짜를 YYYY-MM-DD 형식으로 입력해주세요")
+            return
+        # 보관된 달이면 그 달의 보관 파일을 열어서 찾는다
+        month = day[:7] if day[:7] in self.repo.archive.months() else self.RECENT_RECORDS
+        if self.message_month_var and month != self.message_month_var.get():
+            self._show_message_month(month)
+        self.message_list.scroll_to_index(self.message_pager.index_of_date(day))
 
     def _copy_record_message(self, record):
-        customer = next((c for c in self.customers if c["id"] == record.get("customer_id")), None)
-        if not customer:
-            messagebox.showerror("오류", "고객 정보를 찾을 수 없습니다")
+        customer = self.repo.customer_index.get(record.get("customer_id"))
+        msg = self.renderer.record_message(record)
+        if msg is None:
+            if not customer:
+                messagebox.showerror("오류", "고객 정보를 찾을 수 없습니다")
+                return
+            msg = self.renderer.legacy_record_message(record, customer)
+        # 내역에서 다시 보내는 것은 언제나 클립보드로 한다
+        self._deliver(record, msg, customer or {}, transport=self.clipboard_transport)
+
+        messagebox.showinfo("복사 완료", "메시지가 클립보드에 복사되었습니다.\n카카오톡에 붙여넣기(Ctrl+V) 하세요!")
+
+    def _send_unsent(self):
+        """미발송 내역을 모두 알림톡 발송 대기열에 넣는다"""
+        unsent = [r for r in self.repo.records
+                  if not r.get("message_sent", False) and not self.outbox.has(r["id"])]
+        if not unsent:
+            messagebox.showinfo("알림", "발송할 미발송 내역이 없습니다")
             return
+        if not messagebox.askyesno("확인", f"미발송 {len(unsent)}건을 알림톡으로 발송하시겠습니까?"):
+            return
+        skipped = 0
+        for r in unsent:
+            customer = self.repo.customer_index.get(r.get("customer_id"))
+            if not customer:
+                skipped += 1
+                continue
+            msg = self.renderer.message_for(r, customer)
+            self.delivery_failures.pop(r["id"], None)
+            self._deliver(r, msg, customer)
+        if skipped:
+            messagebox.showwarning("알림", f"고객 정보가 없는 {skipped}건은 제외했습니다")
+        # 발송중 표시
+        self.message_list.refresh()
+
+    # ─── 메시지 발송 ───
+    OUTBOX_POLL_MS = 250
+
+    def _start_outbox(self):
+        """설정에 따라 게이트웨이 발송 대기열을 만들고 저장된 작업을 이어서 보낸다.
+
+        돌고 있는 대기열은 멈추라고만 하고, 보내던 요청이 끝나면 _restart_outbox 에서 바꾼다.
+        그동안 들어온 작업은 멈춘 대기열에 쌓였다가 남은 작업과 함께 저장된다.
+        """
+        old = self.outbox
+        if old is None:
+            self._open_outbox()
+            return
+        old.stop(wait=False)
+        events = self.delivery_events
 
-        msg = self._generate_preview_message(customer, record["play_hours"])
-        self.clipboard_clear()
-        self.clipboard_append(msg)
-        self.update()
+        def wait_stopped():
+            # 보내던 HTTP 요청을 UI 스레드에서 기다리지 않는다. 결과 알림 뒤에 오므로 발송 완료가 먼저 반영된다
+            old.join()
+            events.put(("stopped", old, None))
+
+        threading.Thread(target=wait_stopped, name="outbox-stop", daemon=True).start()
 
-        # 발송 완료 표시
-        for r in self.records:
-            if r["id"] == record["id"]:
-                r["message_sent"] = True
+    def _restart_outbox(self, old):
+        if self.outbox is not old or self.closing:
+            # 그사이 다시 시작했거나, 닫는 중이라 멈춘 대기열의 작업을 그대로 저장한다
+            return
+        # 멈춘 대기열의 남은 작업이 파일에 쓰인 뒤에 새 대기열이 읽는다
+        self._save_outbox()
+        self.persist.flush()
+        self.outbox = None
+        self._open_outbox()
+
+    def _open_outbox(self):
+        if self.repo.settings.get("delivery_mode", "clipboard") != "gateway":
+            return
+        try:
+            transport = HttpGatewayTransport(self.repo.settings.get("gateway_url", ""),
+                                             self.repo.settings.get("gateway_api_key", ""))
+        except ValueError as e:
+            log.warning("%s", e)
+            return
+        events = self.delivery_events
+        self.outbox = Outbox(transport,
+                             on_sent=lambda job: events.put(("sent", job, None)),
+                             on_failed=lambda job, error: events.put(("failed", job, str(error))),
+                             rate=self.repo.settings.get("gateway_rate", 10))
+        for data in load_json(OUTBOX_FILE, []):
+            job = OutboxJob.from_dict(data)
+            record = self.repo.records_by_id.get(job.record_id)
+            if record and not record.get("message_sent", False):
+                self.outbox.enqueue(job)
+
+    def _deliver(self, record, msg, customer=None, transport=None):
+        """메시지를 보낸다. 바로 끝났으면 True, 게이트웨이 대기열에 넣었으면 False"""
+        if customer is None:
+            customer = self.repo.customer_index.get(record.get("customer_id")) or {}
+        job = OutboxJob(record["id"], normalize_phone(customer.get("phone", "")), msg)
+        if transport is None and self.outbox:
+            self.outbox.enqueue(job)
+            self._save_outbox()
+            self.notify("delivery", record["id"])
+            return False
+        (transport or self.clipboard_transport).send(job)
+        if not record.get("message_sent", False):
+            self._mark_sent(record)
+        return True
+
+    def _save_outbox(self):
+        outbox = self.outbox
+        if outbox:
+            self.persist.save(OUTBOX_FILE, outbox.snapshot)
+
+    def _poll_outbox(self):
+        self._drain_delivery_events()
+        self.after(self.OUTBOX_POLL_MS, self._poll_outbox)
+
+    def _drain_delivery_events(self):
+        """작업 스레드가 알린 발송 결과를 UI 스레드에서 반영한다"""
+        changed = False
+        while True:
+            try:
+                kind, job, error = self.delivery_events.get_nowait()
+            except queue.Empty:
                 break
-        save_json(RECORDS_FILE, self.records)
+            changed = True
+            if kind == "stopped":
+                # job 자리에 멈춘 대기열이 온다
+                self._restart_outbox(job)
+                continue
+            record = self.repo.records_by_id.get(job.record_id)
+            if kind == "sent":
+                self.delivery_failures.pop(job.record_id, None)
+                if record and not record.get("message_sent", False):
+                    self._mark_sent(record)
+            else:
+                self.delivery_failures[job.record_id] = error
+                self.notify("delivery", job.record_id)
+        if changed:
+            self._save_outbox()
+        return changed
+
+    # ─── 기사 정산 ───
+    @timed()
+    def show_settlement(self):
+        self.clear_content()
+        pad = 30
 
-        messagebox.showinfo("복사 완료", "메시지가 클립보드에 복사되었습니다.\n카카오톡에 붙여넣기(Ctrl+V) 하세요!")
-        self.show_messages()
+        tk.Label(self.content_frame, text="💰 기사 정산",
+                 font=("맑은 고딕", 20, "bold"),
+                 bg=COLORS["bg"], fg=COLORS["text_dark"]).pack(anchor="w", padx=pad, pady=(pad, 5))
+        tk.Label(self.content_frame, text="기간별로 기사 정산 금액을 합산합니다",
+                 font=("맑은 고딕", 12), bg=COLORS["bg"], fg=COLORS["text_muted"]
+                 ).pack(anchor="w", padx=pad, pady=(0, 15))
+
+        # 조회 조건
+        bar = tk.Frame(self.content_frame, bg=COLORS["bg"])
+        bar.pack(fill="x", padx=pad, pady=(0, 10))
+        today = date.today()
+        self.settlement_period_var = tk.StringVar(value=SETTLEMENT_PERIODS["week"])
+        ttk.Combobox(bar, textvariable=self.settlement_period_var,
+                     values=list(SETTLEMENT_PERIODS.values()), state="readonly",
+                     width=6, font=("맑은 고딕", 12)).pack(side="left", ipady=3)
+        self.settlement_start = tk.Entry(bar, font=("맑은 고딕", 12), width=12, bd=1, relief="solid")
+        self.settlement_start.pack(side="left", padx=(10, 0), ipady=3)
+        self.settlement_start.insert(0, (today.replace(day=1) - timedelta(days=1)).replace(day=1).isoformat())
+        tk.Label(bar, text="~", font=("맑은 고딕", 12), bg=COLORS["bg"]).pack(side="left", padx=5)
+        self.settlement_end = tk.Entry(bar, font=("맑은 고딕", 12), width=12, bd=1, relief="solid")
+        self.settlement_end.pack(side="left", ipady=3)
+        self.settlement_end.insert(0, today.isoformat())
+        tk.Button(bar, text="조회", font=("맑은 고딕", 11, "bold"),
+                  bg=COLORS["primary"], fg="white", bd=0, padx=14, pady=3,
+                  cursor="hand2", command=self._refresh_settlement).pack(side="left", padx=(10, 0))
+        tk.Button(bar, text="📤  CSV 내보내기", font=("맑은 고딕", 11),
+                  bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=14, pady=3,
+                  cursor="hand2", command=self._export_settlement).pack(side="right")
+        self.settlement_period_var.trace_add("write", lambda *_: self._refresh_settlement())
+
+        # 기사별 합계
+        self.settlement_totals = tk.Frame(self.content_frame, bg=COLORS["bg"])
+        self.settlement_totals.pack(fill="x", padx=pad, pady=(0, 10))
+
+        # 기간별 표 (합계 행만 넣으므로 기록이 많아도 위젯 수는 기간 × 기사 수다)
+        table = tk.Frame(self.content_frame, bg=COLORS["bg"])
+        table.pack(fill="x", padx=pad, pady=(0, pad))
+        columns = ("period", "driver", "count", "hours", "pay")
+        self.settlement_tree = ttk.Treeview(table, columns=columns, show="headings", height=12)
+        for col, text, width, anchor in (("period", "기간", 240, "w"), ("driver", "기사", 140, "w"),
+                                         ("count", "건수", 80, "e"), ("hours", "플레이 시간", 140, "e"),
+                                         ("pay", "정산금액", 160, "e")):
+            self.settlement_tree.heading(col, text=text)
+            self.settlement_tree.column(col, width=width, anchor=anchor)
+        scrollbar = ttk.Scrollbar(table, orient="vertical", command=self.settlement_tree.yview)
+        self.settlement_tree.configure(yscrollcommand=scrollbar.set)
+        self.settlement_tree.pack(side="left", fill="x", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self._refresh_settlement()
+        self.watch("settlement", {"record": lambda record: self._refresh_settlement()},
+                   self._refresh_settlement)
+
+    def _settlement_query(self):
+        """(기간 단위, 시작일, 종료일). 날짜 형식이 틀리면 오류를 띄우고 None"""
+        period = next(k for k, v in SETTLEMENT_PERIODS.items() if v == self.settlement_period_var.get())
+        start = self.settlement_start.get().strip()
+        end = self.settlement_end.get().strip()
+        try:
+            for day in (start, end):
+                if day:
+                    date.fromisoformat(day)
+        except ValueError:
+            messagebox.showerror("오류", "날짜를 YYYY-MM-DD 형식으로 입력해주세요")
+            return None
+        return period, start or None, end or None
+
+    @timed()
+    def _refresh_settlement(self):
+        query = self._settlement_query()
+        if not query:
+            return
+        period, start, end = query
+
+        for w in self.settlement_totals.winfo_children():
+            w.destroy()
+        totals = self.repo.settlement.totals(start, end)
+        if not totals:
+            tk.Label(self.settlement_totals, text="해당 기간의 차감 기록이 없습니다",
+                     font=("맑은 고딕", 13), bg=COLORS["bg"], fg=COLORS["text_muted"]).pack(anchor="w")
+        for i, (driver, count, minutes, pay) in enumerate(totals):
+            card = tk.Frame(self.settlement_totals, bg=COLORS["card_bg"],
+                            highlightbackground=COLORS["border"], highlightthickness=1)
+            card.grid(row=i // 4, column=i % 4, sticky="ew", padx=(0, 8), pady=4)
+            tk.Label(card, text=driver, font=("맑은 고딕", 13, "bold"),
+                     bg=COLORS["card_bg"], fg=COLORS["text_dark"]).pack(anchor="w", padx=15, pady=(10, 0))
+            tk.Label(card, text=f"{format_number(pay)}원", font=("맑은 고딕", 18, "bold"),
+                     bg=COLORS["card_bg"], fg=COLORS["primary"]).pack(anchor="w", padx=15)
+            tk.Label(card, text=f"{count}건 · {format_time(minutes / 60)}", font=("맑은 고딕", 11),
+                     bg=COLORS["card_bg"], fg=COLORS["text_muted"]).pack(anchor="w", padx=15, pady=(0, 10))
+        for col in range(min(len(totals), 4)):
+            self.settlement_totals.columnconfigure(col, weight=1)
+
+        tree = self.settlement_tree
+        tree.delete(*tree.get_children())
+        for key, driver, count, minutes, pay in self.repo.settlement.rows(period, start, end):
+            tree.insert("", "end", values=(period_label(key, period), driver, count,
+                                           format_time(minutes / 60), f"{format_number(pay)}원"))
+
+    def _export_settlement(self):
+        query = self._settlement_query()
+        if not query:
+            return
+        period, start, end = query
+        filepath = filedialog.asksaveasfilename(
+            title="정산 내보내기", defaultextension=".csv",
+            initialfile=f"정산_{SETTLEMENT_PERIODS[period]}_{start or '처음'}_{end or '끝'}.csv",
+            filetypes=[("CSV 파일", "*.csv")])
+        if not filepath:
+            return
+        try:
+            export_settlement_csv(filepath, self.repo.settlement.rows(period, start, end), period)
+        except OSError as e:
+            messagebox.showerror("오류", f"파일을 저장하지 못했습니다:\n{e}")
+            return
+        messagebox.showinfo("내보내기 완료", f"정산 내역을 저장했습니다:\n{filepath}")
 
     # ─── 기사 관리 ───
+    @timed()
     def show_drivers(self):
         self.clear_content()
         pad = 30
@@ -945,7 +1903,7 @@ class AlimtalkManager(tk.Tk):
                   bg=COLORS["success"], fg="white", bd=0, padx=15, pady=8,
                   cursor="hand2", command=self._add_driver_dialog).pack(side="right")
 
-        for d in self.drivers:
+        for d in self.repo.drivers:
             card = tk.Frame(self.content_frame, bg=COLORS["card_bg"],
                             highlightbackground=COLORS["border"], highlightthickness=1)
             card.pack(fill="x", padx=pad, pady=4)
@@ -972,11 +1930,14 @@ class AlimtalkManager(tk.Tk):
                       cursor="hand2",
                       command=lambda did=d["id"]: self._delete_driver(did)).pack(side="left", padx=3)
 
+        # 기사 수가 적으므로 바뀌면 이 페이지만 다시 그린다
+        self.watch("drivers", {"driver": self.show_drivers}, self.show_drivers)
+
     def _add_driver_dialog(self):
         self._driver_dialog(None)
 
     def _edit_driver_dialog(self, driver_id):
-        driver = next((d for d in self.drivers if d["id"] == driver_id), None)
+        driver = self.repo.driver_index.get(driver_id)
         if driver:
             self._driver_dialog(driver)
 
@@ -1019,18 +1980,9 @@ class AlimtalkManager(tk.Tk):
                 return
             rate = float(rate_entry.get() or 5000)
 
-            if driver:
-                for d in self.drivers:
-                    if d["id"] == driver["id"]:
-                        d["name"] = name
-                        d["hourly_rate"] = rate
-                        break
-            else:
-                self.drivers.append({"id": generate_id(), "name": name, "hourly_rate": rate})
-
-            save_json(DRIVERS_FILE, self.drivers)
+            self.repo.save_driver(name, rate, driver["id"] if driver else None)
             dialog.destroy()
-            self.show_drivers()
+            self.notify("driver")
 
         btn_frame = tk.Frame(dialog, bg=COLORS["card_bg"])
         btn_frame.pack(fill="x", padx=30, pady=20)
@@ -1044,11 +1996,11 @@ class AlimtalkManager(tk.Tk):
 
     def _delete_driver(self, driver_id):
         if messagebox.askyesno("확인", "정말로 이 기사를 삭제하시겠습니까?"):
-            self.drivers = [d for d in self.drivers if d["id"] != driver_id]
-            save_json(DRIVERS_FILE, self.drivers)
-            self.show_drivers()
+            self.repo.delete_driver(driver_id)
+            self.notify("driver")
 
     # ─── 설정 ───
+    @timed()
     def show_settings(self):
         self.clear_content()
         pad = 30
@@ -1072,7 +2024,7 @@ class AlimtalkManager(tk.Tk):
                  bg=COLORS["card_bg"]).pack(anchor="w", pady=(0, 5))
         self.biz_name_entry = tk.Entry(form, font=("맑은 고딕", 16), bd=1, relief="solid")
         self.biz_name_entry.pack(fill="x", ipady=6)
-        self.biz_name_entry.insert(0, self.settings.get("business_name", ""))
+        self.biz_name_entry.insert(0, self.repo.settings.get("business_name", ""))
         tk.Label(form, text="카카오톡 메시지에 표시되는 업체명입니다",
                  font=("맑은 고딕", 11), bg=COLORS["card_bg"],
                  fg=COLORS["text_muted"]).pack(anchor="w", pady=(3, 15))
@@ -1083,15 +2035,68 @@ class AlimtalkManager(tk.Tk):
         self.template_text = tk.Text(form, font=("맑은 고딕", 13), height=16,
                                       bd=1, relief="solid", wrap="word")
         self.template_text.pack(fill="x")
-        self.template_text.insert("1.0", self.settings.get("message_template", ""))
+        self.template_text.insert("1.0", self.repo.settings.get("message_template", ""))
 
         # 변수 안내
         var_info = tk.Frame(form, bg="#F0F4F8")
         var_info.pack(fill="x", pady=(10, 0))
         tk.Label(var_info, text="사용 가능한 변수:", font=("맑은 고딕", 11, "bold"),
                  bg="#F0F4F8", fg=COLORS["text_muted"]).pack(anchor="w", padx=10, pady=(8, 2))
-        tk.Label(var_info, text="{업체명}  {고객명}  {플레이시간}  {누적시간}  {남은시간}",
-                 font=("맑은 고딕", 12), bg="#F0F4F8", fg=COLORS["primary"]).pack(anchor="w", padx=10, pady=(0, 8))
+        tk.Label(var_info, text="  ".join(f"{{{name}}}" for name in TEMPLATE_FIELDS),
+                 font=("맑은 고딕", 12), bg="#F0F4F8", fg=COLORS["primary"],
+                 wraplength=700, justify="left").pack(anchor="w", padx=10, pady=(0, 8))
+
+        # 발송 방식
+        tk.Label(form, text="메시지 발송 방식", font=("맑은 고딕", 14, "bold"),
+                 bg=COLORS["card_bg"]).pack(anchor="w", pady=(20, 5))
+        self.delivery_mode_var = tk.StringVar(value=self.repo.settings.get("delivery_mode", "clipboard"))
+        for value, text in (("clipboard", "클립보드에 복사 (카카오톡에 직접 붙여넣기)"),
+                            ("gateway", "알림톡 게이트웨이로 자동 발송")):
+            tk.Radiobutton(form, text=text, value=value, variable=self.delivery_mode_var,
+                           font=("맑은 고딕", 12), bg=COLORS["card_bg"],
+                           activebackground=COLORS["card_bg"]).pack(anchor="w")
+
+        gateway = tk.Frame(form, bg=COLORS["card_bg"])
+        gateway.pack(fill="x", pady=(5, 0))
+        gateway.columnconfigure(1, weight=1)
+        self.gateway_entries = {}
+        for row, (key, text) in enumerate((("gateway_url", "게이트웨이 주소"),
+                                           ("gateway_api_key", "API 키"),
+                                           ("gateway_rate", "초당 발송 한도"))):
+            tk.Label(gateway, text=text, font=("맑은 고딕", 12), bg=COLORS["card_bg"],
+                     fg=COLORS["text_muted"]).grid(row=row, column=0, sticky="w", padx=(0, 10), pady=3)
+            entry = tk.Entry(gateway, font=("맑은 고딕", 13), bd=1, relief="solid",
+                             show="*" if key == "gateway_api_key" else "")
+            entry.grid(row=row, column=1, sticky="ew", ipady=4, pady=3)
+            entry.insert(0, str(self.repo.settings.get(key, DEFAULT_SETTINGS[key])))
+            self.gateway_entries[key] = entry
+
+        # 기록 보관
+        tk.Label(form, text="기록 보관", font=("맑은 고딕", 14, "bold"),
+                 bg=COLORS["card_bg"]).pack(anchor="w", pady=(20, 5))
+        archive_row = tk.Frame(form, bg=COLORS["card_bg"])
+        archive_row.pack(fill="x")
+        self.archive_months_entry = tk.Entry(archive_row, font=("맑은 고딕", 13), width=5,
+                                             bd=1, relief="solid")
+        self.archive_months_entry.pack(side="left", ipady=4)
+        self.archive_months_entry.insert(
+            0, str(self.repo.settings.get("archive_months", DEFAULT_SETTINGS["archive_months"])))
+        tk.Label(archive_row, text="개월보다 오래되고 발송이 끝난 기록은 보관 파일로 옮깁니다 (0 이면 보관 안 함)",
+                 font=("맑은 고딕", 11), bg=COLORS["card_bg"],
+                 fg=COLORS["text_muted"]).pack(side="left", padx=(8, 0))
+
+        # 성능 계측
+        tk.Label(form, text="성능 계측", font=("맑은 고딕", 14, "bold"),
+                 bg=COLORS["card_bg"]).pack(anchor="w", pady=(20, 5))
+        metrics_row = tk.Frame(form, bg=COLORS["card_bg"])
+        metrics_row.pack(fill="x")
+        self.instrumentation_var = tk.BooleanVar(value=metrics.enabled)
+        tk.Checkbutton(metrics_row, text="화면·저장 소요 시간 기록 (F12 로 계측 창 열기)",
+                       variable=self.instrumentation_var, font=("맑은 고딕", 12),
+                       bg=COLORS["card_bg"], activebackground=COLORS["card_bg"]).pack(side="left")
+        tk.Button(metrics_row, text="계측 창 열기", font=("맑은 고딕", 11),
+                  bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=12, pady=4,
+                  cursor="hand2", command=self._open_metrics_panel).pack(side="left", padx=(10, 0))
 
         # 버튼
         btn_frame = tk.Frame(form, bg=COLORS["card_bg"])
@@ -1103,28 +2108,269 @@ class AlimtalkManager(tk.Tk):
         tk.Button(btn_frame, text="초기화", font=("맑은 고딕", 13),
                   bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=20, pady=10,
                   cursor="hand2", command=self._reset_settings).pack(side="left")
+        tk.Button(btn_frame, text="📤  데이터 내보내기", font=("맑은 고딕", 13),
+                  bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=20, pady=10,
+                  cursor="hand2", command=self._export_data).pack(side="right")
+
+        # 시작 시간 (느려졌는지 확인용, 전체 기록은 startup.log)
+        times = self.startup_times
+        tk.Label(form, text=f"이번 실행 시작 시간: 가져오기 {times['import']:.2f}초 · "
+                            f"창 표시 {times.get('window', 0):.2f}초 · 데이터 {times['load']:.2f}초 · "
+                            f"첫 화면 {times.get('first_page', 0):.2f}초",
+                 font=("맑은 고딕", 10), bg=COLORS["card_bg"],
+                 fg=COLORS["text_muted"]).pack(anchor="w", pady=(15, 0))
 
     def _save_settings(self):
-        self.settings["business_name"] = self.biz_name_entry.get().strip()
-        self.settings["message_template"] = self.template_text.get("1.0", "end-1c")
-        save_json(SETTINGS_FILE, self.settings)
+        template = self.template_text.get("1.0", "end-1c")
+        unknown = compile_template(template).unknown_fields
+        if unknown:
+            messagebox.showerror(
+                "오류", "알 수 없는 변수가 있습니다: " + ", ".join(f"{{{name}}}" for name in unknown)
+                + "\n\n사용 가능한 변수: " + " ".join(f"{{{name}}}" for name in TEMPLATE_FIELDS))
+            return
+        mode = self.delivery_mode_var.get()
+        url = self.gateway_entries["gateway_url"].get().strip()
+        try:
+            rate = float(self.gateway_entries["gateway_rate"].get())
+        except ValueError:
+            rate = 0
+        if rate <= 0:
+            messagebox.showerror("오류", "초당 발송 한도는 0보다 큰 숫자여야 합니다")
+            return
+        try:
+            archive_months = int(self.archive_months_entry.get() or 0)
+        except ValueError:
+            archive_months = -1
+        if archive_months < 0:
+            messagebox.showerror("오류", "보관 기준은 0 이상의 개월 수로 입력해주세요")
+            return
+        if mode == "gateway":
+            try:
+                HttpGatewayTransport(url)
+            except ValueError as e:
+                messagebox.showerror("오류", str(e))
+                return
+
+        self.repo.settings["business_name"] = self.biz_name_entry.get().strip()
+        self.repo.settings["message_template"] = template
+        self.repo.settings["delivery_mode"] = mode
+        self.repo.settings["gateway_url"] = url
+        self.repo.settings["gateway_api_key"] = self.gateway_entries["gateway_api_key"].get().strip()
+        self.repo.settings["gateway_rate"] = rate
+        self.repo.settings["archive_months"] = archive_months
+        self.repo.settings["instrumentation"] = self.instrumentation_var.get()
+        if self.repo.settings["instrumentation"]:
+            metrics.enable()
+        elif not os.environ.get("ALIMTALK_PROFILE"):
+            metrics.disable()
+        self.repo.save_settings()
+        self._start_outbox()
+        self.notify("settings")
         messagebox.showinfo("저장 완료", "설정이 저장되었습니다")
 
+    def _export_data(self):
+        folder = filedialog.askdirectory(title="내보낼 폴더 선택")
+        if not folder:
+            return
+        export_json(os.path.join(folder, "customers.json"), self.repo.customers)
+        # 보관 파일로 옮긴 기록까지 모두 내보낸다. 달마다 읽어 바로 쓰므로 한꺼번에 메모리에 올리지 않는다
+        archived = (r for month in self.repo.archive.months() for r in self.repo.archive.stream(month))
+        export_json_array(os.path.join(folder, "records.json"), itertools.chain(archived, self.repo.records))
+        export_json(os.path.join(folder, "drivers.json"), self.repo.drivers)
+        export_json(os.path.join(folder, "settings.json"), self.repo.settings)
+        export_json(os.path.join(folder, "message_templates.json"), self.repo.templates.texts)
+        export_json(os.path.join(folder, "ledger.json"), self.repo.ledger.adjustments)
+        messagebox.showinfo("내보내기 완료", f"데이터를 내보냈습니다:\n{folder}")
+
     def _reset_settings(self):
         if messagebox.askyesno("확인", "기본 설정으로 초기화하시겠습니까?"):
-            self.settings = DEFAULT_SETTINGS.copy()
-            save_json(SETTINGS_FILE, self.settings)
+            self.repo.reset_settings()
+            self._start_outbox()
+            self.notify("settings")
             self.show_settings()
 
+    # ─── 성능 계측 창 ───
+    METRICS_REFRESH_MS = 1000
+
+    def _open_metrics_panel(self):
+        """구간별 소요 시간 백분위와 위젯 수를 보여주고 cProfile 로 한 동작을 잡는 창"""
+        if getattr(self, "metrics_panel", None) is not None and self.metrics_panel.winfo_exists():
+            self.metrics_panel.lift()
+            return
+        if not metrics.enabled:
+            if not messagebox.askyesno("성능 계측", "성능 계측이 꺼져 있습니다. 지금 켜시겠습니까?"):
+                return
+            metrics.enable()
+
+        panel = tk.Toplevel(self)
+        panel.title("성능 계측")
+        panel.geometry("720x460")
+        panel.configure(bg=COLORS["bg"])
+        self.metrics_panel = panel
+
+        columns = ("calls", "p50", "p90", "p99", "max")
+        tree = ttk.Treeview(panel, columns=columns, height=14)
+        tree.heading("#0", text="구간")
+        tree.column("#0", width=240)
+        for col, text in zip(columns, ("호출 수", "p50 (ms)", "p90 (ms)", "p99 (ms)", "최대 (ms)")):
+            tree.heading(col, text=text)
+            tree.column(col, width=90, anchor="e")
+        tree.pack(fill="both", expand=True, padx=15, pady=(15, 5))
+
+        widgets_label = tk.Label(panel, font=("맑은 고딕", 11), bg=COLORS["bg"],
+                                 fg=COLORS["text_muted"])
+        widgets_label.pack(anchor="w", padx=15)
+
+        btns = tk.Frame(panel, bg=COLORS["bg"])
+        btns.pack(fill="x", padx=15, pady=10)
+        capture = ProfileCapture()
+
+        def toggle_profile():
+            if capture.running:
+                path = capture.stop(self.current_page or "capture")
+                profile_btn.config(text="⏺  프로파일 시작")
+                messagebox.showinfo("프로파일 저장", f"프로파일을 저장했습니다:\n{path}", parent=panel)
+            else:
+                capture.start()
+                profile_btn.config(text="⏹  프로파일 중지")
+
+        def on_close():
+            if capture.running:
+                capture.stop(self.current_page or "capture")
+            self.metrics_panel = None
+            panel.destroy()
+
+        profile_btn = tk.Button(btns, text="⏺  프로파일 시작", font=("맑은 고딕", 12),
+                                bg=COLORS["primary"], fg="white", bd=0, padx=15, pady=6,
+                                cursor="hand2", command=toggle_profile)
+        profile_btn.pack(side="left")
+        tk.Button(btns, text="초기화", font=("맑은 고딕", 12),
+                  bg=COLORS["border"], fg=COLORS["text_dark"], bd=0, padx=15, pady=6,
+                  cursor="hand2", command=metrics.reset).pack(side="left", padx=(10, 0))
+        tk.Label(btns, text=f"프로파일 저장 위치: {PROFILE_DIR}", font=("맑은 고딕", 10),
+                 bg=COLORS["bg"], fg=COLORS["text_muted"]).pack(side="right")
+        panel.protocol("WM_DELETE_WINDOW", on_close)
+
+        def refresh():
+            if not panel.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for name, calls, p50, p90, p99, worst in metrics.summary():
+                tree.insert("", "end", text=name, values=(
+                    calls, f"{p50 * 1000:.1f}", f"{p90 * 1000:.1f}",
+                    f"{p99 * 1000:.1f}", f"{worst * 1000:.1f}"))
+            created = metrics.counters["widgets created"]
+            destroyed = metrics.counters["widgets destroyed"]
+            widgets_label.config(text=f"위젯 생성 {created:,} · 삭제 {destroyed:,} · "
+                                      f"차이 {created - destroyed:,}")
+            panel.after(self.METRICS_REFRESH_MS, refresh)
+
+        refresh()
+
     # ─── 종료 처리 ───
     def on_closing(self):
-        save_json(CUSTOMERS_FILE, self.customers)
-        save_json(RECORDS_FILE, self.records)
-        save_json(DRIVERS_FILE, self.drivers)
-        save_json(SETTINGS_FILE, self.settings)
+        if not self.loaded:
+            # 불러오는 중에 닫으면 읽기가 끝날 때까지 기다렸다가 정리한다
+            self._load_thread.join()
+            if self._load_error is not None:
+                self.repo.release()
+                self.destroy()
+                return
+        # 변경이 있었던 데이터만 저장되어 있으므로 남은 작업만 마무리한다
+        self.closing = True
+        if self.outbox:
+            # 못 보낸 메시지는 outbox.json 에 남겨 다음 실행 때 이어서 보낸다
+            self.outbox.stop()
+            self._drain_delivery_events()
+            self._save_outbox()
+        failed = self.repo.close()
+        if failed:
+            messagebox.showwarning("저장 실패", f"일부 데이터를 저장하지 못했습니다: {', '.join(failed)}")
         self.destroy()
 
 
-if __name__ == "__main__":
+# ─── 화면 벤치마크 ───
+def benchmark_ui(bench, repo=None):
+    """페이지 그리기와 차감 화면의 고객 조회·미리보기 시간을 잰다. 화면을 띄울 수 없으면 건너뛴다"""
+    try:
+        app = AlimtalkManager()
+    except tk.TclError as e:
+        print(f"  화면을 띄울 수 없어 화면 구간은 건너뜁니다: {e}")
+        return
+    try:
+        app._load_thread.join()
+        app._wait_for_data()
+        if not app.loaded:
+            return
+        # 같은 메뉴를 다시 누르면 페이지를 새로 그린다
+        for page in ("dashboard", "customers", "messages"):
+            app.navigate(page)
+            app.update()
+            bench.time(f"show_{page}", lambda p=page: (app.navigate(p), app.update_idletasks()))
+
+        app.navigate("play_record")
+        app.update()
+        customers = app.repo.customers
+        ids = [c["id"] for c in customers[::max(1, len(customers) // 1000)]]
+        counter = itertools.count()
+
+        def select():
+            app.selected_customer_id = ids[next(counter) % len(ids)]
+            return app._get_selected_customer()
+
+        bench.time("_get_selected_customer", select, number=10000)
+        driver = app.repo.drivers[0]
+        bench.time("_generate_preview_message",
+                   lambda: app._generate_preview_message(select(), 2.5, driver), number=1000)
+    finally:
+        # 벤치마크 데이터는 그대로 두어야 하므로 저널을 합치지 않고 닫는다
+        app.repo.release()
+        app.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="알림톡 관리 시스템")
+    parser.add_argument("--migrate-sqlite", action="store_true",
+                        help="JSON 데이터를 SQLite 저장소(alimtalk.db)로 옮깁니다")
+    parser.add_argument("--mock-gateway", type=int, metavar="PORT", nargs="?", const=8089,
+                        help="시험용 알림톡 게이트웨이를 실행합니다 (기본 포트 8089)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="시험용 게이트웨이가 실패로 응답할 비율 (0~1)")
+    parser.add_argument("--bench-outbox", type=int, metavar="COUNT", nargs="?", const=1000,
+                        help="시험용 게이트웨이로 발송 처리량을 측정합니다")
+    parser.add_argument("--bench", action="store_true",
+                        help="합성 데이터로 저장·집계·화면 그리기 속도를 재고 기준값과 비교합니다")
+    bench.add_arguments(parser.add_argument_group("벤치마크 옵션 (--bench)"))
+    args = parser.parse_args(argv)
+
+    if args.migrate_sqlite:
+        try:
+            migrate_json_to_sqlite()
+        except DataLockedError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        return
+    if args.mock_gateway is not None:
+        gateway = MockGateway(port=args.mock_gateway, failure_rate=args.failure_rate).start()
+        print(f"시험용 게이트웨이 실행 중: {gateway.url} (Ctrl+C 로 종료)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            gateway.stop()
+        return
+    if args.bench_outbox is not None:
+        benchmark_outbox(args.bench_outbox, failure_rate=args.failure_rate or 0.1)
+        return
+    if args.bench:
+        code = bench.run_isolated(args, [sys.executable, os.path.abspath(__file__), "--bench"])
+        if code is None:
+            code = bench.run(args, extra_cases=benchmark_ui)
+        sys.exit(code)
+
     app = AlimtalkManager()
     app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""테스트 공통 준비.
+
+데이터 파일 경로는 alimtalk.config 를 불러올 때 정해지므로, 불러오기 전에
+ALIMTALK_DATA_DIR 을 임시 폴더로 돌려 둔다. 테스트마다 그 폴더를 비운다.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+os.environ["ALIMTALK_DATA_DIR"] = tempfile.mkdtemp(prefix="alimtalk-test-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alimtalk import config, storage  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def data_dir():
+    """비어 있는 데이터 폴더. SQLite 저장소와 복구 알림도 초기화한다"""
+    if storage._store is not None:
+        storage._store.close()
+        storage._store = None
+    shutil.rmtree(config.DATA_DIR, ignore_errors=True)
+    storage.ensure_data_dir()
+    del config.RECOVERED_FILES[:]
+    yield config.DATA_DIR
+    if storage._store is not None:
+        storage._store.close()
+        storage._store = None
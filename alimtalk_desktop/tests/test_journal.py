@@ -0,0 +1,153 @@
+"""변경 저널 다시 적용과 압축"""
+
+import os
+
+from alimtalk.config import CUSTOMERS_FILE, JOURNAL_FILE, RECORDS_FILE
+from alimtalk.models import Customer, Record
+from alimtalk.storage import PersistenceWorker, RecordJournal, load_json, load_json_array
+
+
+def make_record(record_id, customer_id="c1", minutes=90, created_at="2024-03-01T10:00:00"):
+    return Record.from_dict({
+        "id": record_id, "customer_id": customer_id, "customer_name": "홍길동",
+        "driver_name": "기사A", "play_hours": minutes / 60, "hourly_rate": 5000,
+        "total_pay": round(minutes * 5000 / 60), "date": created_at[:10], "message_sent": False,
+        "created_at": created_at, "used_before": 0, "used_after": minutes / 60,
+        "remaining_after": 10 - minutes / 60, "message": {"template": "t1", "values": ["a", "b"]},
+    })
+
+
+def make_customer(customer_id="c1", used_hours=0):
+    return Customer.from_dict({"id": customer_id, "name": "홍길동", "phone": "010-1234-5678",
+                               "game_name": "리니지", "total_hours": 10, "used_hours": used_hours,
+                               "memo": "", "created_at": "2024-01-01T00:00:00"})
+
+
+def replayed():
+    customers, records = [make_customer()], []
+    applied = RecordJournal(JOURNAL_FILE).replay(customers, records)
+    return customers, records, applied
+
+
+def test_replay_applies_each_op_in_order():
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append("record", record=make_record("r1").to_dict())
+    journal.append("used_hours", id="c1", value=1.5)
+    journal.append("sent", id="r1")
+    journal.append("customer", customer=make_customer("c2").to_dict())
+    journal.append("customer_deleted", id="c1")
+    journal.close()
+
+    customers, records, applied = replayed()
+    assert applied == 5
+    assert [c["id"] for c in customers] == ["c2"]
+    assert [r["id"] for r in records] == ["r1"]
+    assert isinstance(records[0], Record)
+    assert records[0]["message_sent"] is True
+
+
+def test_replay_updates_existing_customer_in_place():
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append("customer", customer=dict(make_customer().to_dict(), memo="단골"))
+    journal.close()
+    customers, _, _ = replayed()
+    assert len(customers) == 1
+    assert customers[0]["memo"] == "단골"
+
+
+def test_replay_skips_records_already_in_snapshot():
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append("record", record=make_record("r1").to_dict())
+    journal.close()
+    records = [make_record("r1")]
+    RecordJournal(JOURNAL_FILE).replay([make_customer()], records)
+    assert len(records) == 1
+
+
+def test_batch_applies_all_entries():
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append_batch([
+        {"op": "record", "record": make_record("r1").to_dict()},
+        {"op": "record", "record": make_record("r2").to_dict()},
+        {"op": "used_hours", "id": "c1", "value": 3},
+    ])
+    journal.close()
+    customers, records, applied = replayed()
+    assert applied == 1
+    assert [r["id"] for r in records] == ["r1", "r2"]
+    assert customers[0]["used_hours"] == 3
+
+
+def test_torn_last_line_drops_the_whole_batch():
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append("record", record=make_record("r1").to_dict())
+    journal.append_batch([{"op": "record", "record": make_record("r2").to_dict()},
+                          {"op": "used_hours", "id": "c1", "value": 3}])
+    journal.close()
+    with open(JOURNAL_FILE, "rb+") as f:
+        f.truncate(os.path.getsize(JOURNAL_FILE) - 10)
+
+    customers, records, applied = replayed()
+    assert applied == 1
+    assert [r["id"] for r in records] == ["r1"]
+    assert customers[0]["used_hours"] == 0
+
+
+def test_compact_writes_snapshots_and_empties_journal():
+    customers, records = [make_customer()], []
+    journal = RecordJournal(JOURNAL_FILE)
+    records.append(make_record("r1"))
+    journal.append("record", record=records[0].to_dict())
+    assert journal.needs_compact()
+
+    journal.compact(customers, records)
+    journal.close()
+    assert not os.path.exists(JOURNAL_FILE)
+    assert not os.path.exists(journal.old_path)
+    assert not journal.needs_compact()
+    assert [r["id"] for r in load_json_array(RECORDS_FILE, [])] == ["r1"]
+    assert load_json(CUSTOMERS_FILE, []) == [make_customer().to_dict()]
+
+
+def test_compact_without_changes_is_skipped_unless_forced():
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.compact([make_customer()], [])
+    assert not os.path.exists(CUSTOMERS_FILE)
+    journal.compact([make_customer()], [], force=True)
+    assert os.path.exists(CUSTOMERS_FILE)
+
+
+def test_unfinished_compaction_is_merged_and_replayed():
+    # 이전 압축이 스냅샷을 쓰기 전에 끊겨 .old 가 남은 상태
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append("record", record=make_record("r1").to_dict())
+    journal.close()
+    os.replace(JOURNAL_FILE, journal.old_path)
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append("record", record=make_record("r2", created_at="2024-03-02T10:00:00").to_dict())
+    journal.close()
+
+    customers, records, applied = replayed()
+    assert applied == 2
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.compact(customers, records, force=True)
+    assert not os.path.exists(journal.old_path)
+    assert [r["id"] for r in load_json_array(RECORDS_FILE, [])] == ["r1", "r2"]
+
+
+def test_background_compact_keeps_snapshot_of_the_moment():
+    worker = PersistenceWorker(delay=0)
+    journal = RecordJournal(JOURNAL_FILE, worker=worker)
+    customers, records = [make_customer()], [make_record("r1")]
+    journal.append("record", record=records[0].to_dict())
+    journal.compact(customers, records, background=True)
+    # 압축을 맡긴 뒤의 변경은 새 로그로 간다
+    customers[0]["used_hours"] = 2
+    journal.append("used_hours", id="c1", value=2)
+    worker.stop()
+    journal.close()
+
+    assert load_json(CUSTOMERS_FILE, [])[0]["used_hours"] == 0
+    reloaded = load_json_array(CUSTOMERS_FILE, [], factory=Customer.from_dict)
+    RecordJournal(JOURNAL_FILE).replay(reloaded, [])
+    assert reloaded[0]["used_hours"] == 2
@@ -0,0 +1,131 @@
+"""시간 원장: 시점별 잔액과 고객 정보 맞추기"""
+
+import random
+
+import pytest
+
+from alimtalk.ledger import Ledger
+from alimtalk.models import Customer, Record
+
+
+def deduction(n, minutes, at, customer_id="c1"):
+    return Record.from_dict({"id": f"r{n}", "customer_id": customer_id, "created_at": at,
+                             "play_hours": minutes / 60})
+
+
+def purchase(minutes, at, customer_id="c1", kind="purchase"):
+    return {"id": f"a-{at}-{kind}", "customer_id": customer_id, "kind": kind, "minutes": minutes,
+            "at": at, "note": ""}
+
+
+def customer(customer_id="c1", total_hours=0, used_hours=0):
+    return Customer.from_dict({"id": customer_id, "name": customer_id, "total_hours": total_hours,
+                               "used_hours": used_hours})
+
+
+def brute_force(records, adjustments, when, inclusive=True):
+    purchased = used = 0
+    for r in records:
+        if r.created_at <= when if inclusive else r.created_at < when:
+            used += r.minutes
+    for a in adjustments:
+        if a["at"] <= when if inclusive else a["at"] < when:
+            if a["kind"] == "purchase":
+                purchased += a["minutes"]
+            else:
+                used += a["minutes"]
+    return purchased, used
+
+
+@pytest.fixture
+def small_checkpoints(monkeypatch):
+    monkeypatch.setattr(Ledger, "CHECKPOINT_EVERY", 4)
+
+
+def test_balance_as_of_matches_a_full_scan(small_checkpoints):
+    rng = random.Random(5)
+    times = sorted(f"2024-03-{d:02d}T{h:02d}:00:00" for d in range(1, 21) for h in (9, 15))
+    records = [deduction(n, rng.choice((30, 60, 90)), at) for n, at in enumerate(times)]
+    adjustments = [purchase(600, "2024-03-01T08:00:00"), purchase(300, "2024-03-10T15:00:00"),
+                   purchase(45, "2024-03-12T09:00:00", kind="correction")]
+    ledger = Ledger(adjustments, records)
+
+    assert ledger.balance("c1") == brute_force(records, adjustments, "9999")
+    for at in times + ["2024-02-28", "2024-03-10T15:00:00", "2024-04-01"]:
+        assert ledger.balance_as_of("c1", at) == brute_force(records, adjustments, at)
+        assert ledger.balance_as_of("c1", at, inclusive=False) == brute_force(
+            records, adjustments, at, inclusive=False)
+
+
+def test_date_only_includes_the_whole_day():
+    ledger = Ledger([purchase(120, "2024-03-01T08:00:00")],
+                    [deduction(1, 60, "2024-03-01T23:30:00"), deduction(2, 30, "2024-03-02T00:10:00")])
+    assert ledger.balance_as_of("c1", "2024-03-01") == (120, 60)
+    assert ledger.balance_as_of("c1", "2024-03-01", inclusive=False) == (0, 0)
+    assert ledger.balance_as_of("unknown", "2024-03-01") == (0, 0)
+
+
+def test_late_entries_are_placed_in_time_order(small_checkpoints):
+    records = [deduction(n, 60, f"2024-03-{n + 1:02d}T10:00:00") for n in range(10)]
+    ledger = Ledger([], records)
+    adjustments = ledger.adjustments
+    ledger.adjust("c1", "purchase", 600, at="2024-03-03T00:00:00")
+    ledger.add_deduction(deduction(99, 30, "2024-03-05T12:00:00"))
+    records.append(deduction(99, 30, "2024-03-05T12:00:00"))
+
+    for day in range(1, 12):
+        at = f"2024-03-{day:02d}"
+        assert ledger.balance_as_of("c1", at) == brute_force(records, adjustments, at + "T24")
+    assert ledger.remaining("c1") == 600 - 630
+
+
+def test_zero_adjustment_is_not_recorded():
+    ledger = Ledger([], [])
+    assert ledger.adjust("c1", "purchase", 0) is None
+    assert ledger.adjustments == []
+
+
+def test_archived_months_count_as_used():
+    ledger = Ledger([purchase(600, ""), purchase(90, "2024-01-31T20:00:00", kind="archived")],
+                    [deduction(1, 60, "2024-03-01T10:00:00")])
+    assert ledger.balance("c1") == (600, 150)
+
+
+def test_reconcile_books_opening_balance_before_all_deductions():
+    ledger = Ledger([], [deduction(1, 60, "2024-03-01T10:00:00")])
+    c = customer(total_hours=10, used_hours=3)
+    assert ledger.reconcile([c]) == []
+    assert {a["note"] for a in ledger.adjustments} == {"기초 잔액"}
+    assert ledger.balance("c1") == (600, 180)
+    assert ledger.balance_as_of("c1", "2024-01-01") == (600, 120)
+    assert (c["total_hours"], c["used_hours"]) == (10, 3)
+
+
+def test_reconcile_reports_drift_after_opening():
+    adjustments = []
+    Ledger(adjustments, []).reconcile([customer(total_hours=10, used_hours=3)])
+    c = customer(total_hours=12, used_hours=3)
+    ledger = Ledger(adjustments, [])
+    assert ledger.reconcile([c]) == [("c1", 120, 0)]
+    assert adjustments[-1]["note"] == "불일치 보정"
+    assert ledger.reconcile([c]) == []
+
+
+def test_zero_opening_balance_is_remembered():
+    adjustments = []
+    Ledger(adjustments, []).reconcile([customer()])
+    assert [a["kind"] for a in adjustments] == ["opening"]
+
+    # 다음 실행 때 customers.json 이 어긋나 있으면 기초 잔액이 아니라 불일치다
+    c = customer(total_hours=2)
+    ledger = Ledger(adjustments, [])
+    assert ledger.balance("c1") == (0, 0)
+    assert ledger.reconcile([c]) == [("c1", 120, 0)]
+    assert adjustments[-1]["note"] == "불일치 보정"
+
+
+def test_archived_only_customer_still_gets_an_opening_balance():
+    ledger = Ledger([purchase(90, "2024-01-31T20:00:00", kind="archived")], [])
+    c = customer(total_hours=10, used_hours=1.5)
+    assert ledger.reconcile([c]) == []
+    assert ledger.balance("c1") == (600, 90)
@@ -0,0 +1,81 @@
+"""__slots__ 모델과 JSON 사이를 오가도 값이 그대로인지"""
+
+import json
+
+import pytest
+
+from alimtalk.models import Customer, Record
+from alimtalk.storage import dump_json
+
+RECORD = {
+    "id": "r1", "customer_id": "c1", "customer_name": "홍길동", "driver_name": "기사A",
+    "play_hours": 1.5, "hourly_rate": 5000, "total_pay": 7500, "date": "2024-03-01",
+    "message_sent": False, "created_at": "2024-03-01T10:00:00", "used_before": 2,
+    "used_after": 3.5, "remaining_after": 6.5,
+    "message": {"template": "t1", "values": ["홍길동", "1시간 30분"]},
+}
+
+
+def round_trip(cls, data):
+    obj = cls.from_dict(json.loads(json.dumps(data)))
+    return obj, json.loads(dump_json(obj))
+
+
+def test_full_record_takes_the_fast_path():
+    r, back = round_trip(Record, RECORD)
+    assert r.extra is None
+    assert (r.minutes, r.used_before_minutes, r.remaining_after_minutes) == (90, 120, 390)
+    assert back == RECORD
+    assert list(back) == list(RECORD)
+    assert r["message"] == RECORD["message"]
+
+
+@pytest.mark.parametrize("change", [
+    {"play_hours": 1 / 7},                        # 분으로 떨어지지 않는 시간
+    {"remaining_after": -0.1},
+    {"hourly_rate": 5000.5},                      # 정수가 아닌 금액
+    {"message": "예전 형식의 메시지 본문"},
+    {"message": {"template": "t1", "values": ["a"], "extra": 1}},
+    {"memo": "모르는 키"},
+])
+def test_unusual_records_round_trip_unchanged(change):
+    data = dict(RECORD, **change)
+    r, back = round_trip(Record, data)
+    assert back == data
+    assert Record.from_dict(back).to_dict() == data
+
+
+def test_old_record_with_missing_keys_round_trips():
+    data = {k: v for k, v in RECORD.items() if k not in ("message", "used_before", "used_after",
+                                                          "remaining_after")}
+    _, back = round_trip(Record, data)
+    assert back == data
+
+
+def test_record_fields_change_through_dict_access():
+    r = Record.from_dict(dict(RECORD))
+    r["message_sent"] = True
+    r["play_hours"] = 2.25
+    assert r.minutes == 135
+    assert r.get("missing", "기본") == "기본"
+    data = r.to_dict()
+    assert data["message_sent"] is True
+    assert data["play_hours"] == 2.25
+
+
+def test_copy_is_independent():
+    c = Customer.from_dict({"id": "c1", "name": "홍길동", "total_hours": 10, "used_hours": 2.5,
+                            "memo": "", "vip": True})
+    copy = c.copy()
+    c["used_hours"] = 4
+    c["vip"] = False
+    assert copy["used_hours"] == 2.5
+    assert copy.to_dict()["vip"] is True
+
+
+def test_customer_hours_are_kept_as_minutes():
+    c = Customer.from_dict({"id": "c1", "name": "홍길동", "total_hours": 10.5, "used_hours": 0.123})
+    assert c.total_minutes == 630
+    assert c.used_minutes == 7
+    assert c.to_dict()["used_hours"] == 0.123
+    assert c.remaining_minutes == 623
@@ -0,0 +1,71 @@
+"""여러 건 차감은 모두 반영되거나 하나도 반영되지 않는다"""
+
+import pytest
+
+from alimtalk.messages import MessageRenderer
+from alimtalk.repository import Repository
+from alimtalk.service import DeductionService
+
+
+@pytest.fixture
+def repo():
+    repo = Repository().load()
+    for name in ("홍길동", "김철수"):
+        _, entry = repo.save_customer({"name": name, "phone": "", "game_name": "리니지", "memo": ""},
+                                      600, 60)
+        repo.commit([entry])
+    yield repo
+    repo.close()
+
+
+def service(repo):
+    return DeductionService(repo, MessageRenderer(repo.settings, repo.templates, repo.ledger))
+
+
+def state(repo):
+    return ([r.id for r in repo.records],
+            [(c["used_hours"], repo.ledger.balance(c["id"])) for c in repo.customers],
+            repo.stats.pending_count(), repo.journal.pending)
+
+
+def test_failure_partway_leaves_nothing_applied(repo):
+    a, b = repo.customers
+    driver = repo.drivers[0]
+    broken_driver = {"id": "x", "name": "시급 없는 기사"}
+    before = state(repo)
+    with pytest.raises(KeyError):
+        service(repo).deduct([(a, driver, 1), (b, driver, 2), (a, broken_driver, 1)])
+    assert state(repo) == before
+
+
+def test_invalid_item_is_rejected_before_anything_is_applied(repo):
+    a, b = repo.customers
+    driver = repo.drivers[0]
+    before = state(repo)
+    with pytest.raises(ValueError, match="2번째 차감"):
+        service(repo).deduct([(a, driver, 1), (b, driver, 0)])
+    assert state(repo) == before
+
+
+def test_repeated_customer_uses_hours_after_the_earlier_item(repo):
+    a, b = repo.customers
+    driver = repo.drivers[0]
+    results = service(repo).deduct([(a, driver, 1), (b, driver, 0.5), (a, driver, 1.5)])
+
+    first, second = results[0][0], results[2][0]
+    assert (first["used_before"], first["used_after"]) == (1, 2)
+    assert (second["used_before"], second["used_after"]) == (2, 3.5)
+    assert second["remaining_after"] == 6.5
+    assert "남은 이용 시간:  6시간 30분" in results[2][1]
+    assert a["used_hours"] == 3.5
+    assert b["used_hours"] == 1.5
+
+    # 저널과 원장에서 다시 읽어도 같은 상태다
+    repo.persist.flush()
+    reopened = Repository(read_only=True).load()
+    try:
+        assert [r.id for r in reopened.records] == [r.id for r, _ in results]
+        assert [c["used_hours"] for c in reopened.customers] == [3.5, 1.5]
+        assert reopened.ledger_mismatches == []
+    finally:
+        reopened.release()
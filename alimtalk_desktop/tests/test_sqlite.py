@@ -0,0 +1,98 @@
+"""JSON 에서 SQLite 저장소로 옮기기와 SQLite 저장소 조회"""
+
+import os
+
+import pytest
+
+from alimtalk.config import (CUSTOMERS_FILE, DB_FILE, DRIVERS_FILE, JOURNAL_FILE, RECORDS_FILE,
+                             SETTINGS_FILE)
+from alimtalk.records import RecordPager
+from alimtalk.storage import (DataDirLock, DataLockedError, RecordJournal, load_json,
+                              load_json_array, migrate_json_to_sqlite, open_store, save_json)
+
+
+def record(n, sent=False):
+    return {"id": f"r{n}", "customer_id": "c1", "date": f"2024-03-{n:02d}",
+            "created_at": f"2024-03-{n:02d}T10:00:00", "play_hours": 1, "message_sent": sent}
+
+
+@pytest.fixture
+def json_data():
+    save_json(CUSTOMERS_FILE, [{"id": "c1", "name": "홍길동", "used_hours": 0},
+                               {"id": "c2", "name": "김철수", "used_hours": 0}])
+    with open(RECORDS_FILE, "w", encoding="utf-8") as f:
+        # 세 번째 원소가 깨져 있다
+        f.write('[{"id":"r1","customer_id":"c1","date":"2024-03-01","created_at":"2024-03-01T10:00:00",'
+                '"play_hours":1,"message_sent":true},'
+                '{"id":"r2","customer_id":"c1","date":"2024-03-02","created_at":"2024-03-02T10:00:00",'
+                '"play_hours":1,"message_sent":false},'
+                '{"id":"r3","customer_id":,},'
+                '{"id":"r4","customer_id":"c1","date":"2024-03-04","created_at":"2024-03-04T10:00:00",'
+                '"play_hours":1,"message_sent":false}]')
+    save_json(DRIVERS_FILE, [{"id": "d1", "name": "기사A", "hourly_rate": 5000}])
+    save_json(SETTINGS_FILE, {"business_name": "테스트", "gateway_rate": 10})
+    journal = RecordJournal(JOURNAL_FILE)
+    journal.append("record", record=record(5))
+    journal.append_batch([{"op": "sent", "id": "r2"}, {"op": "used_hours", "id": "c1", "value": 3}])
+    journal.append("customer_deleted", id="c2")
+    journal.close()
+
+
+def test_migration_moves_snapshots_and_journal(json_data, capsys):
+    migrate_json_to_sqlite(batch_size=2)
+    out = capsys.readouterr().out
+    assert "고객 1명, 차감 기록 4건" in out
+    assert "손상된 부분 1곳 건너뜀" in out
+    assert os.path.exists(DB_FILE)
+    assert not os.path.exists(DB_FILE + ".tmp")
+    assert not os.path.exists(JOURNAL_FILE)
+
+    store = open_store()
+    assert store.integrity_check() == "ok"
+    records = load_json_array(RECORDS_FILE, [])
+    assert [(r["id"], r["message_sent"]) for r in records] == [
+        ("r1", True), ("r2", True), ("r4", False), ("r5", False)]
+    assert load_json(CUSTOMERS_FILE, []) == [{"id": "c1", "name": "홍길동", "used_hours": 3}]
+    assert load_json(DRIVERS_FILE, []) == [{"id": "d1", "name": "기사A", "hourly_rate": 5000}]
+    assert load_json(SETTINGS_FILE, {}) == {"business_name": "테스트", "gateway_rate": 10}
+
+
+def test_migration_runs_only_once(json_data, capsys):
+    migrate_json_to_sqlite()
+    capsys.readouterr()
+    migrate_json_to_sqlite()
+    assert "이미 SQLite 저장소를 사용 중입니다" in capsys.readouterr().out
+
+
+def test_migration_refuses_while_folder_is_locked(json_data):
+    with DataDirLock():
+        with pytest.raises(DataLockedError):
+            migrate_json_to_sqlite()
+    assert not os.path.exists(DB_FILE)
+
+
+def test_unsaved_table_gives_default(capsys):
+    save_json(CUSTOMERS_FILE, [])
+    migrate_json_to_sqlite()
+    assert load_json(DRIVERS_FILE, "기본") == "기본"
+
+
+def test_failed_batch_is_rolled_back(json_data, capsys):
+    migrate_json_to_sqlite()
+    store = open_store()
+    with pytest.raises(KeyError):
+        store.apply("batch", {"entries": [{"op": "record", "record": record(6)},
+                                          {"op": "record", "record": {"customer_id": "c1"}}]})
+    assert store.count_records() == 4
+
+
+def test_pager_reads_newest_first_from_the_index(json_data, capsys, monkeypatch):
+    migrate_json_to_sqlite()
+    store = open_store()
+    store.save(RECORDS_FILE, [record(n) for n in range(6, 30)])
+    monkeypatch.setattr(RecordPager, "PAGE_SIZE", 5)
+    pager = RecordPager([], store)
+    assert pager.count() == 28
+    assert [r["id"] for r in pager.fetch(3, 8)] == ["r26", "r25", "r24", "r23", "r22"]
+    assert pager.index_of_date("2024-03-20") == 9
+    assert pager.fetch(9, 10)[0]["id"] == "r20"
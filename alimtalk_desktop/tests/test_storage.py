@@ -0,0 +1,134 @@
+"""원자적 저장과 백업 세대, 배열 스트리밍 읽기"""
+
+import io
+import json
+import os
+
+import pytest
+
+from alimtalk import storage
+from alimtalk.config import BACKUP_GENERATIONS, RECOVERED_FILES
+from alimtalk.storage import backup_path, iter_json_array, load_json, load_json_array, save_json
+
+
+@pytest.fixture
+def path(data_dir):
+    return os.path.join(data_dir, "customers.json")
+
+
+def test_each_save_pushes_previous_file_to_backups(path):
+    for n in range(BACKUP_GENERATIONS + 2):
+        save_json(path, [n])
+    assert load_json(path, None) == [BACKUP_GENERATIONS + 1]
+    for g in range(1, BACKUP_GENERATIONS + 1):
+        assert load_json(backup_path(path, g), None) == [BACKUP_GENERATIONS + 1 - g]
+    assert not os.path.exists(backup_path(path, BACKUP_GENERATIONS + 1))
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+
+
+def test_failed_write_keeps_original_and_backups(path, monkeypatch):
+    save_json(path, ["old"])
+    save_json(path, ["current"])
+
+    def fail(fd):
+        raise OSError("디스크 가득 참")
+
+    monkeypatch.setattr(storage.os, "fsync", fail)
+    with pytest.raises(OSError):
+        save_json(path, ["new"])
+    monkeypatch.undo()
+
+    assert load_json(path, None) == ["current"]
+    assert load_json(backup_path(path, 1), None) == ["old"]
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+
+
+def test_corrupt_file_is_read_from_newest_readable_backup(path):
+    save_json(path, ["first"])
+    save_json(path, ["second"])
+    save_json(path, ["third"])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('["thi')
+    with open(backup_path(path, 1), "w", encoding="utf-8") as f:
+        f.write("")
+
+    assert load_json(path, None) == ["first"]
+    assert RECOVERED_FILES == ["customers.json (백업에서 불러옴)"]
+
+
+def test_missing_file_and_backups_give_default(path):
+    assert load_json(path, {"기본": 1}) == {"기본": 1}
+    assert RECOVERED_FILES == []
+
+
+# ─── 배열 스트리밍 읽기 ───
+def read_array(text, chunk_size=1 << 20):
+    errors = []
+    items = list(iter_json_array(io.StringIO(text), errors, chunk_size=chunk_size))
+    return items, [(index, message) for index, _, message in errors]
+
+
+@pytest.mark.parametrize("chunk_size", [1 << 20, 64, 5])
+def test_stream_matches_json_loads(chunk_size):
+    data = [{"id": f"r{n}", "play_hours": n / 4, "name": "홍길동" * (n % 3), "tags": [n, {"k": n}]}
+            for n in range(300)]
+    for text in (json.dumps(data, ensure_ascii=False), json.dumps(data, indent=2)):
+        assert read_array(text, chunk_size) == (data, [])
+
+
+@pytest.mark.parametrize("chunk_size", [1 << 20, 3])
+def test_stream_numbers_split_across_chunks(chunk_size):
+    assert read_array("[1234567, 89, 3.25e2]", chunk_size) == ([1234567, 89, 325.0], [])
+
+
+def test_stream_empty_array_and_not_an_array():
+    assert read_array("  [ ]  ") == ([], [])
+    with pytest.raises(ValueError):
+        read_array('{"id": "a"}')
+
+
+@pytest.mark.parametrize("chunk_size", [1 << 20, 5])
+def test_stream_skips_damaged_element_in_the_middle(chunk_size):
+    text = '[{"id":"a","v":1},{"id":"b","v":},{"id":"c","v":3}]'
+    items, errors = read_array(text, chunk_size)
+    assert items == [{"id": "a", "v": 1}, {"id": "c", "v": 3}]
+    assert [index for index, _ in errors] == [1]
+
+
+def test_stream_does_not_take_values_inside_a_damaged_element():
+    text = '[{"id":"a","x":{"k":1}},{"id":"b","x":{"k":},"y":{"k":2}},{"id":"c"}]'
+    items, errors = read_array(text)
+    assert items == [{"id": "a", "x": {"k": 1}}, {"id": "c"}]
+    assert len(errors) == 1
+
+
+def test_stream_truncated_file():
+    assert read_array('[{"id":"a"},{"id":"b"}') == (
+        [{"id": "a"}, {"id": "b"}], [(2, "파일 끝에 닫는 ] 가 없습니다")])
+    items, errors = read_array('[{"id":"a"},{"id":"b","v":[1,2')
+    assert items == [{"id": "a"}]
+    assert len(errors) == 1
+
+
+def test_stream_drops_element_followed_by_garbage():
+    items, errors = read_array('[{"id":"a"} x {"id":"b"},{"id":"c"}]')
+    assert items == [{"id": "c"}]
+    assert errors == [(0, "원소 뒤에 'x' 가 있습니다")]
+
+
+def test_load_json_array_reports_skipped_parts(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('[{"id":"a"},{"id":"b",},{"id":"c"}]')
+    errors = []
+    assert load_json_array(path, [], errors) == [{"id": "a"}, {"id": "c"}]
+    assert len(errors) == 1
+    assert RECOVERED_FILES == ["customers.json (손상된 부분 1곳 건너뜀)"]
+
+
+def test_load_json_array_uses_backup_when_nothing_is_readable(path):
+    save_json(path, [{"id": "a"}])
+    save_json(path, [{"id": "a"}, {"id": "b"}])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('[{"id":')
+    assert load_json_array(path, []) == [{"id": "a"}]
+    assert RECOVERED_FILES == ["customers.json (백업에서 불러옴)"]